@@ -0,0 +1,39 @@
+"""Throughput of the LZNT1 decoder on a few kinds of data (MB/s of output).
+
+Text and repetitive records exercise the token loop; zeros and random
+data are mostly copied whole (long back-references, stored chunks).
+"""
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from openrecover.lznt1 import compress, decompress
+
+UNIT = 64 * 1024
+
+def sample(kind: str) -> bytes:
+    if kind == "zeros":
+        return bytes(UNIT)
+    if kind == "random":
+        return os.urandom(UNIT)
+    if kind == "text":
+        words = [os.urandom(3).hex().encode() for _ in range(400)]
+        return b" ".join(words[int.from_bytes(os.urandom(2), "little") % 400] for _ in range(UNIT // 6))[:UNIT]
+    return b"".join(b"record %06d ok\n" % (i % 50) for i in range(UNIT // 14 + 1))[:UNIT]
+
+def main(seconds: float = 1.0) -> None:
+    for kind in ("zeros", "repetitive", "text", "random"):
+        data = sample(kind)
+        packed = compress(data)
+        assert decompress(packed, UNIT) == data
+        n, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            decompress(packed, UNIT)
+            n += 1
+        mbps = n * UNIT / (time.perf_counter() - t0) / 1e6
+        print(f"{kind:<11} ratio {UNIT / len(packed):5.1f}x  {mbps:8.1f} MB/s")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
@@ -0,0 +1,31 @@
+import argparse
+import time
+from openrecover.hashset import HashSet, build_hashset, read_digests, DIGEST_SIZES
+
+def main():
+    p = argparse.ArgumentParser(description="OpenRecover known-file hash sets")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    bd = sub.add_parser("build", help="Build an index from hash lists (hex per line or NSRL CSV)")
+    bd.add_argument("inputs", nargs="+", help="Text/CSV files with digests")
+    bd.add_argument("--out", required=True, help="Index file to write")
+    bd.add_argument("--algorithm", choices=sorted(DIGEST_SIZES), default="md5")
+    bd.add_argument("--bits", type=int, default=10, help="Bloom filter bits per digest")
+
+    lk = sub.add_parser("lookup", help="Check digests against an index")
+    lk.add_argument("index")
+    lk.add_argument("digests", nargs="+")
+
+    args = p.parse_args()
+    if args.cmd == "build":
+        t0 = time.time()
+        digests = (d for path in args.inputs for d in read_digests(path, args.algorithm))
+        n = build_hashset(digests, args.out, algorithm=args.algorithm, bits_per_entry=args.bits)
+        print(f"{n} digests -> {args.out} ({time.time() - t0:.1f}s)")
+    else:
+        with HashSet(args.index) as hs:
+            for d in args.digests:
+                print(f"{d} {'known' if d in hs else 'unknown'}")
+
+if __name__ == "__main__":
+    main()
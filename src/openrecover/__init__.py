@@ -9,6 +9,7 @@ from .carver import FileCarver
 from .scanner import NTFSScanner, MFTRecord
 from .parser import MFTParser, ParsedRecord
 from .recovery import FileRecovery
+from .volume import NTFSVolume
 
 __all__ = [
     'FileCarver',
@@ -17,4 +18,5 @@ __all__ = [
     'MFTParser',
     'ParsedRecord',
     'FileRecovery',
+    'NTFSVolume',
 ]
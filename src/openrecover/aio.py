@@ -0,0 +1,88 @@
+"""
+asyncio integration for the scanners.
+
+:class:`ScanControl` replaces the polled ``pause_flag``/``stop_flag``
+callbacks with events, and :func:`drive` turns one of the scanners'
+internal generators (which yield None at every chunk boundary) into an
+async generator.  Each step runs in an executor so device reads and
+searching never block the event loop, and the next step is only
+scheduled when the consumer asks for another item.
+"""
+
+from __future__ import annotations
+import asyncio
+import time
+from typing import AsyncIterator, Iterator, Optional
+
+class ScanControl:
+    """Event-based pause/resume/stop for async scans.
+
+    Call the methods from the event loop thread (or through
+    ``loop.call_soon_threadsafe``).
+    """
+
+    def __init__(self) -> None:
+        self._running = asyncio.Event()
+        self._running.set()
+        self._stopped = False
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def stop(self):
+        self._stopped = True
+        self._running.set()  # wake a paused scan so it can finish
+
+    async def checkpoint(self) -> bool:
+        """Wait while paused; return False once the scan should stop."""
+        if not self._running.is_set():
+            await self._running.wait()
+        return not self._stopped
+
+_DONE = object()
+
+def _step(gen: Iterator):
+    return next(gen, _DONE)
+
+async def drive(gen: Iterator, owner, control: Optional[ScanControl] = None, executor=None,
+                progress_interval: float = 0.1) -> AsyncIterator:
+    """Run ``gen`` step by step in ``executor`` and yield its non-None items.
+
+    ``owner.progress_cb`` is called on the loop thread, at most once per
+    ``progress_interval`` seconds plus once at the end.
+    """
+    loop = asyncio.get_running_loop()
+    user_cb = owner.progress_cb
+    latest = [None]
+    owner.progress_cb = lambda cur, total: latest.__setitem__(0, (cur, total))
+    last_emit = 0.0
+    try:
+        while True:
+            if control is not None and not await control.checkpoint():
+                break
+            item = await loop.run_in_executor(executor, _step, gen)
+            if item is _DONE:
+                break
+            now = time.monotonic()
+            if latest[0] is not None and now - last_emit >= progress_interval:
+                user_cb(*latest[0])
+                latest[0] = None
+                last_emit = now
+            if item is not None:
+                yield item
+    finally:
+        owner.progress_cb = user_cb
+        await loop.run_in_executor(executor, gen.close)
+        if latest[0] is not None:
+            user_cb(*latest[0])
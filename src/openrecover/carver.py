@@ -1,8 +1,21 @@
-import os, hashlib
-from dataclasses import dataclass
-from typing import Iterable, Optional, Callable
-from .rawio import RawDevice, to_raw_if_drive
+import os, time, hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Callable, Tuple, Union
+from .rawio import FaultTolerantReader, RawDevice, SkipMap, copy_range, to_raw_if_drive
 from .signatures import FileSignature
+from .parser import parse_boot_sector
+from .incremental import BlockManifest, hash_blocks, plan_rescan
+from .manifest import Hasher, HashManifest
+from .tuning import ChunkTuner, signature_window
+from .hashset import HashSet, open_hashset
+from .container import PackWriter, open_pack, pack_ref
+from .compressed import CompressedSource, detect_format
+from .intervals import FileOrigin, RunIndex
+from .volume import NTFSVolume
+from .triage import CONSTANT, HIGH_ENTROPY, TRIAGE_BLOCK, TriageMap, build_triage
+from .priority import (
+    PRIORITY_SAMPLES, deleted_file_starts, merge, plan_priority, sample_dense, subtract,
+)
 
 @dataclass
 class CarveResult:
@@ -13,6 +26,11 @@ class CarveResult:
     ok: bool
     note: str
     raw_data: bytes  # holds the canonical carved data for preview/recovery
+    hashes: Dict[str, str] = field(default_factory=dict)  # digests of the carved bytes
+    preview_only: bool = False  # raw_data is only the first PREVIEW_BYTES of [start, end)
+    origin: Optional[FileOrigin] = None  # the MFT record whose runs held these bytes
+
+PREVIEW_BYTES = 1024 * 1024
 
 def _ensure_dir(p: str):
     os.makedirs(p, exist_ok=True)
@@ -32,8 +50,8 @@ class FileCarver:
         source: str,
         output_dir: str,
         signatures: Iterable[FileSignature],
-        chunk: int = 16 * 1024 * 1024,
-        overlap: int = 256 * 1024,
+        chunk: Union[int, str] = 16 * 1024 * 1024,  # "auto" (or 0) tunes it while scanning
+        overlap: Union[int, str] = 256 * 1024,      # "auto" derives it from the signatures
         max_files: int = 0,
         fast_index: bool = False,
         max_bytes: int = 0,
@@ -43,59 +61,369 @@ class FileCarver:
         progress_cb: Optional[Callable[[int, int], None]] = None,
         stop_flag: Optional[Callable[[], bool]] = None,
         pause_flag: Optional[Callable[[], bool]] = None,
-        write_output: bool = True  # new: control whether files are immediately written
+        write_output: bool = True,  # new: control whether files are immediately written
+        cluster_size: int = 0,      # fast_index alignment; 0 = detect from boot sector
+        end_offset: int = 0,        # headers at or past this offset are left to the next range
+        ranges: Optional[Iterable[Tuple[int, int]]] = None,  # only scan these [start, end) ranges
+        block_manifest: str = "",       # incremental rescan: per-block fingerprints + hits
+        block_size: int = 1024 * 1024,
+        digests: Iterable[str] = (),    # e.g. ("sha256", "md5", "sha1"), kept on each result
+        hash_manifest: str = "",        # append one JSONL entry per carved file
+        max_inflight_bytes: int = 32 * 1024 * 1024,  # larger hits are streamed, not held in RAM
+        partition: Optional[int] = None,  # scan only this partition (index into read_partitions)
+        skip_map: Union[str, SkipMap, None] = None,  # unreadable ranges, shared with later scans
+        sector_size: int = 512,     # granularity for isolating bad sectors
+        known_hashes: Union[str, HashSet, None] = None,  # drop hits found in this hash set
+        container: Union[str, PackWriter, None] = None,  # write hits into this pack, not loose files
+        container_compression: str = "none",  # "deflate" or "zstd" per pack entry
+        mft_index: Union[RunIndex, bool, None] = None,  # True: build it from the volume's MFT
+        skip_mft_duplicates: bool = False,  # drop hits that MFT recovery already covers
+        triage: Union[str, TriageMap, None] = None,  # block classes; a path is loaded or built + saved
+        priority: bool = False,     # carve the most promising regions first (see priority.py)
     ):
         self.src_str = source
         self.output_dir = output_dir
         self.signatures = list(signatures)
-        self.chunk = max(4096, chunk)
-        self.overlap = max(0, overlap)
+        self._tuner = None
+        if chunk in ("auto", 0):
+            self.chunk = 16 * 1024 * 1024  # only sets the carve length limit below
+        else:
+            self.chunk = max(4096, int(chunk))
+        self.carve_limit = 2 * self.chunk   # longest carve when no footer/size is found
+        if overlap in ("auto", None):
+            self.overlap = signature_window(self.signatures)
+        else:
+            self.overlap = max(0, int(overlap))
         self.max_files = max_files
         self.fast_index = fast_index
         self.max_bytes = max_bytes
         self.min_size = min_size
         self.start_offset = max(0, start_offset)
+        self.end_offset = max(0, end_offset)
         self.dedup = deduplicate
         self.progress_cb = progress_cb or (lambda a, b: None)
         self.stop_flag = stop_flag or (lambda: False)
         self.pause_flag = pause_flag or (lambda: False)
         self.write_output = write_output
+        self.block_manifest = block_manifest
+        self.block_size = max(4096, block_size)
         self._sha_seen: set[str] = set()
+        self.stats = {"bytes_read": 0}
+        self.digests = list(digests)
+        if hash_manifest and not self.digests:
+            self.digests = ["sha256"]
+        Hasher(self.digests)  # reject unknown names up front
+        self._manifest = HashManifest(hash_manifest) if hash_manifest else None
+        self._own_known = isinstance(known_hashes, str)
+        self.known = open_hashset(known_hashes)
+        self._own_pack = isinstance(container, str)
+        self.pack = open_pack(container, container_compression)
+        if self.known is not None:
+            self.stats["known_skipped"] = 0
+        self.max_inflight_bytes = max(0, max_inflight_bytes)
+        if chunk in ("auto", 0):
+            self._tuner = ChunkTuner(limit=self.max_inflight_bytes or 64 * 1024 * 1024)
+            self.chunk = self._tuner.chunk
+        self.stats["chunk"] = self.chunk
+        self.stats["overlap"] = self.overlap
 
         # choose reader
         sp = to_raw_if_drive(self.src_str)
         self._is_raw = (sp.startswith(r"\\.\\".rstrip("\\")) and os.name == "nt")
         self._raw = RawDevice(sp) if self._is_raw else None
-        self._fin = open(sp, "rb", buffering=0) if not self._is_raw else None
+        self._comp = CompressedSource(sp) if not self._is_raw and detect_format(sp) else None
+        self._fin = open(sp, "rb", buffering=0) if not (self._is_raw or self._comp) else None
+        if not isinstance(skip_map, SkipMap):
+            skip_map = SkipMap(skip_map or "")
+        self._reader = FaultTolerantReader(self._read_source, sector=max(1, sector_size),
+                                           skip_map=skip_map)
+        self.skip_map = skip_map
+        self.stats["skip_map"] = skip_map.ranges  # live view of the unreadable ranges
 
         # determine total size if possible
-        self.total = (self._raw.length if self._is_raw else os.path.getsize(sp)) or 0
+        if self._comp is not None:
+            self.total = self._comp.length or 0
+        else:
+            self.total = (self._raw.length if self._is_raw else os.path.getsize(sp)) or 0
         if self.max_bytes and self.total:
             self.total = min(self.total, self.max_bytes)
 
+        self.partition = None
+        if partition is not None:
+            from .partitions import get_partition
+            p = self.partition = get_partition(self.src_str, partition)
+            # start/end offsets become relative to the partition; ranges stay
+            # absolute (e.g. from unallocated_ranges) and are clipped to it
+            self.start_offset = p.offset + self.start_offset
+            self.end_offset = min(p.end, p.offset + self.end_offset) if self.end_offset else p.end
+            if ranges is None:
+                ranges = [(self.start_offset, self.end_offset)]
+            cluster_size = cluster_size or p.cluster_size
+
+        self.ranges = self._normalize_ranges(ranges) if ranges is not None else None
+        self.scan_total = self.total
+        if self.ranges is not None:
+            self.scan_total = sum(e - s for s, e in self.ranges)
+            self.stats["ranges"] = len(self.ranges)
+            self.stats["range_bytes"] = self.scan_total
+
+        # fast_index: only test headers at sector/cluster-aligned offsets
+        self.align = 0
+        self.align_base = 0
+        if self.fast_index:
+            self.align, self.align_base = self._detect_alignment(cluster_size)
+
+        self.skip_mft_duplicates = skip_mft_duplicates
+        if mft_index is True:
+            try:
+                mft_index = RunIndex.from_volume(sp, self.partition.offset if self.partition else 0)
+            except (ValueError, OSError):
+                mft_index = None  # not an NTFS volume: hits stay anonymous
+        self.mft_index = mft_index or None
+        if self.mft_index is not None:
+            self.stats["mft_runs"] = len(self.mft_index)
+            self.stats["mft_annotated"] = 0
+            self.stats["mft_duplicates"] = 0
+
+        self._triage_path = triage if isinstance(triage, str) else ""
+        self.triage = triage if isinstance(triage, TriageMap) else None
+        self._triaged = False
+        self.priority = priority
+
         _ensure_dir(self.output_dir)
 
+    def _detect_alignment(self, cluster_size: int):
+        if cluster_size > 0:
+            return cluster_size, self.start_offset
+        try:
+            bs = parse_boot_sector(self._read_at(self.start_offset, 512))
+        except Exception:
+            bs = None
+        if bs:
+            return bs.cluster_size, self.start_offset
+        return 512, 0
+
+    def _normalize_ranges(self, ranges) -> List[Tuple[int, int]]:
+        """Sort, clip to the scan window and merge overlapping/adjacent ranges."""
+        lo = self.start_offset
+        hi = self.end_offset or self.total
+        if self.end_offset and self.total:
+            hi = min(hi, self.total)
+        out: List[Tuple[int, int]] = []
+        for s, e in sorted(ranges):
+            s = max(s, lo)
+            if hi:
+                e = min(e, hi)
+            if e <= s:
+                continue
+            if out and s <= out[-1][1]:
+                out[-1] = (out[-1][0], max(out[-1][1], e))
+            else:
+                out.append((s, e))
+        return out
+
     def close(self):
+        self.skip_map.save()
+        if self._manifest:
+            self._manifest.close()
+            self._manifest = None
+        if self.pack is not None and self._own_pack:
+            self.pack.close()
+            self.pack = None
+        if self.known is not None and self._own_known:
+            self.known.close()
+            self.known = None
         if self._raw:
             self._raw.close()
         if self._fin:
             self._fin.close()
+        if self._comp:
+            self._comp.close()
 
-    def _read_at(self, off: int, size: int) -> bytes:
+    def _read_source(self, off: int, size: int) -> bytes:
         if self._is_raw:
             return self._raw.read_at(off, size)
-        else:
-            self._fin.seek(off, os.SEEK_SET)
-            return self._fin.read(size)
+        if self._comp is not None:
+            return self._comp.read_at(off, size)
+        self._fin.seek(off, os.SEEK_SET)
+        return self._fin.read(size)
+
+    def _read_at(self, off: int, size: int) -> bytes:
+        data = self._reader.read_at(off, size)
+        self.stats["bytes_read"] += len(data)
+        if self._reader.failed_reads:
+            self.stats["failed_reads"] = self._reader.failed_reads
+            self.stats["bad_bytes"] = self.skip_map.bad_bytes
+            self.stats["unprobed_bytes"] = self._reader.provisional.bad_bytes
+        return data
 
     def _emit(self, cur: int):
-        self.progress_cb(cur, self.total or 0)
+        self.progress_cb(cur, self.scan_total or 0)
 
     def _sha256(self, data: bytes) -> str:
         from .utils import sha256 as _sha
         return _sha(data)
 
-    def _write_file(self, subdir: str, name: str, data: bytes):
+    def _hash_hit(self, canonical: bytes, data: bytes) -> Optional[Dict[str, str]]:
+        """Digest the carved bytes in one pass; None if a duplicate.
+
+        ``canonical`` is a prefix of ``data``, so the dedup SHA-256 is
+        taken from a copy of the running state at that point.
+        """
+        if not self.digests and self.known is None:
+            if self.dedup:
+                sha = self._sha256(canonical)
+                if sha in self._sha_seen:
+                    return None
+                self._sha_seen.add(sha)
+            return {}
+        h = Hasher(self._hash_names())
+        mv = memoryview(data)
+        h.update(mv[:len(canonical)])
+        if self.dedup:
+            sha = (h.copy() if len(canonical) < len(data) else h).hexdigests(["sha256"])["sha256"]
+            if sha in self._sha_seen:
+                return None
+            self._sha_seen.add(sha)
+        h.update(mv[len(canonical):])
+        if self._is_known(h):
+            return None
+        return h.hexdigests(self.digests)
+
+    def _hash_names(self) -> List[str]:
+        names = list(self.digests)
+        if self.dedup:
+            names.append("sha256")
+        if self.known is not None:
+            names.append(self.known.algorithm)
+        return names
+
+    def _is_known(self, h: Hasher) -> bool:
+        """True (and counted) if the finished digests are in the known-file set."""
+        if self.known is None:
+            return False
+        algo = self.known.algorithm
+        if h.hexdigests([algo])[algo] not in self.known:
+            return False
+        self.stats["known_skipped"] += 1
+        return True
+
+    def _copy_file(self, subdir: str, name: str, start: int, length: int):
+        """Write ``[start, start + length)`` of the source without holding it in memory."""
+        src = self._fin.fileno() if self._fin else self._reader
+        if self.pack is not None:
+            entry = f"{subdir}/{name[:180]}"
+            if self.pack.has(entry, length):   # carved by an earlier run into this pack
+                return pack_ref(self.pack.path, entry), None
+            try:
+                ref, n = self.pack.add_range(entry, src, start, length,
+                                             type=subdir, src_offset=start)
+            except Exception as e:
+                return "", f"write error: {e}"
+            self.stats["bytes_copied"] = self.stats.get("bytes_copied", 0) + n
+            return ref, None if n == length else f"short copy: {n} of {length} bytes"
+        out_dir = os.path.join(self.output_dir, subdir)
+        _ensure_dir(out_dir)
+        out_path = os.path.join(out_dir, name[:180])
+        try:
+            with open(_long(out_path), "wb") as fo:
+                n = copy_range(src, start, length, fo.fileno())
+            self.stats["bytes_copied"] = self.stats.get("bytes_copied", 0) + n
+            return out_path, None if n == length else f"short copy: {n} of {length} bytes"
+        except Exception as e:
+            return out_path, f"write error: {e}"
+
+    def _carve_streamed(self, sig: FileSignature, pos: int, first: bytes, limit: int
+                        ) -> Optional[CarveResult]:
+        """Carve a hit longer than ``max_inflight_bytes`` window by window.
+
+        ``first`` is the window already read at ``pos`` (no footer in it).
+        The end is found and the bytes hashed in one pass; the output is
+        then copied source-to-file and only a preview is kept in memory.
+        """
+        footer = sig.footer or b""
+        keep = len(footer) - 1
+        window = len(first)
+        h = Hasher(self._hash_names())
+        preview = first[:PREVIEW_BYTES]
+        h.update(first)
+        off, stop = pos + len(first), pos + limit
+        tail = first[-keep:] if keep > 0 else b""
+        del first
+        while off < stop:
+            if self.stop_flag():
+                return None
+            win = self._read_at(off, min(window, stop - off))
+            if not win:
+                break
+            cut, found = len(win), False
+            if footer:
+                j = (tail + win).find(footer)
+                if j >= 0:
+                    cut, found = j + len(footer) - len(tail), True
+            h.update(memoryview(win)[:cut])
+            off += cut
+            if found:
+                break
+            tail = win[-keep:] if keep > 0 else b""
+        length = off - pos
+        if length < self.min_size:
+            return None
+        if self.dedup:
+            sha = h.hexdigests(["sha256"])["sha256"]
+            if sha in self._sha_seen:
+                return None
+            self._sha_seen.add(sha)
+        if self._is_known(h):
+            return None
+        import imghdr
+        expected = {"jpeg": "jpeg", "jpg": "jpeg", "png": "png", "gif": "gif"}.get(sig.name.lower())
+        if expected and imghdr.what(None, preview) != expected:
+            return None
+        origin, skip = self._origin(pos, off)
+        if skip:
+            return None
+        ok, note, out_path = True, "", ""
+        if self.write_output:
+            out_name = f"{sig.name}_{pos}_len{length}.{sig.ext}"
+            out_path, werr = self._copy_file(sig.name, out_name, pos, length)
+            if werr:
+                ok, note = False, werr
+        return CarveResult(sig=sig, start=pos, end=off, out_path=out_path, ok=ok, note=note,
+                           raw_data=preview, hashes=h.hexdigests(self.digests),
+                           preview_only=True, origin=origin)
+
+    def _window(self, limit: int) -> int:
+        return min(limit, self.max_inflight_bytes) if self.max_inflight_bytes else limit
+
+    def _record(self, r: CarveResult, length: int):
+        if self._manifest:
+            extra = {"origin": r.origin.as_dict()} if r.origin is not None else {}
+            self._manifest.add(source=self.src_str, type=r.sig.name, offset=r.start,
+                               length=length, path=r.out_path, ok=r.ok, hashes=r.hashes, **extra)
+
+    def _origin(self, start: int, end: int) -> Tuple[Optional[FileOrigin], bool]:
+        """The record owning ``[start, end)``, and whether the hit should be dropped."""
+        if self.mft_index is None:
+            return None, False
+        origin = self.mft_index.origin(start, end)
+        if origin is None:
+            return None, False
+        self.stats["mft_annotated"] += 1
+        if origin.duplicate:
+            self.stats["mft_duplicates"] += 1
+            return origin, self.skip_mft_duplicates
+        return origin, False
+
+    def _write_file(self, subdir: str, name: str, data: bytes, start: int = 0):
+        if self.pack is not None:
+            entry = f"{subdir}/{name[:180]}"
+            if self.pack.has(entry, len(data)):   # carved by an earlier run into this pack
+                return pack_ref(self.pack.path, entry), None
+            try:
+                return self.pack.add(entry, data, type=subdir, src_offset=start), None
+            except Exception as e:
+                return "", f"write error: {e}"
         out_dir = os.path.join(self.output_dir, subdir)
         _ensure_dir(out_dir)
         base = name[:180]
@@ -126,111 +454,378 @@ class FileCarver:
             return box_size if box_size > 0 else None
         return None
 
+    def _candidates(self, buf: bytes, cur: int, limit: int):
+        """Yield (index, signature) header hits in ``buf[:limit]`` read at ``cur``."""
+        if not self.align:
+            for sig in self.signatures:
+                start_index = 0
+                while True:
+                    i = buf.find(sig.header, start_index)
+                    if i < 0 or i >= limit:
+                        break
+                    yield i, sig
+                    start_index = i + 1
+            return
+        by_first: dict[int, list[FileSignature]] = {}
+        for sig in self.signatures:
+            by_first.setdefault(sig.header[0], []).append(sig)
+        step = self.align
+        for i in range((self.align_base - cur) % step, limit, step):
+            sigs = by_first.get(buf[i])
+            if sigs:
+                for sig in sigs:
+                    if buf.startswith(sig.header, i):
+                        yield i, sig
+
+    def _scan_end(self) -> int:
+        end = self.end_offset or self.total
+        if self.end_offset and self.total:
+            end = min(end, self.total)
+        return end
+
     def scan(self):
-        cur = self.start_offset
-        produced = 0
-        overlap = min(self.overlap, self.chunk // 2)
+        t0 = time.perf_counter()
+        for r in self._scan():
+            if r is not None:
+                self.stats.setdefault("first_hit_seconds", time.perf_counter() - t0)
+                yield r
+
+    def ascan(self, control=None, executor=None, progress_interval: float = 0.1):
+        """Async-generator version of :meth:`scan`.
+
+        Reads and carving run in ``executor`` (the loop's default one if
+        None) one chunk at a time, and the next chunk is only requested
+        when the consumer asks for more, so a slow consumer holds the scan
+        back.  ``control`` is an :class:`~openrecover.aio.ScanControl`;
+        while paused the scan is suspended on an event and uses no CPU.
+        Progress callbacks are throttled to one per ``progress_interval``.
+        """
+        from .aio import drive
+        return drive(self._scan(), self, control, executor, progress_interval)
+
+    def prepare_triage(self) -> Optional[TriageMap]:
+        """Load or build the triage map and drop constant blocks from the scan.
+
+        Called by :meth:`scan`; call it first to show the map before carving.
+        A header can only lie in a constant block if it is made of the fill
+        byte, so the blocks are kept from ``len(header) - 1`` bytes before
+        their end to find headers that straddle into the next block.
+        """
+        if self._triaged or not (self._triage_path or self.triage is not None):
+            return self.triage
+        start, end = self.start_offset, self._scan_end()
+        if not end:
+            raise ValueError("the triage pass needs a source of known size")
+        m = self.triage
+        if m is None:
+            m = TriageMap.load(self._triage_path)
+            if m is None or not m.covers(start, end):
+                self.scan_total = end - start
+                m = build_triage(self._read_at, start, end, TRIAGE_BLOCK,
+                                 max(self.chunk, TRIAGE_BLOCK),
+                                 progress=lambda pos: self._emit(pos - start),
+                                 stop=self.stop_flag)
+                if self.stop_flag():
+                    return m  # incomplete: neither saved nor used
+                m.save(self._triage_path)
+            self.triage = m
+        pad = max((len(sig.header) for sig in self.signatures), default=1) - 1
+        holes = [(s, e - pad) for s, e in m.ranges([CONSTANT]) if e - pad > s]
+        window = self.ranges if self.ranges is not None else [(start, end)]
+        before = sum(e - s for s, e in window)
+        self.ranges = self._normalize_ranges(subtract(window, holes))
+        self.scan_total = sum(e - s for s, e in self.ranges)
+        self.stats["triage"] = m.counts()
+        self.stats["triage_skipped"] = before - self.scan_total
+        self.stats["triage_text_skipped"] = 0
+        self._triaged = True
+        return m
+
+    def _scan(self):
+        """Yield carve results, and None after every chunk as a checkpoint."""
+        self._produced = 0
+        if self._triage_path or self.triage is not None:
+            self.prepare_triage()
+            if self.stop_flag():
+                return
+        if self.block_manifest:
+            yield from self._scan_incremental()
+        elif self.priority:
+            yield from self._scan_ranges(self._priority_ranges())
+        else:
+            yield from self._scan_ranges(self.ranges)
+
+    def _priority_ranges(self) -> List[Tuple[int, int]]:
+        """The scan window in priority order; progress then covers it in that order."""
+        end = self._scan_end()
+        if not end:
+            raise ValueError("priority mode needs a source of known size")
+        window = self.ranges if self.ranges is not None else [(self.start_offset, end)]
+        deleted: List[Tuple[int, int]] = []
+        free: List[Tuple[int, int]] = []
+        try:
+            vol = NTFSVolume(self._reader, self.partition.offset if self.partition else 0)
+            if self.mft_index is not None:
+                cs = vol.cluster_size
+                deleted = merge((s, s + cs) for s in self.mft_index.file_starts())
+            else:
+                deleted = deleted_file_starts(vol)
+            free = vol.unallocated_ranges()
+        except (ValueError, OSError):
+            pass  # not NTFS: only the sampled order
+        if self.triage is not None:
+            dense = self.triage.ranges([HIGH_ENTROPY])
+        else:
+            try:
+                dense = sample_dense(self._read_at, window, PRIORITY_SAMPLES)
+            except ImportError:
+                dense = []  # no NumPy
+        plan = plan_priority(window, deleted, free, dense)
+        self.stats["priority"] = {name: sum(e - s for s, e in rs) for name, rs in plan}
+        order = [r for _name, rs in plan for r in rs]
+        self.scan_total = sum(e - s for s, e in order)
+        return order
+
+    def _scan_ranges(self, ranges: Optional[List[Tuple[int, int]]]):
+        if ranges is None:
+            yield from self._scan_range(self.start_offset, self._scan_end(), self.start_offset)
+            self._emit(self.total or self._cur)
+            return
+        done = 0
+        for start, stop in ranges:
+            yield from self._scan_range(start, stop, done)
+            yield None
+            if self.stop_flag() or (self.max_files and self._produced >= self.max_files):
+                return
+            done += stop - start
+        self._emit(done)
+
+    def _manifest_params(self) -> dict:
+        return {
+            "signatures": [sig.name for sig in self.signatures],
+            "min_size": self.min_size,
+            "align": self.align,
+            "end": self._scan_end(),
+        }
+
+    def _scan_incremental(self):
+        """Reuse hits of unchanged blocks from ``block_manifest``; carve the rest."""
+        end = self._scan_end()
+        if not end:
+            raise ValueError("incremental rescan needs a source of known size")
+        new = BlockManifest(self.block_size, self.start_offset, end, self._manifest_params())
+        self.scan_total = end - self.start_offset
+        digests = hash_blocks(self._read_at, self.start_offset, end, self.block_size, self.chunk,
+                              progress=lambda pos: self._emit(pos - self.start_offset),
+                              stop=self.stop_flag)
+        if digests is None:
+            return
+        new.blocks = digests
+        dirty, reuse = plan_rescan(BlockManifest.load(self.block_manifest), new)
+        if self.ranges is not None:
+            dirty = self._normalize_ranges(
+                (max(s, rs), min(e, re_)) for s, e in dirty for rs, re_ in self.ranges)
+            reuse = [h for h in reuse
+                     if any(rs <= h["start"] < re_ for rs, re_ in self.ranges)]
+        self.stats["blocks"] = len(digests)
+        self.stats["reused_hits"] = len(reuse)
+        self.stats["rescanned_bytes"] = sum(e - s for s, e in dirty)
+
+        sig_map = {sig.name: sig for sig in self.signatures}
+        for h in reuse:
+            r = self._reuse_hit(sig_map[h["sig"]], h)
+            if r is None:
+                continue
+            new.hits.append(h)
+            yield r
+            self._produced += 1
+            if self.max_files and self._produced >= self.max_files:
+                return
+
+        self.scan_total = self.stats["rescanned_bytes"]
+        for r in self._scan_ranges(dirty):
+            if r is None:
+                yield r
+                continue
+            new.hits.append({"sig": r.sig.name, "start": r.start, "end": r.end,
+                             "len": r.end - r.start})
+            yield r
+        if self.stop_flag() or (self.max_files and self._produced >= self.max_files):
+            return  # partial run: keep the previous manifest
+        new.hits.sort(key=lambda h: h["start"])
+        new.save(self.block_manifest)
+
+    def _reuse_hit(self, sig: FileSignature, h: dict) -> Optional[CarveResult]:
+        length = h["end"] - h["start"]
+        if length > self._window(length):
+            r = self._carve_streamed(sig, h["start"], self._read_at(h["start"], self._window(length)),
+                                     length)
+            if r is not None:
+                self._record(r, r.end - r.start)
+            return r
+        data = self._read_at(h["start"], length)
+        from .utils import normalize_carve_data
+        canonical = normalize_carve_data(sig, data)
+        hashes = self._hash_hit(canonical, data)
+        if hashes is None:
+            return None
+        origin, skip = self._origin(h["start"], h["end"])
+        if skip:
+            return None
+        ok, note, out_path = True, "", ""
+        if self.write_output:
+            out_name = f"{sig.name}_{h['start']}_len{len(data)}.{sig.ext}"
+            out_path = os.path.join(self.output_dir, sig.name, out_name[:180])
+            if not (os.path.isfile(out_path) and os.path.getsize(out_path) == len(data)):
+                out_path, werr = self._write_file(sig.name, out_name, data, h["start"])
+                if werr:
+                    ok, note = False, werr
+        r = CarveResult(sig=sig, start=h["start"], end=h["end"], out_path=out_path,
+                        ok=ok, note=note, raw_data=canonical, hashes=hashes, origin=origin)
+        self._record(r, len(data))
+        return r
+
+    def _scan_range(self, start: int, end: int, base: int):
+        """Carve headers in ``[start, end)``; progress is reported as ``base + (cur - start)``."""
+        cur = start
+        self._cur = cur
+        emit = lambda pos: self._emit(base + (pos - start))
+        tuner = self._tuner
 
-        while (self.total == 0 or cur < self.total):
+        while (end == 0 or cur < end):
             if self.stop_flag():
                 break
-            while self.pause_flag():
-                self._emit(cur)
+            while self.pause_flag() and not self.stop_flag():
+                time.sleep(0.05)
 
+            overlap = min(self.overlap, self.chunk // 2)
             size = self.chunk
+            if end:
+                # a little past the range end so headers there are complete
+                size = min(size, end - cur + max(overlap, 64))
             if self.total:
                 size = min(size, self.total - cur)
                 if size <= 0:
                     break
-            try:
-                buf = self._read_at(cur, size)
-            except Exception:
-                cur += 4096
-                self._emit(cur)
-                continue
+            t_read = time.perf_counter()
+            buf = self._read_at(cur, size)   # bad sectors come back zero-filled
             if not buf:
                 break
 
-            for sig in self.signatures:
-                start_index = 0
-                while True:
-                    i = buf.find(sig.header, start_index)
-                    if i < 0:
-                        break
-                    global_pos = cur + i
-
-                    data = b""
-                    end_pos = None
-                    end_in = self._find_footer(buf, sig, i)
-                    if end_in is not None:
-                        end_pos = cur + end_in
-                        data = buf[i:end_in]
-                    else:
-                        size_from = self._size_from_iso_bmff(buf, i, sig)
-                        if size_from and i + size_from <= len(buf):
-                            end_pos = cur + i + size_from
-                            data = buf[i:i+size_from]
-
-                    if not data:
-                        read_more = 2 * self.chunk
-                        try:
-                            extra = self._read_at(global_pos, read_more)
-                            if sig.footer:
-                                j = extra.find(sig.footer, len(sig.header))
-                                data = extra[:j + len(sig.footer)] if j >= 0 else extra
-                            else:
-                                data = extra
-                            end_pos = global_pos + len(data)
-                        except Exception:
-                            data = buf[i:]
-                            end_pos = cur + len(buf)
-
-                    if len(data) < self.min_size:
-                        start_index = i + 1
-                        continue
+            # Headers in the overlap tail belong to the next chunk, and headers
+            # past end_offset to the next range; the bytes after them are still
+            # visible here so straddling files carve completely.
+            last = len(buf) < size or bool(self.total and cur + len(buf) >= self.total)
+            owned = len(buf) if last else len(buf) - overlap
+            if end:
+                owned = min(owned, end - cur)
+            t_mark = time.perf_counter()
+            t_read = t_mark - t_read
+            t_search = 0.0  # excludes time spent suspended in yields
 
-                    from .utils import normalize_carve_data
-                    canonical = normalize_carve_data(sig, data)
-                    if self.dedup:
-                        sha = self._sha256(canonical)
-                        if sha in self._sha_seen:
-                            start_index = i + 1
-                            continue
-                        self._sha_seen.add(sha)
-
-                    # quick validity check for images
-                    import imghdr
-                    imghdr_map = {"jpeg": "jpeg", "jpg": "jpeg", "png": "png", "gif": "gif"}
-                    expected = imghdr_map.get(sig.name.lower())
-                    if expected:
-                        if imghdr.what(None, canonical) != expected:
-                            start_index = i + 1
+            for i, sig in self._candidates(buf, cur, owned):
+                global_pos = cur + i
+                if sig.text and self.triage is not None and \
+                        self.triage.at(global_pos) == HIGH_ENTROPY:
+                    self.stats["triage_text_skipped"] += 1
+                    continue
+
+                data = b""
+                end_pos = None
+                end_in = self._find_footer(buf, sig, i)
+                if end_in is not None:
+                    end_pos = cur + end_in
+                    data = buf[i:end_in]
+                else:
+                    size_from = self._size_from_iso_bmff(buf, i, sig)
+                    if size_from and i + size_from <= len(buf):
+                        end_pos = cur + i + size_from
+                        data = buf[i:i+size_from]
+
+                if not data:
+                    read_more = self.carve_limit
+                    window = self._window(read_more)
+                    try:
+                        extra = self._read_at(global_pos, window)
+                        j = extra.find(sig.footer, len(sig.header)) if sig.footer else -1
+                        if j < 0 and window < read_more and len(extra) == window:
+                            # too large to hold: stream it straight to the output
+                            r = self._carve_streamed(sig, global_pos, extra, read_more)
+                            del extra
+                            if r is None:
+                                continue
+                            self._record(r, r.end - r.start)
+                            t_search += time.perf_counter() - t_mark
+                            yield r
+                            t_mark = time.perf_counter()
+                            self._produced += 1
+                            if self.max_files and self._produced >= self.max_files:
+                                return
                             continue
+                        data = extra[:j + len(sig.footer)] if j >= 0 else extra
+                        end_pos = global_pos + len(data)
+                    except Exception:
+                        data = buf[i:]
+                        end_pos = cur + len(buf)
 
-                    ok = True
-                    note = ""
-                    out_path = ""
-                    if self.write_output:
-                        out_name = f"{sig.name}_{global_pos}_len{len(data)}.{sig.ext}"
-                        out_path, werr = self._write_file(sig.name, out_name, data)
-                        if werr:
-                            ok = False
-                            note = werr
-
-                    yield CarveResult(
-                        sig=sig,
-                        start=global_pos,
-                        end=end_pos or (global_pos + len(data)),
-                        out_path=out_path,
-                        ok=ok,
-                        note=note,
-                        raw_data=canonical
-                    )
-                    produced += 1
-                    if self.max_files and produced >= self.max_files:
-                        return
-                    start_index = i + 1
+                if len(data) < self.min_size:
+                    continue
+
+                from .utils import normalize_carve_data
+                canonical = normalize_carve_data(sig, data)
+                hashes = self._hash_hit(canonical, data)
+                if hashes is None:
+                    continue
+
+                # quick validity check for images
+                import imghdr
+                imghdr_map = {"jpeg": "jpeg", "jpg": "jpeg", "png": "png", "gif": "gif"}
+                expected = imghdr_map.get(sig.name.lower())
+                if expected:
+                    if imghdr.what(None, canonical) != expected:
+                        continue
+
+                end_pos = end_pos or (global_pos + len(data))
+                origin, skip = self._origin(global_pos, end_pos)
+                if skip:
+                    continue
+
+                ok = True
+                note = ""
+                out_path = ""
+                if self.write_output:
+                    out_name = f"{sig.name}_{global_pos}_len{len(data)}.{sig.ext}"
+                    out_path, werr = self._write_file(sig.name, out_name, data, global_pos)
+                    if werr:
+                        ok = False
+                        note = werr
+
+                r = CarveResult(
+                    sig=sig,
+                    start=global_pos,
+                    end=end_pos,
+                    out_path=out_path,
+                    ok=ok,
+                    note=note,
+                    raw_data=canonical,
+                    hashes=hashes,
+                    origin=origin,
+                )
+                self._record(r, len(data))
+                t_search += time.perf_counter() - t_mark
+                yield r
+                t_mark = time.perf_counter()
+                self._produced += 1
+                if self.max_files and self._produced >= self.max_files:
+                    return
 
+            if tuner is not None:
+                t_search += time.perf_counter() - t_mark
+                self.chunk = tuner.record(len(buf), t_read, t_search)
+                self.stats.update(tuner.stats())
+            if last or (end and cur + owned >= end):
+                break  # final chunk; advancing by len(buf) - overlap would stall
             cur += len(buf) - overlap
-            self._emit(cur)
-        self._emit(self.total or cur)
+            self._cur = cur
+            emit(cur)
+            yield None
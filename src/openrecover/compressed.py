@@ -0,0 +1,408 @@
+"""
+Read-only random access to gzip- and zstd-compressed disk images.
+
+:class:`CompressedSource` serves ``read_at`` like
+:class:`~openrecover.rawio.FileSource` by decoding the image in frames of
+``spacing`` output bytes.  Decoding restarts from the nearest checkpoint
+before a frame:
+
+* the start of a gzip member or zstd frame (images written by bgzip,
+  pigz -i, pzstd or :func:`make_seekable`).  These checkpoints are saved
+  to a ``.seekidx`` file next to the image, so the pass over the image
+  that finds them runs only once (for zstd frames that record their
+  content size it only reads the block headers);
+* in single-stream gzip, a snapshot of the inflater taken every
+  ``spacing`` bytes whenever the decoder passes by.  Snapshots live in
+  memory only, so the first scan after opening collects them.
+
+Decoded frames are kept in a small LRU and the decoder that produced
+the last frame stays open, so a sequential scan streams at
+decompression speed while a random read (an MFT record, a recovery
+extent) costs at most one frame decode.  A single-frame zstd image has
+no checkpoint but its start; :func:`make_seekable` rewrites it (or any
+image) as independent members.
+"""
+
+from __future__ import annotations
+import os
+import json
+import zlib
+import bisect
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+INDEX_SUFFIX = ".seekidx"
+_READ = 1 << 20     # compressed bytes fed to the inflater at a time
+_STEP = 4 << 20     # most output produced per decode step (zero runs inflate ~1000x)
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ImportError("zstd images require the zstandard package (pip install zstandard)")
+    return zstandard
+
+def detect_format(path: str) -> str:
+    """``"gzip"``, ``"zstd"`` or ``""`` for anything else, from the magic bytes."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(4)
+    except OSError:
+        return ""
+    if head[:2] == GZIP_MAGIC:
+        return "gzip"
+    if head == ZSTD_MAGIC:
+        return "zstd"
+    return ""
+
+def zstd_frames(pread, size: int) -> List[Tuple[int, int, int]]:
+    """``(offset, compressed size, content size or -1)`` of each zstd frame.
+
+    Only frame and block headers are read; skippable frames are left out.
+    """
+    frames = []
+    off = 0
+    while off + 8 <= size:
+        head = pread(off, 18)
+        magic, = struct.unpack_from('<I', head)
+        if 0x184D2A50 <= magic <= 0x184D2A5F:
+            off += 8 + struct.unpack_from('<I', head, 4)[0]
+            continue
+        if head[:4] != ZSTD_MAGIC:
+            break
+        fhd = head[4]
+        fcs_code, single, has_sum, did_code = fhd >> 6, fhd >> 5 & 1, fhd >> 2 & 1, fhd & 3
+        pos = 5 + (0 if single else 1) + (0, 1, 2, 4)[did_code]
+        fcs_len = (1 if single else 0, 2, 4, 8)[fcs_code]
+        content = -1
+        if fcs_len:
+            content = int.from_bytes(head[pos:pos + fcs_len], 'little') + (256 if fcs_len == 2 else 0)
+        pos = off + pos + fcs_len
+        while True:
+            bh = pread(pos, 3)
+            if len(bh) < 3:
+                return frames
+            v = int.from_bytes(bh, 'little')
+            last, btype, bsize = v & 1, v >> 1 & 3, v >> 3
+            pos += 3 + (1 if btype == 1 else bsize)  # RLE blocks store a single byte
+            if last:
+                break
+        pos += 4 if has_sum else 0
+        frames.append((off, pos - off, content))
+        off = pos
+    return frames
+
+class _GzipDecoder:
+    """Inflates members back to back from a compressed offset, bounding each step."""
+
+    def __init__(self, pread, size: int, coff: int, uoff: int, state=None) -> None:
+        self.pread = pread
+        self.size = size
+        self.uoff = uoff
+        self.done = False
+        self.member_start = state is None
+        self._next = coff       # next compressed byte to read from the file
+        self._in = b""          # read but not yet consumed by the inflater
+        self._d = state.copy() if state is not None else zlib.decompressobj(31)
+
+    @property
+    def coff(self) -> int:
+        """Compressed offset the inflater has consumed up to."""
+        return self._next - len(self._in)
+
+    def snapshot(self):
+        return self._d.copy()
+
+    def close(self) -> None:
+        pass
+
+    def read(self, limit: int) -> bytes:
+        out = []
+        n = 0
+        while n < limit and not self.done:
+            if not self._in:
+                self._in = self.pread(self._next, _READ)
+                self._next += len(self._in)
+                if not self._in:
+                    self.done = True
+                    break
+            chunk = self._d.decompress(self._in, limit - n)
+            self.member_start = False
+            if self._d.eof:
+                self._in = self._d.unused_data
+                if len(self._in) < 2:
+                    # the next member's magic may straddle the end of this read
+                    more = self.pread(self._next, _READ)
+                    self._next += len(more)
+                    self._in += more
+                if self._in and self._in[:2] != GZIP_MAGIC:
+                    self.done = True    # padding after the last member
+                self._d = zlib.decompressobj(31)
+                self.member_start = True
+            else:
+                self._in = self._d.unconsumed_tail
+            out.append(chunk)
+            n += len(chunk)
+            self.uoff += len(chunk)
+            if self.member_start:
+                break   # stop at the member boundary: it can become a saved checkpoint
+        return b"".join(out)
+
+class _ZstdDecoder:
+    """Decodes zstd frames back to back from a frame start."""
+
+    def __init__(self, path: str, coff: int, uoff: int, across: bool = True) -> None:
+        self._f = open(path, "rb")
+        self._f.seek(coff)
+        self._r = _zstd().ZstdDecompressor().stream_reader(self._f, read_across_frames=across,
+                                                             closefd=False)
+        self.uoff = uoff
+        self.done = False
+        self.member_start = False
+
+    def read(self, limit: int) -> bytes:
+        data = self._r.read(limit)
+        if not data:
+            self.done = True
+        self.uoff += len(data)
+        return data
+
+    def close(self) -> None:
+        self._f.close()
+
+class CompressedSource:
+    """``read_at`` over a compressed image (same interface as FileSource)."""
+
+    def __init__(self, path: str, spacing: int = 16 * 1024 * 1024, cache_frames: int = 8,
+                 index_path: str = "", max_snapshots: int = 2048) -> None:
+        self.path = path
+        self.format = detect_format(path)
+        if not self.format:
+            raise ValueError(f"{path}: not a gzip or zstd image")
+        if self.format == "zstd":
+            _zstd()
+        self.spacing = max(64 * 1024, spacing)
+        self.cache_frames = max(1, cache_frames)
+        self.max_snapshots = max(1, max_snapshots)   # each holds a 32 KiB window
+        self._snapshots = 0
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self._f = open(path, "rb", buffering=0)
+        self._size = os.fstat(self._f.fileno()).st_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._live = None       # decoder left at the end of the last decoded frame
+        # checkpoints sorted by output offset: (uoff, coff, inflater snapshot or None)
+        self._cp_u: List[int] = []
+        self._cps: List[Tuple[int, int, object]] = []
+        self._length = 0
+        self.frames_decoded = 0
+        if not self._load_index():
+            self._build_index()
+            self._save_index()
+
+    # ---- index ----
+
+    def _add_checkpoint(self, uoff: int, coff: int, state) -> None:
+        i = bisect.bisect_left(self._cp_u, uoff)
+        if i < len(self._cp_u) and self._cp_u[i] == uoff:
+            return
+        self._cp_u.insert(i, uoff)
+        self._cps.insert(i, (uoff, coff, state))
+        if state is not None:
+            self._snapshots += 1
+            if self._snapshots > self.max_snapshots:
+                self._thin()
+
+    def _thin(self) -> None:
+        """Drop every other inflater snapshot, halving their memory."""
+        keep, odd = [], False
+        for cp in self._cps:
+            if cp[2] is not None:
+                odd = not odd
+                if not odd:
+                    self._snapshots -= 1
+                    continue
+            keep.append(cp)
+        self._cps = keep
+        self._cp_u = [cp[0] for cp in keep]
+
+    def _load_index(self) -> bool:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                idx = json.load(f)
+        except (OSError, ValueError):
+            return False
+        st = os.stat(self.path)
+        if (idx.get("format"), idx.get("size"), idx.get("mtime")) != (
+                self.format, st.st_size, int(st.st_mtime)):
+            return False
+        self._length = idx["length"]
+        self.spacing = idx.get("spacing", self.spacing)
+        for uoff, coff in idx["checkpoints"]:
+            self._add_checkpoint(uoff, coff, None)
+        return True
+
+    def _save_index(self) -> None:
+        st = os.stat(self.path)
+        idx = dict(format=self.format, size=st.st_size, mtime=int(st.st_mtime),
+                   length=self._length, spacing=self.spacing,
+                   checkpoints=[[u, c] for u, c, s in self._cps if s is None])
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(idx, f)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass  # read-only location: the index is rebuilt next time
+
+    def _build_index(self) -> None:
+        self._add_checkpoint(0, 0, None)
+        if self.format == "zstd":
+            uoff, last = 0, 0
+            for off, csize, content in zstd_frames(self._pread, self._size):
+                if uoff - last >= self.spacing:
+                    self._add_checkpoint(uoff, off, None)
+                    last = uoff
+                if content < 0:  # no content size in the header: decode to count
+                    dec = _ZstdDecoder(self.path, off, 0, across=False)
+                    while not dec.done:
+                        dec.read(_STEP)
+                    dec.close()
+                    content = dec.uoff
+                uoff += content
+            self._length = uoff
+            return
+        dec = _GzipDecoder(self._pread, self._size, 0, 0)
+        last = 0
+        step = min(_STEP, self.spacing)
+        while not dec.done:
+            dec.read(step)
+            last = self._learn(dec, last)
+        self._length = dec.uoff
+
+    def _learn(self, dec, last: int) -> int:
+        """Add a checkpoint at ``dec``'s position if the previous one is ``spacing`` behind."""
+        if (self.format != "gzip" or dec.done or dec.coff >= self._size
+                or dec.uoff - last < self.spacing):
+            return last
+        if dec.member_start:
+            self._add_checkpoint(dec.uoff, dec.coff, None)
+        else:
+            self._add_checkpoint(dec.uoff, dec.coff, dec.snapshot())
+        return dec.uoff
+
+    def _decoder(self, uoff: int, coff: int, state):
+        if self.format == "zstd":
+            return _ZstdDecoder(self.path, coff, uoff)
+        return _GzipDecoder(self._pread, self._size, coff, uoff, state)
+
+    # ---- reads ----
+
+    @property
+    def length(self) -> Optional[int]:
+        return self._length
+
+    def _pread(self, off: int, n: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(self._f.fileno(), n, off)
+        self._f.seek(off)
+        return self._f.read(n)
+
+    def _put(self, k: int, data: bytes) -> None:
+        self._cache[k] = data
+        while len(self._cache) > self.cache_frames:
+            self._cache.popitem(last=False)
+
+    def _frame(self, k: int) -> bytes:
+        data = self._cache.get(k)
+        if data is not None:
+            self._cache.move_to_end(k)
+            return data
+        sp = self.spacing
+        start = k * sp
+        uoff, coff, state = self._cps[bisect.bisect_right(self._cp_u, start) - 1]
+        dec = self._live
+        if dec is None or not (uoff <= dec.uoff <= start):
+            dec = self._decoder(uoff, coff, state)  # else: continue the sequential decoder
+        last = self._cp_u[bisect.bisect_right(self._cp_u, dec.uoff) - 1]
+        # skip to the frame boundary at or after the decoder's position
+        skip = -dec.uoff % sp
+        while skip and not dec.done:
+            skip -= len(dec.read(min(skip, _STEP)))
+            last = self._learn(dec, last)
+        while dec.uoff <= start and not dec.done:
+            fk = dec.uoff // sp
+            parts, n = [], 0
+            while n < sp and not dec.done:
+                chunk = dec.read(min(sp - n, _STEP))
+                parts.append(chunk)
+                n += len(chunk)
+                last = self._learn(dec, last)
+            if n:
+                self._put(fk, b"".join(parts))
+                self.frames_decoded += 1
+        if self._live is not None and self._live is not dec:
+            self._live.close()
+        if dec.done:
+            dec.close()
+            dec = None
+        self._live = dec
+        return self._cache.get(k, b"")
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if offset >= self._length or size <= 0:
+            return b""
+        size = min(size, self._length - offset)
+        out = []
+        with self._lock:
+            while size > 0:
+                k, rel = divmod(offset, self.spacing)
+                piece = self._frame(k)[rel:rel + size]
+                if not piece:
+                    break
+                out.append(piece)
+                offset += len(piece)
+                size -= len(piece)
+        return b"".join(out)
+
+    def close(self) -> None:
+        if self._live is not None:
+            self._live.close()
+        self._f.close()
+        self._cache.clear()
+        self._live = None
+        self._cps = []
+        self._cp_u = []
+
+def make_seekable(src: str, dst: str, fmt: str = "gzip", member_size: int = 4 * 1024 * 1024,
+                  level: int = 6) -> int:
+    """Compress ``src`` (raw or compressed image) into independent members of ``member_size``.
+
+    Every member start becomes a saved checkpoint, so the result is fully
+    random-access.  Returns the number of uncompressed bytes written.
+    """
+    inner = CompressedSource(src) if detect_format(src) else None
+    cctx = _zstd().ZstdCompressor(level=level, write_content_size=True) if fmt == "zstd" else None
+    try:
+        total = inner.length if inner is not None else os.path.getsize(src)
+        with open(src, "rb") as raw, open(dst, "wb") as out:
+            off = 0
+            while off < total:
+                n = min(member_size, total - off)
+                block = inner.read_at(off, n) if inner is not None else raw.read(n)
+                if not block:
+                    break
+                if cctx is not None:
+                    out.write(cctx.compress(block))
+                else:
+                    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+                    out.write(c.compress(block) + c.flush())
+                off += len(block)
+        return off
+    finally:
+        if inner is not None:
+            inner.close()
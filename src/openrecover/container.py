@@ -0,0 +1,256 @@
+"""
+Packed output: one append-only data file plus an index, instead of
+one loose file per carved hit.
+
+A pack ``carved.pack`` stores entry bytes back to back; ``carved.pack.idx``
+holds one JSON line per entry (name, offset, stored and original length,
+codec and whatever the writer attached, e.g. type and source offset).
+Entry data is written before its index line, so after a crash the pack
+is valid up to the last indexed entry.  Entries may be deflate- or
+zstd-compressed individually (zstd needs the ``zstandard`` package);
+an entry that does not shrink is stored as is.
+
+:class:`PackReader` lists, previews and extracts single entries without
+unpacking the rest.  Hits stored in a pack carry ``<pack>::<name>`` as
+their output path.
+"""
+
+from __future__ import annotations
+import os
+import json
+import zlib
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from .rawio import copy_range
+
+INDEX_SUFFIX = ".idx"
+REF_SEP = "::"
+CODECS = ("none", "deflate", "zstd")
+
+def index_path(pack: str) -> str:
+    return pack + INDEX_SUFFIX
+
+def pack_ref(pack: str, name: str) -> str:
+    return f"{pack}{REF_SEP}{name}"
+
+def split_ref(ref: str) -> Optional[Tuple[str, str]]:
+    """``(pack, name)`` of an output path made by :func:`pack_ref`, else None."""
+    if REF_SEP not in ref:
+        return None
+    pack, name = ref.rsplit(REF_SEP, 1)
+    return pack, name
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ImportError("zstd packs require the zstandard package (pip install zstandard)")
+    return zstandard
+
+def _compress(codec: str, data: bytes, level: Optional[int]) -> bytes:
+    if codec == "deflate":
+        return zlib.compress(data, 6 if level is None else level)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=3 if level is None else level).compress(data)
+    return data
+
+def _decompress(codec: str, data: bytes, size: int) -> bytes:
+    if codec == "deflate":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data, max_output_size=size)
+    return data
+
+class PackWriter:
+    """Appends entries to a pack; ``add`` may be called from several threads."""
+
+    def __init__(self, path: str, compression: str = "none", level: Optional[int] = None) -> None:
+        if compression not in CODECS:
+            raise ValueError(f"unknown compression: {compression}")
+        if compression == "zstd":
+            _zstd()
+        self.path = path
+        self.compression = compression
+        self.level = level
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._data = open(path, "ab", buffering=0)
+        self._pos = os.fstat(self._data.fileno()).st_size
+        existing = load_index(path) if self._pos and os.path.isfile(index_path(path)) else []
+        self._lengths: Dict[str, int] = {e["name"]: e["length"] for e in existing}
+        self._index = open(index_path(path), "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _resync(self) -> None:
+        """After a failed write, continue past whatever part of it reached the file."""
+        self._pos = os.fstat(self._data.fileno()).st_size
+
+    def _append_index(self, entry: dict) -> None:
+        self._index.write(json.dumps(entry, sort_keys=True) + "\n")
+        self._lengths[entry["name"]] = entry["length"]
+        self.count += 1
+        if self.count % 256 == 0:
+            self._index.flush()
+
+    def has(self, name: str, length: int) -> bool:
+        """True if the pack already holds ``name`` with ``length`` bytes, e.g. from a previous run."""
+        with self._lock:
+            return self._lengths.get(name) == length
+
+    def add(self, name: str, data: bytes, **meta) -> str:
+        """Store ``data`` as ``name``; returns its :func:`pack_ref`."""
+        codec, stored = "none", data
+        if self.compression != "none" and data:
+            packed = _compress(self.compression, data, self.level)
+            if len(packed) < len(data):
+                codec, stored = self.compression, packed
+        with self._lock:
+            off = self._pos
+            try:
+                self._data.write(stored)
+            except BaseException:
+                self._resync()
+                raise
+            self._pos += len(stored)
+            self._append_index(dict(meta, name=name, offset=off, stored=len(stored),
+                                    length=len(data), codec=codec))
+        return pack_ref(self.path, name)
+
+    def add_range(self, name: str, src, offset: int, length: int, **meta) -> Tuple[str, int]:
+        """Copy ``length`` source bytes at ``offset`` into the pack without buffering them.
+
+        ``src`` is a file descriptor or an object with ``read_at`` (see
+        :func:`~openrecover.rawio.copy_range`).  The entry is stored
+        uncompressed; returns its reference and the bytes copied.
+        """
+        with self._lock:
+            off = self._pos
+            try:
+                n = copy_range(src, offset, length, self._data.fileno())
+            except BaseException:
+                self._resync()
+                raise
+            self._pos += n
+            self._append_index(dict(meta, name=name, offset=off, stored=n, length=n, codec="none"))
+        return pack_ref(self.path, name), n
+
+    def flush(self) -> None:
+        with self._lock:
+            self._index.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._data.closed:
+                self._data.close()
+                self._index.close()
+
+    def __enter__(self) -> "PackWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def load_index(pack: str) -> List[dict]:
+    """Index entries in write order; a torn last line (crash) is ignored."""
+    entries = []
+    size = os.path.getsize(pack)
+    with open(index_path(pack), "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                e = json.loads(line)
+            except ValueError:
+                continue
+            if e["offset"] + e["stored"] <= size:
+                entries.append(e)
+    return entries
+
+class PackReader:
+    """Random access to the entries of a pack."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.entries = load_index(path)
+        self._by_name: Dict[str, int] = {e["name"]: i for i, e in enumerate(self.entries)}
+        self._f = open(path, "rb")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.entries)
+
+    def entry(self, key: Union[int, str]) -> dict:
+        if isinstance(key, str):
+            if key not in self._by_name:
+                raise KeyError(key)
+            key = self._by_name[key]
+        return self.entries[key]
+
+    def _stored(self, e: dict, n: int = -1) -> bytes:
+        n = e["stored"] if n < 0 else min(n, e["stored"])
+        return self._pread(e["offset"], n)
+
+    def _pread(self, off: int, n: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(self._f.fileno(), n, off)
+        self._f.seek(off)
+        return self._f.read(n)
+
+    def read(self, key: Union[int, str]) -> bytes:
+        e = self.entry(key)
+        return _decompress(e["codec"], self._stored(e), e["length"])
+
+    def preview(self, key: Union[int, str], size: int = 1024 * 1024) -> bytes:
+        """The first ``size`` bytes of an entry, decompressing only what is needed."""
+        e = self.entry(key)
+        if e["codec"] == "none":
+            return self._stored(e, size)
+        if e["codec"] == "deflate":
+            d = zlib.decompressobj()
+            out = bytearray()
+            pos = e["offset"]
+            end = pos + e["stored"]
+            while len(out) < size and pos < end and not d.eof:
+                block = self._pread(pos, min(1 << 16, end - pos))
+                pos += len(block)
+                out += d.decompress(block, size - len(out))
+                while d.unconsumed_tail and len(out) < size:
+                    out += d.decompress(d.unconsumed_tail, size - len(out))
+            return bytes(out[:size])
+        return self.read(key)[:size]
+
+    def extract(self, key: Union[int, str], out_dir: str) -> str:
+        """Write one entry below ``out_dir`` (at its name) and return the path."""
+        e = self.entry(key)
+        parts = [p for p in e["name"].replace("\\", "/").split("/") if p not in ("", ".", "..")]
+        out_path = os.path.join(out_dir, *parts) if parts else os.path.join(out_dir, "entry")
+        d = os.path.dirname(out_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with open(out_path, "wb") as f:
+            if e["codec"] == "none":
+                copy_range(self._f.fileno(), e["offset"], e["stored"], f.fileno())
+            else:
+                f.write(self.read(key))
+        return out_path
+
+    def extract_all(self, out_dir: str, keys=None) -> List[str]:
+        keys = range(len(self.entries)) if keys is None else keys
+        return [self.extract(k, out_dir) for k in keys]
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "PackReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def open_pack(pack: Union[str, PackWriter, None], compression: str = "none") -> Optional[PackWriter]:
+    """Accept a path or an open writer, as the carver and exporter options do."""
+    if pack is None or isinstance(pack, PackWriter):
+        return pack
+    return PackWriter(pack, compression) if pack else None
@@ -0,0 +1,156 @@
+"""
+Bulk export of carve hits.
+
+:func:`export_hits` writes many preview hits to disk in one job: hits
+are processed in source-offset order (so any bytes that have to be read
+from the source are read sequentially) while the writes run on a small
+thread pool.  Progress, cancellation and a single summary replace the
+per-file dialogs of the GUI.
+"""
+
+from __future__ import annotations
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from .carver import CarveResult
+from .container import PackWriter, open_pack
+from .rawio import copy_range, open_source
+
+@dataclass
+class ExportSummary:
+    total: int = 0
+    written: int = 0
+    bytes_written: int = 0
+    cancelled: bool = False
+    paths: Dict[int, str] = field(default_factory=dict)          # hit index -> output path
+    failed: List[Tuple[int, str]] = field(default_factory=list)  # (hit index, error)
+
+def export_name(hit: CarveResult, size: int) -> str:
+    sig = hit.sig
+    return os.path.join(sig.name, f"{sig.name}_{hit.start}_len{size}.{sig.ext}")
+
+def export_hits(
+    source: str,
+    hits: Sequence[CarveResult],
+    out_dir: str,
+    workers: int = 4,
+    max_inflight_bytes: int = 256 * 1024 * 1024,
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+    stop_flag: Optional[Callable[[], bool]] = None,
+    container: Union[str, PackWriter, None] = None,
+    container_compression: str = "none",
+) -> ExportSummary:
+    """Write ``hits`` below ``out_dir``; ``progress_cb(done, total)`` counts files.
+
+    Hits that carry their carved bytes in ``raw_data`` are written as is;
+    the rest are read from ``source``, and hits that only hold a preview
+    are copied source-to-file without passing through memory.  At most
+    ``max_inflight_bytes`` of data wait for the writer threads at any time.
+    With ``container`` (a pack path or writer) the files are appended to
+    the pack instead and ``summary.paths`` holds pack references.
+    """
+    summary = ExportSummary(total=len(hits))
+    order = sorted(range(len(hits)), key=lambda i: hits[i].start)
+    lock = threading.Lock()
+    room = threading.Condition(lock)
+    inflight = [0]
+    done = [0]
+    src = None
+    own_pack = isinstance(container, str)
+    pack = open_pack(container, container_compression)
+
+    def write(i: int, data: bytes):
+        path, err = "", "interrupted"
+        try:
+            name = export_name(hits[i], len(data))
+            if pack is not None:
+                path = pack.add(name.replace(os.sep, "/"), data, type=hits[i].sig.name,
+                                src_offset=hits[i].start)
+            else:
+                path = os.path.join(out_dir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            err = None
+        except Exception as e:
+            err = str(e) or type(e).__name__
+        finally:  # the bytes leave the inflight budget however the write ended
+            with lock:
+                if err is None:
+                    summary.written += 1
+                    summary.bytes_written += len(data)
+                    summary.paths[i] = path
+                else:
+                    summary.failed.append((i, err))
+                inflight[0] -= len(data)
+                done[0] += 1
+                room.notify_all()
+                n = done[0]
+        if progress_cb:
+            progress_cb(n, summary.total)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for i in order:
+            if stop_flag and stop_flag():
+                summary.cancelled = True
+                break
+            hit = hits[i]
+            if hit.preview_only:
+                try:
+                    if src is None:
+                        src = open_source(source)
+                    size = hit.end - hit.start
+                    fd = src.fileno() if hasattr(src, 'fileno') else src
+                    if pack is not None:
+                        path, n = pack.add_range(export_name(hit, size).replace(os.sep, "/"), fd,
+                                                 hit.start, size, type=hit.sig.name,
+                                                 src_offset=hit.start)
+                    else:
+                        path = os.path.join(out_dir, export_name(hit, size))
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        with open(path, 'wb') as f:
+                            n = copy_range(fd, hit.start, size, f.fileno())
+                    if n != size:
+                        raise OSError(f"short copy: {n} of {size} bytes")
+                    with lock:
+                        summary.written += 1
+                        summary.bytes_written += n
+                        summary.paths[i] = path
+                except OSError as e:
+                    with lock:
+                        summary.failed.append((i, str(e)))
+                with lock:
+                    done[0] += 1
+                    n_done = done[0]
+                if progress_cb:
+                    progress_cb(n_done, summary.total)
+                continue
+            data = hit.raw_data
+            if not data:
+                try:
+                    if src is None:
+                        src = open_source(source)
+                    data = src.read_at(hit.start, hit.end - hit.start)
+                except OSError as e:
+                    with lock:
+                        summary.failed.append((i, str(e)))
+                        done[0] += 1
+                    continue
+            with room:
+                while inflight[0] and inflight[0] + len(data) > max_inflight_bytes:
+                    room.wait()
+                inflight[0] += len(data)
+            pool.submit(write, i, data)
+    finally:
+        pool.shutdown(wait=True)
+        if src is not None:
+            src.close()
+        if pack is not None and own_pack:
+            pack.close()
+        elif pack is not None:
+            pack.flush()
+    summary.failed.sort()
+    return summary
@@ -0,0 +1,327 @@
+"""
+Lazy directory tree of an NTFS volume.
+
+:class:`FSTree` lists a directory by reading its ``$I30`` index
+(``$INDEX_ROOT`` plus the ``INDX`` blocks of ``$INDEX_ALLOCATION``)
+instead of parsing the whole MFT, so the root of a volume with millions
+of records is listed after reading a handful of clusters.  Parsed
+records and directory listings are kept in bounded LRU caches, and
+listing a directory queues its subdirectories for prefetch on a
+background thread, so the folder a user expands next is usually listed
+already.
+
+Deleted files are not in any index.  :meth:`FSTree.scan_deleted` walks
+the MFT once in the background, keeping only the records not in use,
+and merges them into the listings of their parent directories as they
+are found.
+"""
+
+from __future__ import annotations
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from .parser import (
+    ATTR_BITMAP, ATTR_FILE_NAME, ATTR_INDEX_ALLOCATION, ATTR_INDEX_ROOT, MFTParser,
+    ParsedRecord, _NAMESPACE_RANK, apply_fixups, find_attribute, iter_attributes,
+    parse_file_name,
+)
+from .volume import ROOT_RECORD, NTFSVolume
+
+I30 = "$I30"
+FN_DIRECTORY = 0x10000000   # $FILE_NAME flag of directories
+
+_ENTRY = struct.Struct('<QHHH')   # file reference, entry length, key length, flags
+_ENTRY_LAST = 0x2
+
+@dataclass
+class TreeEntry:
+    record: int
+    seq: int
+    name: str
+    is_dir: bool
+    size: int = 0
+    modified: int = 0           # FILETIME
+    deleted: bool = False
+
+def _entry(ref: int, seq: int, fn, deleted: bool = False) -> TreeEntry:
+    return TreeEntry(ref, seq, fn.name, bool(fn.flags & FN_DIRECTORY), fn.size, fn.times[1], deleted)
+
+def _sorted(entries: Iterable[TreeEntry]) -> List[TreeEntry]:
+    return sorted(entries, key=lambda e: (not e.is_dir, e.name.lower()))
+
+def iter_index_entries(buf: bytes, header: int):
+    """Yield ``(record, seq, FileNameAttr)`` for the entries of the index node at ``header``."""
+    if header + 16 > len(buf):
+        return
+    first, end = struct.unpack_from('<II', buf, header)
+    pos, end = header + first, min(len(buf), header + end)
+    while pos + 16 <= end:
+        ref, elen, klen, flags = _ENTRY.unpack_from(buf, pos)
+        if flags & _ENTRY_LAST or elen < 16:
+            return
+        if klen >= 66 and pos + 16 + klen <= end:
+            fn = parse_file_name(buf[pos + 16:pos + 16 + klen])
+            yield ref & 0xFFFFFFFFFFFF, ref >> 48, fn
+        pos += elen
+
+class _LRU(OrderedDict):
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self.limit = limit
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def put(self, key, value) -> None:
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.limit:
+            self.popitem(last=False)
+
+class FSTree:
+    """Directory listings of an NTFS volume, read on demand from its indexes.
+
+    ``source`` is a path (opened with :func:`~openrecover.rawio.open_source`)
+    or an open :class:`~openrecover.volume.NTFSVolume`.  All methods may
+    be called from any thread.
+    """
+
+    def __init__(self, source: Union[str, NTFSVolume], offset: int = 0,
+                 cache_records: int = 4096, cache_dirs: int = 1024,
+                 prefetch: bool = True, prefetch_limit: int = 64) -> None:
+        self._own = not isinstance(source, NTFSVolume)
+        self.vol = NTFSVolume(source, offset) if self._own else source
+        self.parser = MFTParser(self.vol.record_size, self.vol.boot.bytes_per_sector)
+        self._records = _LRU(cache_records)
+        self._dirs = _LRU(cache_dirs)
+        self._io = threading.Lock()
+        self._lock = threading.Lock()
+        self.prefetch_limit = prefetch_limit if prefetch else 0
+        self._pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        self._queued = set()
+        self._futures = set()
+        self._deleted: Dict[int, List[Tuple[int, TreeEntry]]] = {}   # parent -> (parent seq, entry)
+        self._scan: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.deleted_ready = threading.Event()
+        self.records_read = 0
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._scan is not None:
+            self._scan.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._own:
+            self.vol.close()
+
+    def __enter__(self) -> "FSTree":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _read(self, off: int, size: int) -> bytes:
+        with self._io:
+            return self.vol.read(off, size)
+
+    def _raw_record(self, number: int) -> bytes:
+        with self._lock:
+            raw = self._records.get(number)
+        if raw is None:
+            with self._io:
+                raw = self.vol.read_record(number)
+            self.records_read += 1
+            with self._lock:
+                self._records.put(number, raw)
+        return raw
+
+    def record(self, number: int) -> ParsedRecord:
+        """The parsed MFT record ``number`` (its raw bytes are cached)."""
+        return self.parser.parse(self._raw_record(number), number * self.vol.record_size)
+
+    def root(self) -> TreeEntry:
+        rec = self.record(ROOT_RECORD)
+        return TreeEntry(ROOT_RECORD, rec.sequence, "", True, 0, rec.modified, rec.is_deleted)
+
+    def _index_blocks(self, raw: bytes, block_size: int):
+        alloc = find_attribute(raw, ATTR_INDEX_ALLOCATION, I30)
+        if alloc is None or alloc.resident:
+            return
+        bitmap = find_attribute(raw, ATTR_BITMAP, I30)
+        used = None
+        if bitmap is not None:
+            with self._io:
+                used = self.vol.read_attribute(bitmap)
+        vol = self.vol
+        for i in range(alloc.data_size // block_size):
+            if used is not None and (i >> 3 >= len(used) or not used[i >> 3] >> (i & 7) & 1):
+                continue
+            buf = bytearray()
+            for voff, n in vol.extents(alloc.runs, i * block_size, block_size):
+                buf += b'\x00' * n if voff is None else self._read(voff, n)
+            if buf[:4] != b'INDX':
+                continue
+            try:
+                yield apply_fixups(bytes(buf), vol.boot.bytes_per_sector)
+            except ValueError:
+                continue
+
+    def _list(self, number: int) -> List[TreeEntry]:
+        raw = self._raw_record(number)
+        best: Dict[int, tuple] = {}
+
+        def take(ref, seq, fn):
+            if ref == number:
+                return  # the root lists itself as "."
+            rank = _NAMESPACE_RANK.get(fn.namespace, 4)
+            if ref not in best or rank < best[ref][0]:
+                best[ref] = (rank, seq, fn)
+
+        root = find_attribute(raw, ATTR_INDEX_ROOT, I30)
+        if root is None or not root.resident or len(root.value) < 32:
+            return []
+        block_size = struct.unpack_from('<I', root.value, 8)[0] or self.vol.boot.index_block_size
+        for ref, seq, fn in iter_index_entries(root.value, 16):
+            take(ref, seq, fn)
+        for block in self._index_blocks(raw, block_size):
+            for ref, seq, fn in iter_index_entries(block, 0x18):
+                take(ref, seq, fn)
+        return _sorted(_entry(ref, seq, fn) for ref, (_r, seq, fn) in best.items())
+
+    def children(self, number: int) -> List[TreeEntry]:
+        """Entries of directory ``number``, directories first, then by name.
+
+        Deleted entries found so far by :meth:`scan_deleted` are included.
+        """
+        with self._lock:
+            cached = self._dirs.get(number)
+        if cached is None:
+            cached = self._list(number)
+            with self._lock:
+                self._dirs.put(number, cached)
+        with self._lock:
+            deleted = list(self._deleted.get(number, ()))
+        out = cached
+        if deleted:
+            raw = self._raw_record(number)
+            seq, = struct.unpack_from('<H', raw, 0x10)
+            dir_deleted = not raw[0x16] & 0x1
+            live = {e.record for e in cached}
+            # as in PathResolver: the parent reference must name this incarnation of the
+            # directory (or the one before, if the directory was deleted after the file)
+            extra = [e for pseq, e in deleted if e.record not in live and
+                     (not pseq or pseq == seq or (dir_deleted and (pseq + 1) & 0xFFFF == seq))]
+            if extra:
+                out = _sorted(cached + extra)
+        self._queue_prefetch(e.record for e in out if e.is_dir and not e.deleted)
+        return out
+
+    def _queue_prefetch(self, numbers: Iterable[int]) -> None:
+        if self._pool is None or self._stop.is_set():
+            return
+        n = 0
+        for number in numbers:
+            if n >= self.prefetch_limit:
+                break
+            with self._lock:
+                if number in self._dirs or number in self._queued:
+                    continue
+                self._queued.add(number)
+            fut = self._pool.submit(self._prefetch, number)
+            with self._lock:
+                self._futures.add(fut)
+            fut.add_done_callback(self._prefetch_done)
+            n += 1
+
+    def _prefetch_done(self, fut) -> None:
+        with self._lock:
+            self._futures.discard(fut)
+
+    def _prefetch(self, number: int) -> None:
+        try:
+            if self._stop.is_set():
+                return
+            listing = self._list(number)
+            with self._lock:
+                self._dirs.put(number, listing)
+        except (ValueError, OSError, struct.error):
+            pass
+        finally:
+            with self._lock:
+                self._queued.discard(number)
+
+    def prefetched(self, number: int) -> bool:
+        with self._lock:
+            return number in self._dirs
+
+    def wait_prefetch(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the queued prefetches; False if some are still running after ``timeout``."""
+        with self._lock:
+            pending = list(self._futures)
+        return not wait(pending, timeout).not_done
+
+    def scan_deleted(self, batch: int = 4096,
+                     progress_cb: Optional[Callable[[int, int], None]] = None) -> threading.Thread:
+        """Start the background walk of the MFT for deleted records.
+
+        ``progress_cb(done, total)`` reports records; ``deleted_ready`` is
+        set when the walk is complete.
+        """
+        if self._scan is None:
+            self._scan = threading.Thread(target=self._scan_deleted, args=(batch, progress_cb),
+                                          daemon=True)
+            self._scan.start()
+        return self._scan
+
+    def _scan_deleted(self, batch: int, progress_cb) -> None:
+        vol = self.vol
+        rs, total = vol.record_size, vol.record_count
+        try:
+            for first in range(0, total, batch):
+                if self._stop.is_set():
+                    return
+                n = min(batch, total - first)
+                with self._io:
+                    blob = vol.read_runs(vol.mft_runs, first * rs, n * rs)
+                found: Dict[int, List[Tuple[int, TreeEntry]]] = {}
+                for i in range(len(blob) // rs):
+                    raw = blob[i * rs:(i + 1) * rs]
+                    if raw[:4] != b'FILE' or raw[0x16] & 0x1:
+                        continue  # in use: listed by its directory's index
+                    try:
+                        e = self._deleted_entry(first + i, apply_fixups(raw, vol.boot.bytes_per_sector))
+                    except (ValueError, struct.error):
+                        continue
+                    if e is not None:
+                        found.setdefault(e[0], []).append(e[1:])
+                if found:
+                    with self._lock:
+                        for parent, entries in found.items():
+                            self._deleted.setdefault(parent, []).extend(entries)
+                if progress_cb:
+                    progress_cb(first + n, total)
+        finally:
+            self.deleted_ready.set()
+
+    @staticmethod
+    def _deleted_entry(number: int, raw: bytes):
+        seq, = struct.unpack_from('<H', raw, 0x10)
+        best, rank = None, 99
+        for a in iter_attributes(raw):
+            if a.type == ATTR_FILE_NAME and a.resident and len(a.value) >= 66:
+                fn = parse_file_name(a.value)
+                r = _NAMESPACE_RANK.get(fn.namespace, 4)
+                if r < rank:
+                    best, rank = fn, r
+        if best is None:
+            return None
+        e = _entry(number, seq, best, deleted=True)
+        e.is_dir = bool(raw[0x16] & 0x2)
+        return best.parent, best.parent_seq, e
@@ -2,17 +2,25 @@ from __future__ import annotations
 import os, time, threading, math, traceback
 from typing import Optional
 
-from PySide6.QtCore import Qt, Signal, Slot, QObject, QThread, QTimer
-from PySide6.QtGui import QPixmap, QImage
+from PySide6.QtCore import Qt, Signal, Slot, QObject, QThread, QTimer, QAbstractItemModel, QModelIndex
+from PySide6.QtGui import QPixmap, QImage, QColor
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QLineEdit, QPushButton,
     QFileDialog, QCheckBox, QSpinBox, QProgressBar, QTableWidget,
-    QTableWidgetItem, QGridLayout, QHBoxLayout, QVBoxLayout, QMessageBox
+    QTableWidgetItem, QGridLayout, QHBoxLayout, QVBoxLayout, QMessageBox,
+    QAbstractItemView, QDialog, QTreeView
 )
 
 from .carver import FileCarver
 from .signatures import ALL_SIGNATURES
-from .rawio import to_raw_if_drive
+from .rawio import to_raw_if_drive, image_device
+from .export import export_hits
+from .container import PackReader
+from .fstree import FSTree, TreeEntry
+from .mfttable import from_filetime
+from .partitions import read_partitions
+from .recovery import FileRecovery
+from .triage import CLASS_NAMES
 
 _ASSET_DIR = os.path.join(os.path.dirname(__file__), "assets")
 _LOGO = os.path.join(_ASSET_DIR, "spriglogo.png")
@@ -37,6 +45,7 @@ QTableWidget{gridline-color:#232733;selection-background-color:#3B82F6;}
 class Worker(QObject):
     progress = Signal(int, int)
     found    = Signal(object)
+    triaged  = Signal(object)
     status   = Signal(str)
     error    = Signal(str)
     done     = Signal()
@@ -69,15 +78,22 @@ class Worker(QObject):
                 stop_flag=lambda: self._stop.is_set(),
                 pause_flag=lambda: self._pause.is_set(),
                 write_output=self.opts.get("write_output", True),
+                known_hashes=self.opts.get("known_hashes"),
+                mft_index=self.opts.get("mft_index"),
+                triage=self.opts.get("triage"),
+                priority=self.opts.get("priority", False),
             )
+            if self.opts.get("triage"):
+                self.status.emit("Triage…")
+                tmap = carver.prepare_triage()
+                if carver.triage is not None:
+                    self.triaged.emit(tmap)
             self.status.emit("Scanning…")
             for r in carver.scan():
                 if self._stop.is_set():
                     self.status.emit("Stopped")
                     break
-                while self._pause.is_set():
-                    time.sleep(0.05)
-                self.found.emit(r)
+                self.found.emit(r)  # the carver itself waits while paused
             self.done.emit()
         except Exception:
             self.error.emit(traceback.format_exc())
@@ -88,6 +104,299 @@ class Worker(QObject):
     def stop(self):
         self._stop.set()
 
+class ExportWorker(QObject):
+    progress = Signal(int, int)
+    done     = Signal(object)
+    error    = Signal(str)
+
+    def __init__(self, src: str, out: str, hits: list, container: str = ""):
+        super().__init__()
+        self.src = src
+        self.out = out
+        self.hits = hits
+        self.container = container or None
+        self._stop = threading.Event()
+
+    @Slot()
+    def run(self):
+        try:
+            summary = export_hits(
+                self.src, self.hits, self.out,
+                progress_cb=lambda cur, total: self.progress.emit(int(cur), int(total)),
+                stop_flag=lambda: self._stop.is_set(),
+                container=self.container,
+            )
+            self.done.emit(summary)
+        except Exception:
+            self.error.emit(traceback.format_exc())
+
+    def stop(self):
+        self._stop.set()
+
+class PackDialog(QDialog):
+    """Lists the entries of a pack file; previews and extracts single entries."""
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Pack • {os.path.basename(path)}")
+        self.setMinimumSize(800, 520)
+        self.pack = PackReader(path)
+        lay = QVBoxLayout(self)
+        self.edFilter = QLineEdit()
+        self.edFilter.setPlaceholderText("Filter (name or type)")
+        lay.addWidget(self.edFilter)
+        self.tbl = QTableWidget(len(self.pack), 4)
+        self.tbl.setHorizontalHeaderLabels(["name", "type", "length", "stored"])
+        self.tbl.horizontalHeader().setStretchLastSection(True)
+        self.tbl.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tbl.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tbl.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for row, e in enumerate(self.pack):
+            stored = f"{e['stored']} ({e['codec']})" if e["codec"] != "none" else str(e["stored"])
+            for col, text in enumerate((e["name"], e.get("type", ""), str(e["length"]), stored)):
+                self.tbl.setItem(row, col, QTableWidgetItem(text))
+        lay.addWidget(self.tbl, 1)
+        self.preview = QLabel()
+        self.preview.setAlignment(Qt.AlignCenter)
+        self.preview.setMinimumHeight(180)
+        self.preview.setStyleSheet("border:1px solid #232733;background:#171A21;color:#7BF79E;")
+        lay.addWidget(self.preview)
+        row = QHBoxLayout()
+        self.btnExtract = QPushButton("Extract Selected…")
+        self.btnExtract.setEnabled(False)
+        row.addStretch(1)
+        row.addWidget(self.btnExtract)
+        lay.addLayout(row)
+        self.tbl.itemSelectionChanged.connect(self._on_selection_changed)
+        self.edFilter.textChanged.connect(self._apply_filter)
+        self.btnExtract.clicked.connect(self._extract)
+
+    def _rows(self) -> list:
+        return sorted(i.row() for i in self.tbl.selectionModel().selectedRows())
+
+    @Slot()
+    def _apply_filter(self):
+        needle = self.edFilter.text().strip().lower()
+        for row in range(self.tbl.rowCount()):
+            text = (self.tbl.item(row, 0).text() + " " + self.tbl.item(row, 1).text()).lower()
+            self.tbl.setRowHidden(row, bool(needle) and needle not in text)
+
+    @Slot()
+    def _on_selection_changed(self):
+        rows = self._rows()
+        self.btnExtract.setEnabled(bool(rows))
+        if not rows:
+            self.preview.clear()
+            return
+        data = self.pack.preview(rows[0])
+        img = QImage.fromData(data)
+        if not img.isNull():
+            pix = QPixmap.fromImage(img).scaled(self.preview.size(), Qt.KeepAspectRatio,
+                                                Qt.SmoothTransformation)
+            self.preview.setPixmap(pix)
+        else:
+            self.preview.setText(data[:200].decode('utf-8', errors='replace'))
+
+    @Slot()
+    def _extract(self):
+        rows = self._rows()
+        out = QFileDialog.getExistingDirectory(self, "Extract to folder")
+        if not rows or not out:
+            return
+        try:
+            paths = self.pack.extract_all(out, rows)
+        except OSError as e:
+            QMessageBox.critical(self, "Extract Error", str(e))
+            return
+        QMessageBox.information(self, "Extracted", f"Extracted {len(paths)} files to {out}.")
+
+    def done(self, result: int):
+        self.pack.close()
+        super().done(result)
+
+class _Node:
+    __slots__ = ("entry", "parent", "row", "kids", "listing")
+
+    def __init__(self, entry: Optional[TreeEntry], parent=None, row: int = 0):
+        self.entry = entry
+        self.parent = parent
+        self.row = row
+        self.kids = []
+        self.listing = None     # all children, once the folder has been listed
+
+class FSTreeModel(QAbstractItemModel):
+    """Lazy model over an :class:`FSTree`: a folder is listed when the view first expands it.
+
+    Rows are inserted ``BATCH`` at a time, so a huge folder only creates
+    items for the part the user scrolls through.
+    """
+    COLUMNS = ("name", "size", "modified", "state")
+    BATCH = 1000
+
+    def __init__(self, tree: FSTree, parent=None):
+        super().__init__(parent)
+        self.tree = tree
+        self._root = _Node(None)
+        self._root.kids = [_Node(tree.root(), self._root, 0)]
+
+    def reload(self):
+        """Forget listed folders, e.g. once the deleted-file scan has finished."""
+        self.beginResetModel()
+        self._root.kids = [_Node(self.tree.root(), self._root, 0)]
+        self.endResetModel()
+
+    def _node(self, index: QModelIndex) -> _Node:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def entry(self, index: QModelIndex) -> Optional[TreeEntry]:
+        return self._node(index).entry
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self._node(parent).kids[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        p = index.internalPointer().parent
+        if p is None or p is self._root:
+            return QModelIndex()
+        return self.createIndex(p.row, 0, p)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.column() > 0 else len(self._node(parent).kids)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        node = self._node(parent)
+        if node is self._root:
+            return True
+        return node.entry.is_dir and (node.listing is None or bool(node.listing))
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        node = self._node(parent)
+        if node is self._root or not node.entry.is_dir:
+            return False
+        return node.listing is None or len(node.kids) < len(node.listing)
+
+    def fetchMore(self, parent: QModelIndex):
+        node = self._node(parent)
+        if node.listing is None:
+            try:
+                node.listing = self.tree.children(node.entry.record)
+            except (ValueError, OSError):
+                node.listing = []   # unreadable index: show the folder as empty
+        start = len(node.kids)
+        batch = node.listing[start:start + self.BATCH]
+        if not batch:
+            return
+        self.beginInsertRows(parent, start, start + len(batch) - 1)
+        node.kids.extend(_Node(e, node, start + i) for i, e in enumerate(batch))
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        e = index.internalPointer().entry
+        if role == Qt.DisplayRole:
+            col = index.column()
+            if col == 0:
+                return e.name or "\\"
+            if col == 1:
+                return "" if e.is_dir else str(e.size)
+            if col == 2:
+                return from_filetime(e.modified).strftime("%Y-%m-%d %H:%M") if e.modified else ""
+            return "deleted" if e.deleted else ""
+        if role == Qt.ForegroundRole and e.deleted:
+            return QColor("#F87171")
+        return None
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+class VolumeDialog(QDialog):
+    """Browses the folders of an NTFS volume and recovers selected files."""
+
+    def __init__(self, source: str, offset: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Volume • {source}")
+        self.setMinimumSize(860, 560)
+        self.source = source
+        self.offset = offset
+        self.tree = FSTree(source, offset)
+        lay = QVBoxLayout(self)
+        self.view = QTreeView()
+        self.view.setUniformRowHeights(True)
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.model = FSTreeModel(self.tree, self)
+        self.view.setModel(self.model)
+        self.view.setColumnWidth(0, 420)
+        self.view.expand(self.model.index(0, 0))
+        lay.addWidget(self.view, 1)
+        row = QHBoxLayout()
+        self.lblState = QLabel("")
+        self.btnDeleted = QPushButton("Show Deleted")
+        self.btnRecover = QPushButton("Recover Selected…")
+        row.addWidget(self.lblState)
+        row.addStretch(1)
+        row.addWidget(self.btnDeleted)
+        row.addWidget(self.btnRecover)
+        lay.addLayout(row)
+        self.btnDeleted.clicked.connect(self._scan_deleted)
+        self.btnRecover.clicked.connect(self._recover)
+        self._scan_timer = QTimer(self)
+        self._scan_timer.setInterval(250)
+        self._scan_timer.timeout.connect(self._poll_scan)
+        self._scan_progress = (0, 0)
+
+    @Slot()
+    def _scan_deleted(self):
+        self.btnDeleted.setEnabled(False)
+        self.tree.scan_deleted(progress_cb=lambda cur, total: setattr(self, "_scan_progress", (cur, total)))
+        self._scan_timer.start()
+
+    @Slot()
+    def _poll_scan(self):
+        cur, total = self._scan_progress
+        if not self.tree.deleted_ready.is_set():
+            self.lblState.setText(f"Scanning MFT for deleted files… {cur:,}/{total:,} records")
+            return
+        self._scan_timer.stop()
+        self.lblState.setText("Deleted files shown in red")
+        self.model.reload()
+        self.view.expand(self.model.index(0, 0))
+
+    @Slot()
+    def _recover(self):
+        entries = [self.model.entry(i) for i in self.view.selectionModel().selectedRows()]
+        entries = [e for e in entries if e is not None and not e.is_dir]
+        if not entries:
+            QMessageBox.information(self, "Recover", "Select one or more files.")
+            return
+        out = QFileDialog.getExistingDirectory(self, "Recover to folder")
+        if not out:
+            return
+        vol = self.tree.vol
+        try:
+            recovery = FileRecovery(self.source, out, record_size=vol.record_size,
+                                    cluster_size=vol.cluster_size, volume_offset=self.offset)
+            paths = recovery.recover_batch([self.tree.record(e.record) for e in entries])
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Recover Error", str(e))
+            return
+        done = sum(1 for p in paths if p)
+        QMessageBox.information(self, "Recovered", f"Recovered {done} of {len(entries)} files to {out}.")
+
+    def done(self, result: int):
+        self._scan_timer.stop()
+        self.tree.close()
+        super().done(result)
+
 class Main(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -136,8 +445,8 @@ class Main(QMainWindow):
         opt_card = QWidget(objectName="Card")
         opt = QGridLayout(opt_card)
         opt.setContentsMargins(12,12,12,12)
-        self.edChunk = QLineEdit("16M")
-        self.edOverlap = QLineEdit("256K")
+        self.edChunk = QLineEdit("auto")
+        self.edOverlap = QLineEdit("auto")
         self.edMaxBytes = QLineEdit("0")
         self.edMinSize = QLineEdit("256")
         self.spMaxFiles = QSpinBox()
@@ -147,6 +456,19 @@ class Main(QMainWindow):
         self.ckAllow = QCheckBox("Allow same-disk (unsafe)")
         self.ckDedup = QCheckBox("Deduplicate")
         self.ckDedup.setChecked(True)
+        self.ckPack = QCheckBox("Pack output")
+        self.ckPack.setToolTip("Recover into one carved.pack file in the output folder instead of loose files")
+        self.ckMft = QCheckBox("Names from MFT")
+        self.ckMft.setToolTip("Match hits to the MFT records that owned their clusters (NTFS sources)")
+        self.ckTriage = QCheckBox("Triage first")
+        self.ckTriage.setToolTip("Classify the source block by block, skip constant blocks and show the map;\n"
+                                 "the map is saved as triage.map in the output folder and reused")
+        self.ckPriority = QCheckBox("Likely files first")
+        self.ckPriority.setToolTip("Carve deleted files' clusters, free space and compressed-looking blocks\n"
+                                   "before the rest of the source; every byte is still scanned once")
+        self.btnOpenPack = QPushButton("Open Pack…")
+        self.btnVolume = QPushButton("Browse Volume…")
+        self.btnVolume.setToolTip("Browse the NTFS folders of the source; folders are read as they are expanded")
         self.btnImage = QPushButton("Create Image…")
         self.btnStart = QPushButton("Start Scan", objectName="Primary")
         self.btnPause = QPushButton("Pause")
@@ -163,6 +485,10 @@ class Main(QMainWindow):
         opt.addWidget(self.ckFast, 1,0,1,2)
         opt.addWidget(self.ckAllow,1,2,1,3)
         opt.addWidget(self.ckDedup,1,5,1,2)
+        opt.addWidget(self.ckPack, 1,7,1,2)
+        opt.addWidget(self.ckMft,  1,9,1,2)
+        opt.addWidget(self.ckTriage, 1,11,1,2)
+        opt.addWidget(self.ckPriority, 1,13,1,2)
 
         self.sig_checkboxes = {}
         sig_layout = QHBoxLayout()
@@ -174,6 +500,8 @@ class Main(QMainWindow):
         sig_container = QWidget()
         sig_container.setLayout(sig_layout)
         opt.addWidget(sig_container, 2, 0, 1, 6)
+        opt.addWidget(self.btnVolume, 3, 3)
+        opt.addWidget(self.btnOpenPack, 3, 4)
         opt.addWidget(self.btnImage, 3, 5)
         opt.addWidget(self.btnStart, 3, 6)
         opt.addWidget(self.btnPause, 3, 7)
@@ -185,9 +513,18 @@ class Main(QMainWindow):
         self.pb.setMaximum(1)
         outer.addWidget(self.pb)
 
+        self.heatmap = QLabel()
+        self.heatmap.setFixedHeight(16)
+        self.heatmap.setScaledContents(True)
+        self.heatmap.setVisible(False)
+        outer.addWidget(self.heatmap)
+
         self.tbl = QTableWidget(0, 6)
         self.tbl.setHorizontalHeaderLabels(["type","start","length","path","ok","note"])
         self.tbl.horizontalHeader().setStretchLastSection(True)
+        self.tbl.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tbl.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tbl.setEditTriggers(QAbstractItemView.NoEditTriggers)
         outer.addWidget(self.tbl, 1)
 
         # Preview label and action buttons
@@ -202,9 +539,17 @@ class Main(QMainWindow):
         self.btnDiscardSel = QPushButton("Discard Selected")
         self.btnRecoverSel.setEnabled(False)
         self.btnDiscardSel.setEnabled(False)
+        self.edFilter = QLineEdit()
+        self.edFilter.setPlaceholderText("Filter (type, path or note)")
+        self.btnRecoverAll = QPushButton("Recover All Matching")
+        self.btnCancelExport = QPushButton("Cancel Export")
+        self.btnCancelExport.setEnabled(False)
         action_row.addWidget(self.btnRecoverSel)
         action_row.addWidget(self.btnDiscardSel)
         action_row.addStretch(1)
+        action_row.addWidget(self.edFilter)
+        action_row.addWidget(self.btnRecoverAll)
+        action_row.addWidget(self.btnCancelExport)
         outer.addLayout(action_row)
 
         self.lblTip = QLabel("Tip: Use Drive… to select E: and scan \\ \\E: (Admin EXE). Or Create Image… to scan the image without admin.")
@@ -219,10 +564,15 @@ class Main(QMainWindow):
         self.btnPause.clicked.connect(self._toggle_pause)
         self.btnStop.clicked.connect(self._stop)
         self.btnImage.clicked.connect(self._create_image)
+        self.btnOpenPack.clicked.connect(self._open_pack)
+        self.btnVolume.clicked.connect(self._browse_volume)
         # connect table selection and action buttons
         self.tbl.itemSelectionChanged.connect(self._on_selection_changed)
         self.btnRecoverSel.clicked.connect(self._recover_selected)
         self.btnDiscardSel.clicked.connect(self._discard_selected)
+        self.edFilter.textChanged.connect(self._apply_filter)
+        self.btnRecoverAll.clicked.connect(self._recover_matching)
+        self.btnCancelExport.clicked.connect(self._cancel_export)
         self._eta_timer = QTimer(self)
         self._eta_timer.setInterval(750)
         self._eta_timer.timeout.connect(self._refresh_eta)
@@ -230,6 +580,8 @@ class Main(QMainWindow):
     def _reset_state(self):
         self._thread: Optional[QThread] = None
         self._worker: Optional[Worker]  = None
+        self._export_thread: Optional[QThread] = None
+        self._export_worker: Optional[ExportWorker] = None
         self._last_prog = (0, time.time())
         self._cur = 0
         self._total = 0
@@ -238,6 +590,8 @@ class Main(QMainWindow):
         self.tbl.setRowCount(0)
         self._results: dict[int, object] = {}
         self.previewLabel.clear()
+        self.heatmap.clear()
+        self.heatmap.setVisible(False)
         self.btnRecoverSel.setEnabled(False)
         self.btnDiscardSel.setEnabled(False)
         self.setWindowTitle(f"{APP_NAME} Ready")
@@ -270,6 +624,9 @@ class Main(QMainWindow):
             mul = 1024*1024*1024; s = s[:-1]
         return int(float(s) * mul)
 
+    def _parse_auto(self, s: str):
+        return "auto" if (s or "").strip().lower() in ("", "auto") else self._parse_bytes(s)
+
     def _start(self):
         src = self.edSrc.text().strip()
         out = self.edOut.text().strip()
@@ -289,13 +646,16 @@ class Main(QMainWindow):
             QMessageBox.warning(self, "No file types selected", "Please select at least one file type to scan.")
             return
         opts = dict(
-            chunk=self._parse_bytes(self.edChunk.text()),
-            overlap=self._parse_bytes(self.edOverlap.text()),
+            chunk=self._parse_auto(self.edChunk.text()),
+            overlap=self._parse_auto(self.edOverlap.text()),
             max_bytes=self._parse_bytes(self.edMaxBytes.text()),
             min_size=self._parse_bytes(self.edMinSize.text()),
             max_files=self.spMaxFiles.value(),
             fast_index=self.ckFast.isChecked(),
             dedup=self.ckDedup.isChecked(),
+            mft_index=True if self.ckMft.isChecked() else None,
+            triage=os.path.join(out, "triage.map") if self.ckTriage.isChecked() else None,
+            priority=self.ckPriority.isChecked(),
             signatures=selected_sigs,
             write_output=False  # run carver in preview mode
         )
@@ -305,6 +665,7 @@ class Main(QMainWindow):
         self._thread.started.connect(self._worker.run)
         self._worker.progress.connect(self._on_progress)
         self._worker.found.connect(self._on_found)
+        self._worker.triaged.connect(self._on_triaged)
         self._worker.status.connect(lambda s: self.setWindowTitle(f"{APP_NAME} • {s}"))
         self._worker.error.connect(self._on_error)
         self._worker.done.connect(self._on_done)
@@ -333,6 +694,27 @@ class Main(QMainWindow):
         else:
             self.pb.setMaximum(0)
 
+    # constant, text, high-entropy, structured
+    HEAT_COLORS = ((0x23, 0x27, 0x33), (0x3B, 0x82, 0xF6), (0xF5, 0x9E, 0x0B), (0x34, 0xD3, 0x99))
+
+    @Slot(object)
+    def _on_triaged(self, tmap):
+        """Draw the triage map as a strip, each cell blending the classes of its blocks."""
+        width = max(1, min(len(tmap), 2048))
+        hist = tmap.histogram(width)
+        img = QImage(width, 1, QImage.Format_RGB32)
+        for x in range(width):
+            row = hist[x]
+            n = int(row.sum()) or 1
+            rgb = [sum(int(row[c]) * self.HEAT_COLORS[c][k] for c in range(len(row))) // n
+                   for k in range(3)]
+            img.setPixelColor(x, 0, QColor(*rgb))
+        self.heatmap.setPixmap(QPixmap.fromImage(img))
+        counts = tmap.counts()
+        self.heatmap.setToolTip(", ".join(f"{counts[name]} {name}" for name in CLASS_NAMES)
+                                + f" blocks of {tmap.block_size // 1024} KiB")
+        self.heatmap.setVisible(True)
+
     @Slot(object)
     def _on_found(self, r):
         row = self.tbl.rowCount()
@@ -344,8 +726,14 @@ class Main(QMainWindow):
         self.tbl.setItem(row, 2, QTableWidgetItem(str(max(0, end - start))))
         self.tbl.setItem(row, 3, QTableWidgetItem(str(getattr(r, "out_path", ""))))
         self.tbl.setItem(row, 4, QTableWidgetItem(str(getattr(r, "ok", False))))
-        self.tbl.setItem(row, 5, QTableWidgetItem(str(getattr(r, "note", ""))))
+        note = str(getattr(r, "note", ""))
+        origin = getattr(r, "origin", None)
+        if origin is not None:
+            note = (note + " " if note else "") + f"was {origin.path or origin.name}"
+        self.tbl.setItem(row, 5, QTableWidgetItem(note))
         self._results[row] = r
+        if self.edFilter.text():
+            self.tbl.setRowHidden(row, not self._row_matches(row))
 
     @Slot()
     def _on_done(self):
@@ -366,21 +754,19 @@ class Main(QMainWindow):
     # ---------- selective recovery slots ----------
     @Slot()
     def _on_selection_changed(self):
-        selected = self.tbl.selectedItems()
-        if not selected:
+        rows = self._selected_rows()
+        if not rows:
             self.previewLabel.clear()
             self.btnRecoverSel.setEnabled(False)
             self.btnDiscardSel.setEnabled(False)
             return
-        row = selected[0].row()
+        self.btnRecoverSel.setEnabled(self._export_worker is None)
+        self.btnDiscardSel.setEnabled(True)
+        row = self.tbl.currentRow() if self.tbl.currentRow() in rows else rows[0]
         res = self._results.get(row)
         if not res:
             self.previewLabel.setText("No data")
-            self.btnRecoverSel.setEnabled(False)
-            self.btnDiscardSel.setEnabled(False)
             return
-        self.btnRecoverSel.setEnabled(True)
-        self.btnDiscardSel.setEnabled(True)
         kind = res.sig.name.lower()
         if kind in ("jpeg", "jpg", "png", "gif"):
             img = QImage.fromData(res.raw_data)
@@ -398,49 +784,108 @@ class Main(QMainWindow):
                 text = '<binary>'
             self.previewLabel.setText(text)
 
+    def _selected_rows(self) -> list:
+        return sorted(i.row() for i in self.tbl.selectionModel().selectedRows())
+
+    def _row_matches(self, row: int) -> bool:
+        needle = self.edFilter.text().strip().lower()
+        if not needle:
+            return True
+        for col in (0, 3, 5):
+            item = self.tbl.item(row, col)
+            if item and needle in item.text().lower():
+                return True
+        return False
+
+    @Slot()
+    def _apply_filter(self):
+        for row in range(self.tbl.rowCount()):
+            self.tbl.setRowHidden(row, not self._row_matches(row))
+
     @Slot()
     def _recover_selected(self):
-        selected = self.tbl.selectedItems()
-        if not selected:
-            return
-        row = selected[0].row()
-        res = self._results.get(row)
-        if not res:
+        self._export_rows(self._selected_rows())
+
+    @Slot()
+    def _recover_matching(self):
+        self._export_rows([r for r in range(self.tbl.rowCount()) if not self.tbl.isRowHidden(r)])
+
+    def _export_rows(self, rows: list):
+        rows = [r for r in rows if r in self._results]
+        if not rows or self._export_worker is not None:
             return
         out_dir = self.edOut.text().strip()
         if not out_dir:
             QMessageBox.warning(self, "No Output", "Please specify an output directory before recovering")
             return
-        sig = res.sig
-        filename = f"{sig.name}_{res.start}_len{len(res.raw_data)}.{sig.ext}"
-        out_subdir = os.path.join(out_dir, sig.name)
-        os.makedirs(out_subdir, exist_ok=True)
-        out_path = os.path.join(out_subdir, filename)
-        try:
-            with open(out_path, 'wb') as f:
-                f.write(res.raw_data)
-            self.tbl.setItem(row, 3, QTableWidgetItem(out_path))
+        self._export_rows_list = rows
+        hits = [self._results[r] for r in rows]
+        self.btnRecoverSel.setEnabled(False); self.btnRecoverAll.setEnabled(False)
+        self.btnDiscardSel.setEnabled(False); self.btnCancelExport.setEnabled(True)
+        self.pb.setMaximum(len(hits)); self.pb.setValue(0)
+        self.setWindowTitle(f"{APP_NAME} • Exporting {len(hits)} files…")
+        self._export_thread = QThread(self)
+        pack = os.path.join(out_dir, "carved.pack") if self.ckPack.isChecked() else ""
+        self._export_worker = ExportWorker(self.edSrc.text().strip(), out_dir, hits, pack)
+        self._export_worker.moveToThread(self._export_thread)
+        self._export_thread.started.connect(self._export_worker.run)
+        self._export_worker.progress.connect(self._on_export_progress)
+        self._export_worker.done.connect(self._on_export_done)
+        self._export_worker.error.connect(self._on_export_error)
+        self._export_thread.start()
+
+    @Slot()
+    def _cancel_export(self):
+        if self._export_worker:
+            self._export_worker.stop()
+            self.btnCancelExport.setEnabled(False)
+
+    @Slot(int, int)
+    def _on_export_progress(self, cur: int, total: int):
+        self.pb.setMaximum(max(1, total))
+        self.pb.setValue(min(cur, total))
+
+    def _finish_export(self):
+        if self._export_thread:
+            self._export_thread.quit(); self._export_thread.wait(1500)
+        self._export_thread = None; self._export_worker = None
+        self.btnRecoverAll.setEnabled(True); self.btnCancelExport.setEnabled(False)
+        self._on_selection_changed()
+
+    @Slot(object)
+    def _on_export_done(self, summary):
+        rows = self._export_rows_list
+        for i, path in summary.paths.items():
+            row = rows[i]
+            self.tbl.setItem(row, 3, QTableWidgetItem(path))
             self.tbl.setItem(row, 4, QTableWidgetItem(str(True)))
             self.tbl.setItem(row, 5, QTableWidgetItem(""))
-            self.btnRecoverSel.setEnabled(False)
-            QMessageBox.information(self, "Recovered", f"File saved to {out_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Recover Error", str(e))
+        for i, err in summary.failed:
+            self.tbl.setItem(rows[i], 5, QTableWidgetItem(err))
+        self._finish_export()
+        state = "cancelled" if summary.cancelled else "finished"
+        self.setWindowTitle(f"{APP_NAME} • Export {state}")
+        msg = f"Recovered {summary.written} of {summary.total} files ({summary.bytes_written/1e6:.1f} MB)."
+        if summary.failed:
+            msg += f"\n{len(summary.failed)} failed; see the note column."
+        QMessageBox.information(self, f"Export {state}", msg)
+
+    @Slot(str)
+    def _on_export_error(self, msg: str):
+        self._finish_export()
+        QMessageBox.critical(self, "Recover Error", msg)
 
     @Slot()
     def _discard_selected(self):
-        selected = self.tbl.selectedItems()
-        if not selected:
+        rows = self._selected_rows()
+        if not rows or self._export_worker is not None:
             return
-        row = selected[0].row()
-        self.tbl.removeRow(row)
-        if row in self._results:
-            del self._results[row]
-        # re-index remaining results
-        new_results = {}
-        for i, (r, res) in enumerate(sorted(self._results.items(), key=lambda x: x[0])):
-            new_results[i] = res if r == i else res
-        self._results = new_results
+        for row in reversed(rows):
+            self.tbl.removeRow(row)
+        # re-index remaining results to their new row numbers
+        gone = set(rows)
+        kept = [res for r, res in sorted(self._results.items()) if r not in gone]
+        self._results = dict(enumerate(kept))
         self.previewLabel.clear()
         self.btnRecoverSel.setEnabled(False)
         self.btnDiscardSel.setEnabled(False)
@@ -466,6 +911,41 @@ class Main(QMainWindow):
         if m: return f"{m:d}m {s:02d}s"
         return f"{s:d}s"
 
+    def _open_pack(self):
+        p, _ = QFileDialog.getOpenFileName(self, "Open pack file", self.edOut.text().strip(),
+                                           "Packs (*.pack);;All files (*.*)")
+        if not p:
+            return
+        try:
+            dlg = PackDialog(p, self)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Pack Error", str(e))
+            return
+        dlg.exec()
+
+    def _browse_volume(self):
+        src = self.edSrc.text().strip()
+        if not src:
+            QMessageBox.information(self, "Info", "Pick a source image or drive first.")
+            return
+        src = to_raw_if_drive(src)
+        try:
+            # a bare volume, else the first NTFS partition of a whole disk
+            offsets = [0] + [p.offset for p in read_partitions(src) if p.fs == "ntfs"]
+        except (OSError, ValueError):
+            offsets = [0]
+        err = "no NTFS volume found"
+        for off in offsets:
+            try:
+                dlg = VolumeDialog(src, off, self)
+                break
+            except (OSError, ValueError) as e:
+                err = str(e)
+        else:
+            QMessageBox.critical(self, "Volume Error", err)
+            return
+        dlg.exec()
+
     def _create_image(self):
         src = self.edSrc.text().strip()
         if not src:
@@ -479,24 +959,7 @@ class Main(QMainWindow):
         self.pb.setMaximum(0); self.pb.setValue(0)
         def job():
             try:
-                bs_list = [1024*1024, 256*1024, 64*1024, 4096]
-                with open(src, "rb", buffering=0) as fi, open(out, "wb", buffering=0) as fo:
-                    while True:
-                        try:
-                            b = fi.read(bs_list[0])
-                        except Exception:
-                            b = b""
-                            for bs in bs_list[1:]:
-                                try:
-                                    b = fi.read(bs); break
-                                except Exception: b = b""
-                            if not b:
-                                try: fi.seek(fi.tell() + 4096)
-                                except Exception: break
-                                continue
-                        if not b: break
-                        fo.write(b)
-                        self.pb.setMaximum(0)
+                image_device(src, out, progress_cb=lambda cur, total: self.pb.setMaximum(0))
                 self.setWindowTitle(f"{APP_NAME} • Imaging complete")
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
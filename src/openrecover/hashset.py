@@ -0,0 +1,217 @@
+"""
+Known-file hash sets (NSRL-style) for excluding stock files.
+
+A hash set is built once by :func:`build_hashset` into a binary index:
+a small header, a 256-entry fan-out table (as in git pack indexes), a
+Bloom filter and the sorted, de-duplicated digests.  :class:`HashSet`
+memory-maps the index, so opening a set of tens of millions of digests
+costs no time and no Python objects; a lookup is a few Bloom probes and,
+for the rare candidates that pass it, a binary search within one
+fan-out bucket.
+
+Building sorts in batches spilled to temporary files and merges them,
+so the input never has to fit in memory either.
+"""
+
+from __future__ import annotations
+import os
+import mmap
+import heapq
+import struct
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
+
+MAGIC = b'ORHSET01'
+_HEADER = struct.Struct('<8s8sIIQQ')    # magic, algorithm, digest size, k, count, bloom bytes
+_FANOUT = struct.Struct('<256Q')
+DIGEST_SIZES = {"md5": 16, "sha1": 20, "sha256": 32}
+
+def _bloom_positions(d: bytes, k: int, m: int) -> Iterator[int]:
+    # digests are uniformly distributed already: derive the probes from their bytes
+    h1 = int.from_bytes(d[:8], 'little')
+    h2 = int.from_bytes(d[8:16], 'little') | 1
+    for i in range(k):
+        yield (h1 + i * h2) % m
+
+def _to_digest(value: Union[bytes, str], size: int) -> Optional[bytes]:
+    if isinstance(value, str):
+        try:
+            value = bytes.fromhex(value.strip())
+        except ValueError:
+            return None
+    return bytes(value) if len(value) == size else None
+
+def read_digests(path: str, algorithm: str) -> Iterator[bytes]:
+    """Digests from a text file: one hex digest per line, or CSV such as NSRLFile.txt.
+
+    On each line the first field of the right length that parses as hex
+    is taken (with MD5, the 40-digit SHA-1 column of NSRL is skipped).
+    """
+    size = DIGEST_SIZES[algorithm]
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            for field in line.replace(',', ' ').replace('\t', ' ').split():
+                field = field.strip('"\'')
+                if len(field) == 2 * size:
+                    d = _to_digest(field, size)
+                    if d is not None:
+                        yield d
+                        break
+
+def _spill(batch: List[bytes], tmp_dir: str) -> str:
+    batch.sort()
+    fd, path = tempfile.mkstemp(prefix='hashset_', suffix='.run', dir=tmp_dir)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(batch))
+    return path
+
+def _iter_run(f: BinaryIO, size: int) -> Iterator[bytes]:
+    block = size * 4096
+    while True:
+        buf = f.read(block)
+        if not buf:
+            return
+        for i in range(0, len(buf) - size + 1, size):
+            yield buf[i:i + size]
+
+def build_hashset(digests: Iterable[Union[bytes, str]], path: str, algorithm: str = "md5",
+                  bits_per_entry: int = 10, batch: int = 1 << 20) -> int:
+    """Write the index for ``digests`` (raw or hex) to ``path``; return the digest count.
+
+    ``bits_per_entry`` sizes the Bloom filter (10 bits: ~1% of unknown
+    digests go on to the binary search).  At most ``batch`` digests are
+    held in memory; larger inputs are sorted in runs and merged.
+    """
+    if algorithm not in DIGEST_SIZES:
+        raise ValueError(f"unsupported digest: {algorithm}")
+    size = DIGEST_SIZES[algorithm]
+    tmp_dir = os.path.dirname(os.path.abspath(path))
+    runs: List[str] = []
+    cur: List[bytes] = []
+    seen = 0
+    try:
+        for value in digests:
+            d = _to_digest(value, size)
+            if d is None:
+                continue
+            cur.append(d)
+            seen += 1
+            if len(cur) >= batch:
+                runs.append(_spill(cur, tmp_dir))
+                cur = []
+        cur.sort()
+        files = [open(p, 'rb') for p in runs]
+        try:
+            merged = heapq.merge(cur, *(_iter_run(f, size) for f in files)) if files else iter(cur)
+            # the count is only known after de-duplication: size the filter for ``seen``
+            bloom_bytes = max(8, -(-seen * bits_per_entry // 8))
+            m = bloom_bytes * 8
+            k = max(1, min(16, round(bits_per_entry * 0.693)))
+            bloom = bytearray(bloom_bytes)
+            fanout = [0] * 256
+            count = 0
+            data_off = _HEADER.size + _FANOUT.size + bloom_bytes
+            with open(path, 'wb') as out:
+                out.seek(data_off)
+                prev = None
+                pending: List[bytes] = []
+                for d in merged:
+                    if d == prev:
+                        continue
+                    prev = d
+                    pending.append(d)
+                    fanout[d[0]] += 1
+                    for p in _bloom_positions(d, k, m):
+                        bloom[p >> 3] |= 1 << (p & 7)
+                    count += 1
+                    if len(pending) >= 65536:
+                        out.write(b''.join(pending))
+                        pending = []
+                out.write(b''.join(pending))
+                total = 0
+                for i in range(256):  # cumulative: digests whose first byte is <= i
+                    total += fanout[i]
+                    fanout[i] = total
+                out.seek(0)
+                out.write(_HEADER.pack(MAGIC, algorithm.encode(), size, k, count, bloom_bytes))
+                out.write(_FANOUT.pack(*fanout))
+                out.write(bloom)
+        finally:
+            for f in files:
+                f.close()
+    finally:
+        for p in runs:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+    return count
+
+class HashSet:
+    """Read-only, memory-mapped view of an index written by :func:`build_hashset`."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._f = open(path, 'rb')
+        try:
+            head = self._f.read(_HEADER.size + _FANOUT.size)
+            if len(head) < _HEADER.size + _FANOUT.size or head[:8] != MAGIC:
+                raise ValueError(f"{path}: not a hash set index")
+            _, algo, self.digest_size, self.k, self.count, bloom_bytes = _HEADER.unpack_from(head)
+            self.algorithm = algo.rstrip(b'\0').decode()
+            self._fanout = _FANOUT.unpack_from(head, _HEADER.size)
+            self._bloom_off = _HEADER.size + _FANOUT.size
+            self._m = bloom_bytes * 8
+            self._data_off = self._bloom_off + bloom_bytes
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._f.close()
+            raise
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, digest: Union[bytes, str]) -> bool:
+        d = _to_digest(digest, self.digest_size)
+        if d is None:
+            return False
+        self.lookups += 1
+        mm, boff = self._mm, self._bloom_off
+        for p in _bloom_positions(d, self.k, self._m):
+            if not mm[boff + (p >> 3)] >> (p & 7) & 1:
+                return False
+        lo = self._fanout[d[0] - 1] if d[0] else 0
+        hi = self._fanout[d[0]]
+        size, base = self.digest_size, self._data_off
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            off = base + mid * size
+            cur = mm[off:off + size]
+            if cur < d:
+                lo = mid + 1
+            elif cur > d:
+                hi = mid
+            else:
+                self.hits += 1
+                return True
+        return False
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+            self._f.close()
+
+    def __enter__(self) -> "HashSet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def open_hashset(known: Union[str, HashSet, None]) -> Optional[HashSet]:
+    """Accept a path or an open set, as the carver and recovery options do."""
+    if known is None or isinstance(known, HashSet):
+        return known
+    return HashSet(known) if known else None
@@ -0,0 +1,112 @@
+"""
+Block fingerprint manifests for incremental rescans.
+
+A manifest records a fingerprint for every fixed-size block of the
+scanned window together with the carve hits found in it.  On the next
+scan of the same (or a re-imaged) source, blocks whose fingerprint is
+unchanged reuse their stored hits and only changed blocks, plus their
+neighbours, are carved again.
+"""
+
+from __future__ import annotations
+import os
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+MANIFEST_VERSION = 1
+
+def block_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+@dataclass
+class BlockManifest:
+    block_size: int
+    start: int
+    end: int
+    params: dict
+    blocks: List[str] = field(default_factory=list)
+    hits: List[dict] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BlockManifest"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                d = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if d.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(d["block_size"], d["start"], d["end"], d["params"], d["blocks"], d["hits"])
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "block_size": self.block_size,
+                       "start": self.start, "end": self.end, "params": self.params,
+                       "blocks": self.blocks, "hits": self.hits}, f)
+        os.replace(tmp, path)
+
+    def block_of(self, pos: int) -> int:
+        return (pos - self.start) // self.block_size
+
+def hash_blocks(
+    read_at: Callable[[int, int], bytes],
+    start: int,
+    end: int,
+    block_size: int,
+    read_size: int,
+    progress: Optional[Callable[[int], None]] = None,
+    stop: Optional[Callable[[], bool]] = None,
+) -> Optional[List[str]]:
+    """Fingerprint ``[start, end)`` block by block using large sequential reads.
+
+    Returns None if ``stop`` fired before the pass completed.
+    """
+    read_size = max(block_size, read_size // block_size * block_size)
+    digests: List[str] = []
+    pos = start
+    while pos < end:
+        if stop and stop():
+            return None
+        buf = read_at(pos, min(read_size, end - pos))
+        if not buf:
+            break
+        mv = memoryview(buf)
+        for i in range(0, len(buf), block_size):
+            digests.append(block_digest(mv[i:i + block_size]))
+        pos += len(buf)
+        if progress:
+            progress(pos)
+    return digests
+
+def plan_rescan(old: Optional[BlockManifest], new: BlockManifest) -> Tuple[List[Tuple[int, int]], List[dict]]:
+    """Compare fingerprints; return (byte ranges to carve, stored hits to reuse)."""
+    n = len(new.blocks)
+    if (old is None or old.block_size != new.block_size or old.start != new.start
+            or old.params != new.params):
+        return ([(new.start, new.end)] if n else []), []
+    changed: Set[int] = {b for b in range(n) if b >= len(old.blocks) or old.blocks[b] != new.blocks[b]}
+    dirty: Set[int] = set()
+    for b in changed:
+        dirty.update((b - 1, b, b + 1))
+    # a stored hit is only valid if every block it spans is unchanged
+    by_block: Dict[int, List[dict]] = {}
+    for h in old.hits:
+        first, last = new.block_of(h["start"]), new.block_of(max(h["start"], h["end"] - 1))
+        if first >= n:
+            continue
+        if any(b in changed or b >= n for b in range(first, last + 1)):
+            dirty.add(first)
+        by_block.setdefault(first, []).append(h)
+    reuse = [h for b in sorted(by_block) if b not in dirty for h in by_block[b]]
+    ranges: List[Tuple[int, int]] = []
+    for b in sorted(x for x in dirty if 0 <= x < n):
+        s = new.start + b * new.block_size
+        e = min(new.end, s + new.block_size)
+        if ranges and ranges[-1][1] == s:
+            ranges[-1] = (ranges[-1][0], e)
+        else:
+            ranges.append((s, e))
+    return ranges, reuse
@@ -0,0 +1,189 @@
+"""
+Interval index from physical byte ranges to the MFT records that own them.
+
+:class:`IntervalIndex` is a static index of half-open intervals kept in
+compact arrays sorted by start, with a running maximum of the ends.  An
+overlap query is two binary searches plus a walk over the intervals
+between them, which for non-overlapping data runs is exactly the
+answer; only runs of stale deleted records that overlap reused clusters
+add to the walk.
+
+:class:`RunIndex` fills it with the data runs of parsed records, so a
+carve hit can be traced back to the (usually deleted) file that once
+held its clusters: name, path, timestamps and the hit's offset within
+that file.  A hit that starts at the first byte of a file whose runs
+are intact duplicates what MFT recovery would produce.
+"""
+
+from __future__ import annotations
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .parser import MFTParser, ParsedRecord
+from .paths import PathResolver
+
+DATA_FLAG_ENCRYPTED = 0x4000
+
+class IntervalIndex:
+    """Half-open ``[start, end)`` intervals with an integer value each.
+
+    Add intervals, call :meth:`freeze` once, then query.
+    """
+
+    def __init__(self) -> None:
+        self._s = array('Q')
+        self._e = array('Q')
+        self._v = array('q')
+        self._max_end = array('Q')
+        self._frozen = False
+
+    def __len__(self) -> int:
+        return len(self._s)
+
+    def add(self, start: int, end: int, value: int) -> None:
+        if end <= start:
+            return
+        self._s.append(start)
+        self._e.append(end)
+        self._v.append(value)
+        self._frozen = False
+
+    def freeze(self) -> None:
+        order = sorted(range(len(self._s)), key=self._s.__getitem__)
+        self._s = array('Q', (self._s[i] for i in order))
+        self._e = array('Q', (self._e[i] for i in order))
+        self._v = array('q', (self._v[i] for i in order))
+        top, self._max_end = 0, array('Q')
+        for e in self._e:
+            top = max(top, e)
+            self._max_end.append(top)
+        self._frozen = True
+
+    def items(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield ``(start, end, value)`` of every interval, by start."""
+        if not self._frozen:
+            self.freeze()
+        return zip(self._s, self._e, self._v)
+
+    def overlapping(self, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Yield ``(start, end, value)`` of every interval overlapping ``[start, end)``."""
+        if not self._frozen:
+            self.freeze()
+        hi = bisect_left(self._s, end)
+        lo = bisect_right(self._max_end, start, 0, hi)   # first interval that may reach ``start``
+        s, e, v = self._s, self._e, self._v
+        for i in range(lo, hi):
+            if e[i] > start:
+                yield s[i], e[i], v[i]
+
+@dataclass
+class FileOrigin:
+    record: int
+    seq: int
+    name: str
+    path: str
+    size: int
+    created: int        # FILETIME
+    modified: int
+    deleted: bool
+    file_offset: int    # where the hit starts within the file
+    duplicate: bool     # the hit starts at the file's first byte and MFT recovery has it
+
+    def as_dict(self) -> dict:
+        return {"record": self.record, "seq": self.seq, "name": self.name, "path": self.path,
+                "size": self.size, "created": self.created, "modified": self.modified,
+                "deleted": self.deleted, "file_offset": self.file_offset}
+
+class RunIndex:
+    """Data runs of MFT records by absolute physical byte range."""
+
+    def __init__(self, cluster_size: int, volume_offset: int = 0, record_count: int = 0) -> None:
+        self.cluster_size = cluster_size
+        self.volume_offset = volume_offset
+        self.index = IntervalIndex()
+        self.paths = PathResolver(limit=record_count)
+        self._run_rec = array('Q')    # per run, in add order: owning record
+        self._run_off = array('Q')    #   and the run's offset within the file
+        self._info: Dict[int, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, rec: ParsedRecord, number: Optional[int] = None) -> None:
+        """Index ``rec``'s runs; every record (directories too) also feeds path resolution.
+
+        ``number`` is the MFT slot ``rec`` was read from, when known.
+        """
+        self.paths.add(rec, number)
+        if rec.is_dir or not rec.data_runs or rec.resident_data is not None:
+            return
+        cs, pos = self.cluster_size, 0
+        for lcn, clusters in rec.data_runs:
+            n = min(clusters * cs, rec.size - pos)
+            if n <= 0:
+                break
+            if lcn is not None:
+                start = self.volume_offset + lcn * cs
+                self.index.add(start, start + n, len(self._run_rec))
+                self._run_rec.append(rec.record_number)
+                self._run_off.append(pos)
+            pos += n
+        recoverable = not rec.data_flags & DATA_FLAG_ENCRYPTED
+        self._info[rec.record_number] = (rec.sequence, rec.file_name, rec.size, rec.created,
+                                         rec.modified, rec.is_deleted, recoverable)
+
+    def freeze(self) -> None:
+        self.index.freeze()
+
+    def owners(self, start: int, end: int) -> List[FileOrigin]:
+        """Records whose runs overlap ``[start, end)``; live records and exact starts first."""
+        out: Dict[int, FileOrigin] = {}
+        for s, _e, run in self.index.overlapping(start, end):
+            number = self._run_rec[run]
+            if number in out:
+                continue
+            seq, name, size, created, modified, deleted, recoverable = self._info[number]
+            file_off = self._run_off[run] + (start - s)
+            out[number] = FileOrigin(number, seq, name, self.paths.path(number), size, created,
+                                     modified, deleted, file_off,
+                                     duplicate=recoverable and file_off == 0)
+        return sorted(out.values(), key=lambda o: (o.file_offset != 0, o.deleted, o.record))
+
+    def file_starts(self, deleted_only: bool = True) -> List[int]:
+        """Physical offsets of the first byte of every (deleted) indexed file."""
+        out = []
+        for s, _e, run in self.index.items():
+            if self._run_off[run] == 0 and (not deleted_only or self._info[self._run_rec[run]][5]):
+                out.append(s)
+        return out
+
+    def origin(self, start: int, end: int) -> Optional[FileOrigin]:
+        found = self.owners(start, end)
+        return found[0] if found else None
+
+    @classmethod
+    def from_records(cls, records: Iterable[ParsedRecord], cluster_size: int,
+                     volume_offset: int = 0, record_count: int = 0) -> "RunIndex":
+        idx = cls(cluster_size, volume_offset, record_count)
+        for rec in records:
+            idx.add(rec)
+        idx.freeze()
+        return idx
+
+    @classmethod
+    def from_volume(cls, source: Union[str, "NTFSVolume"], offset: int = 0) -> "RunIndex":
+        """Parse every record of the NTFS volume at ``offset`` of ``source``."""
+        from .volume import NTFSVolume
+        own = not isinstance(source, NTFSVolume)
+        vol = NTFSVolume(source, offset) if own else source
+        try:
+            parser = MFTParser(vol.record_size, vol.boot.bytes_per_sector)
+            idx = cls(vol.cluster_size, vol.offset, vol.record_count)
+            for n, raw in vol.iter_records():
+                idx.add(parser.parse(raw, n * vol.record_size), n)
+            idx.freeze()
+            return idx
+        finally:
+            if own:
+                vol.close()
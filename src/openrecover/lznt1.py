@@ -0,0 +1,248 @@
+"""
+LZNT1 decompression for NTFS-compressed ``$DATA`` streams.
+
+A compressed stream is split into compression units of
+``1 << compression_unit`` clusters (64 KiB with 4 KiB clusters).  In the
+runlist a unit is stored either fully allocated (kept uncompressed),
+fully sparse (zeros) or as some allocated clusters followed by sparse
+ones, in which case the allocated clusters hold LZNT1 data.
+:func:`iter_decompressed` walks a runlist unit by unit, so memory stays
+bounded by one unit however large the file is.
+
+On Windows units are decompressed by ``RtlDecompressBuffer`` from
+ntdll.  Elsewhere the pure-Python decoder copies literal runs and
+back-references as slices rather than byte by byte, but still walks
+the tokens one at a time: ``scripts/bench_lznt1.py`` measures about
+5-8 MB/s of output on text and 18-27 MB/s on repetitive records.
+Zeros (~1 GB/s) and incompressible data (~2-2.5 GB/s) are only fast
+because they are a few long back-references or stored chunks that are
+copied whole.  :func:`compress`
+is a simple greedy encoder used by the tests and
+``scripts/bench_lznt1.py``.
+"""
+
+from __future__ import annotations
+import os
+import ctypes
+from typing import Callable, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 4096
+
+Run = Tuple[Optional[int], int]
+
+# number of trailing zero bits of a tag byte (8 for 0): the literal run length
+_LIT_RUN = [8] + [(x & -x).bit_length() - 1 for x in range(1, 256)]
+# offset/length split of a phrase token at position p of the chunk
+_SHIFT = [0] * (CHUNK_SIZE + 1)
+_MASK = [0] * (CHUNK_SIZE + 1)
+for _p in range(1, CHUNK_SIZE + 1):
+    _lg, _i = 0, _p - 1
+    while _i >= 0x10:
+        _lg += 1
+        _i >>= 1
+    _SHIFT[_p], _MASK[_p] = 12 - _lg, 0xFFF >> _lg
+del _p, _lg, _i
+
+def _decompress_chunk(src: bytes, pos: int, end: int, out: bytearray) -> None:
+    start = len(out)
+    p = 0  # bytes produced in this chunk
+    lit_run, shift_of, mask_of = _LIT_RUN, _SHIFT, _MASK
+    while pos < end:
+        tag = src[pos]
+        pos += 1
+        if not tag:  # eight literals, the common case in poorly compressible data
+            out += src[pos:pos + 8]
+            k = min(8, end - pos)
+            pos += k
+            p += k
+            continue
+        bit = 0
+        while bit < 8 and pos < end:
+            t = tag >> bit
+            if not t & 1:
+                run = lit_run[t]
+                if run > 8 - bit:
+                    run = 8 - bit
+                if run > end - pos:
+                    run = end - pos
+                out += src[pos:pos + run]
+                pos += run
+                p += run
+                bit += run
+                continue
+            if pos + 1 >= end:
+                return
+            tok = src[pos] | (src[pos + 1] << 8)
+            pos += 2
+            bit += 1
+            if not p:
+                return  # damaged chunk: keep what was decoded, the rest reads as zeros
+            length = (tok & mask_of[p]) + 3
+            off = (tok >> shift_of[p]) + 1
+            if off > p:
+                return
+            s = start + p - off
+            if off >= length:
+                out += out[s:s + length]
+            else:  # overlapping copy repeats the last ``off`` bytes
+                out += (out[s:] * (length // off + 1))[:length]
+            p += length
+
+COMPRESSION_FORMAT_LZNT1 = 2
+
+def _native_decoder():
+    if os.name != "nt":
+        return None
+    try:
+        fn = ctypes.windll.ntdll.RtlDecompressBuffer
+    except (AttributeError, OSError):
+        return None
+    fn.restype = ctypes.c_long
+    fn.argtypes = [ctypes.c_ushort, ctypes.c_void_p, ctypes.c_ulong, ctypes.c_void_p,
+                   ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong)]
+    return fn
+
+_NATIVE = _native_decoder()
+
+def _decompress_native(data: bytes, unit_size: int) -> Optional[bytes]:
+    out = ctypes.create_string_buffer(unit_size)
+    src = ctypes.create_string_buffer(bytes(data), len(data))
+    final = ctypes.c_ulong(0)
+    status = _NATIVE(COMPRESSION_FORMAT_LZNT1, out, unit_size, src, len(data), ctypes.byref(final))
+    if status < 0:
+        return None  # damaged data: the Python decoder keeps what it can
+    return out.raw[:final.value] + bytes(unit_size - final.value)
+
+def decompress(data, unit_size: int = 0) -> bytes:
+    """Decompress one compression unit (a sequence of LZNT1 chunks).
+
+    With ``unit_size`` the result is truncated or zero-padded to it.
+    """
+    if _NATIVE is not None and unit_size:
+        native = _decompress_native(data, unit_size)
+        if native is not None:
+            return native
+    out = bytearray()
+    mv = memoryview(data)
+    pos, n = 0, len(data)
+    while pos + 2 <= n:
+        h = mv[pos] | (mv[pos + 1] << 8)
+        if h == 0:
+            break
+        end = min(n, pos + (h & 0xFFF) + 3)
+        if len(out) % CHUNK_SIZE:  # a short chunk before this one: it stood for 4 KiB
+            out += bytes(CHUNK_SIZE - len(out) % CHUNK_SIZE)
+        if h & 0x8000:
+            _decompress_chunk(bytes(mv[pos + 2:end]), 0, end - pos - 2, out)
+        else:
+            out += mv[pos + 2:end]
+        pos = end
+        if unit_size and len(out) >= unit_size:
+            break
+    if unit_size:
+        if len(out) < unit_size:
+            out += bytes(unit_size - len(out))
+        del out[unit_size:]
+    return bytes(out)
+
+def iter_units(runs: List[Run], unit_clusters: int) -> Iterator[List[Run]]:
+    """Split a runlist into the pieces of each compression unit."""
+    unit: List[Run] = []
+    have = 0
+    for lcn, n in runs:
+        while n > 0:
+            take = min(n, unit_clusters - have)
+            unit.append((lcn, take))
+            have += take
+            n -= take
+            if lcn is not None:
+                lcn += take
+            if have == unit_clusters:
+                yield unit
+                unit, have = [], 0
+    if unit:
+        yield unit
+
+def iter_decompressed(
+    read_at: Callable[[int, int], bytes],
+    runs: List[Run],
+    cluster_size: int,
+    compression_unit: int,
+    size: int,
+) -> Iterator[bytes]:
+    """Yield the decompressed stream one compression unit at a time.
+
+    ``read_at`` takes offsets relative to the volume (LCN * cluster size).
+    The output is trimmed to ``size`` bytes.
+    """
+    unit_clusters = 1 << compression_unit
+    unit_size = unit_clusters * cluster_size
+    left = size
+    for unit in iter_units(runs, unit_clusters):
+        if left <= 0:
+            return
+        allocated = [(lcn, n) for lcn, n in unit if lcn is not None]
+        if not allocated:
+            block = bytes(min(unit_size, left))
+        else:
+            raw = b"".join(read_at(lcn * cluster_size, n * cluster_size) for lcn, n in allocated)
+            if len(allocated) == len(unit):
+                block = raw  # no sparse tail: stored uncompressed
+            else:
+                block = decompress(raw, unit_size)
+        block = block[:left]
+        left -= len(block)
+        yield block
+    if left > 0:  # runlist shorter than the size: the rest reads as zeros
+        yield bytes(left)
+
+def compress(data: bytes, unit_size: int = 0) -> bytes:
+    """Greedy LZNT1 encoder (chunks that do not shrink are stored raw)."""
+    out = bytearray()
+    for cs in range(0, len(data), CHUNK_SIZE):
+        chunk = data[cs:cs + CHUNK_SIZE]
+        body = _compress_chunk(chunk)
+        if len(body) < len(chunk):
+            out += (0x8000 | 0x3000 | (len(body) - 1)).to_bytes(2, 'little') + body
+        else:
+            out += (0x3000 | (len(chunk) - 1)).to_bytes(2, 'little') + chunk
+    return bytes(out)
+
+def _compress_chunk(chunk: bytes) -> bytes:
+    out = bytearray()
+    last: dict = {}
+    i, n = 0, len(chunk)
+    while i < n:
+        tag_pos = len(out)
+        out.append(0)
+        tag = 0
+        for bit in range(8):
+            if i >= n:
+                break
+            best_len = best_off = 0
+            if i >= 1 and i + 3 <= n:
+                j = last.get(chunk[i:i + 3])
+                if j is not None:
+                    mask, shift = _MASK[i], _SHIFT[i]
+                    off = i - j
+                    if off - 1 <= 0xFFFF >> shift:
+                        ln = 3
+                        limit = min(n - i, mask + 3)
+                        while ln < limit and chunk[j + ln] == chunk[i + ln]:
+                            ln += 1
+                        best_len, best_off = ln, off
+            if best_len:
+                tok = ((best_off - 1) << _SHIFT[i]) | (best_len - 3)
+                out += tok.to_bytes(2, 'little')
+                tag |= 1 << bit
+                for k in range(i, i + best_len):
+                    if k + 3 <= n:
+                        last[chunk[k:k + 3]] = k
+                i += best_len
+            else:
+                if i + 3 <= n:
+                    last[chunk[i:i + 3]] = i
+                out.append(chunk[i])
+                i += 1
+        out[tag_pos] = tag
+    return bytes(out)
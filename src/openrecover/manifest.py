@@ -0,0 +1,154 @@
+"""
+Hash manifests for carved and recovered files.
+
+Digests are computed once, from the bytes already in memory as a file is
+written out, and the SHA-256 of the carver's canonical data is taken
+from the same pass for deduplication.  Each completed file appends one
+JSON line to the manifest, so a manifest of a cancelled run is still
+valid up to the last completed file.
+"""
+
+from __future__ import annotations
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SUPPORTED_DIGESTS = ("sha256", "md5", "sha1")
+
+class Hasher:
+    """Feeds the same bytes to several hash algorithms."""
+
+    def __init__(self, names: Iterable[str]) -> None:
+        names = list(dict.fromkeys(names))
+        bad = [n for n in names if n not in SUPPORTED_DIGESTS]
+        if bad:
+            raise ValueError(f"unsupported digest(s): {', '.join(bad)}")
+        self._h = {n: hashlib.new(n) for n in names}
+
+    def update(self, data) -> None:
+        for h in self._h.values():
+            h.update(data)
+
+    def copy(self) -> "Hasher":
+        c = Hasher(())
+        c._h = {n: h.copy() for n, h in self._h.items()}
+        return c
+
+    def hexdigests(self, names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        keep = self._h if names is None else names
+        return {n: self._h[n].hexdigest() for n in keep}
+
+class HashManifest:
+    """Append-only JSONL manifest; safe to share between threads."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def add(self, **entry) -> None:
+        line = json.dumps(entry, sort_keys=True)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._f.close()
+
+def load_manifest(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class StreamHash:
+    """Hash a file whose pieces arrive out of order.
+
+    Pieces are hashed as soon as they extend the hashed prefix; pieces
+    ahead of it wait in memory.  ``holes`` (sorted ``(offset, length)``)
+    and the tail up to ``size`` are hashed as zeros, matching sparse runs
+    in the output.  Once more than ``max_pending`` bytes wait, they are
+    dropped and :meth:`finish` hashes the rest from the written file
+    ``path`` instead.
+    """
+
+    _ZERO = bytes(1 << 16)
+    _READ = 1 << 20
+
+    def __init__(self, hasher: Hasher, size: int, holes: Iterable[Tuple[int, int]] = (),
+                 path: str = "", max_pending: int = 64 * 1024 * 1024) -> None:
+        self.hasher = hasher
+        self.size = size
+        self.next = 0
+        self.path = path
+        self.max_pending = max_pending
+        self.reread = False     # gave up buffering; finish() reads the file
+        self._holes = {off: n for off, n in holes}
+        self._pending: Dict[int, bytes] = {}
+        self._pending_bytes = 0
+
+    def _zeros(self, n: int):
+        while n > 0:
+            k = min(n, len(self._ZERO))
+            self.hasher.update(self._ZERO[:k])
+            n -= k
+
+    def _advance(self) -> None:
+        while True:
+            if self.next in self._pending:
+                data = self._pending.pop(self.next)
+                self._pending_bytes -= len(data)
+                self.hasher.update(data)
+                self.next += len(data)
+            elif self.next in self._holes:
+                n = self._holes.pop(self.next)
+                self._zeros(n)
+                self.next += n
+            else:
+                return
+
+    def feed(self, off: int, data) -> bool:
+        """Add the piece at ``off``; return True once the whole file is hashed."""
+        if self.reread:
+            return False
+        if off == self.next:
+            self.hasher.update(data)
+            self.next += len(data)
+        else:
+            self._pending[off] = bytes(data)
+            self._pending_bytes += len(data)
+            if self.path and self._pending_bytes > self.max_pending:
+                self.reread = True
+                self._pending.clear()
+                self._pending_bytes = 0
+                return False
+        self._advance()
+        return self.done
+
+    def finish(self) -> None:
+        """Hash the remaining zero tail (initialized size below the file size),
+        or everything past the hashed prefix from ``path`` once it is written."""
+        if self.reread:
+            with open(self.path, "rb") as f:
+                f.seek(self.next)
+                while self.next < self.size:
+                    data = f.read(min(self._READ, self.size - self.next))
+                    if not data:
+                        break
+                    self.hasher.update(data)
+                    self.next += len(data)
+            self._zeros(self.size - self.next)
+            self.next = self.size
+            return
+        self._advance()
+        if not self._pending and self.next < self.size:
+            self._zeros(self.size - self.next)
+            self.next = self.size
+
+    @property
+    def done(self) -> bool:
+        return not self._pending and self.next >= self.size
@@ -0,0 +1,176 @@
+"""
+Columnar in-memory MFT table backed by NumPy.
+
+:class:`MFTTable` stores one fixed-size row per parsed record in a NumPy
+structured array (no raw record bytes) and all file names in one shared
+UTF-8 buffer addressed by ``name_off``/``name_len``.  Filters and sorts
+are vectorized over the columns, so queries over millions of records
+take milliseconds.  Tables can be saved to ``.npz`` or to a directory of
+``.npy`` files that is loaded memory-mapped.
+
+NumPy is only needed by this module.
+"""
+
+from __future__ import annotations
+import os
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .parser import ParsedRecord
+
+FLAG_IN_USE = 0x1
+FLAG_DIRECTORY = 0x2
+
+RECORD_DTYPE = [
+    ('record', '<u4'),
+    ('sequence', '<u2'),
+    ('flags', '<u2'),
+    ('parent', '<u8'),
+    ('parent_seq', '<u2'),
+    ('size', '<u8'),
+    ('alloc_size', '<u8'),
+    ('created', '<i8'),
+    ('modified', '<i8'),
+    ('mft_modified', '<i8'),
+    ('accessed', '<i8'),
+    ('name_off', '<u8'),
+    ('name_len', '<u2'),
+    ('ext', 'S8'),          # lower-case extension, for vectorized type filters
+]
+
+_EPOCH_DIFF = 116444736000000000  # FILETIME ticks between 1601 and 1970
+
+def to_filetime(value: Union[int, datetime]) -> int:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 10_000_000) + _EPOCH_DIFF
+    return int(value)
+
+def from_filetime(ft: int) -> datetime:
+    return datetime.fromtimestamp((int(ft) - _EPOCH_DIFF) / 10_000_000, tz=timezone.utc)
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("MFTTable requires NumPy (pip install numpy)")
+
+def _ext(name: str) -> bytes:
+    dot = name.rfind('.')
+    if dot <= 0:
+        return b""
+    return name[dot + 1:].lower().encode('utf-8', errors='ignore')[:8]
+
+class MFTTable:
+    def __init__(self, records, names) -> None:
+        _require_numpy()
+        self.records = records
+        self.names = names
+
+    @classmethod
+    def from_records(cls, records: Iterable[ParsedRecord], batch: int = 65536) -> "MFTTable":
+        """Build a table from a stream of parsed records, ``batch`` rows at a time."""
+        _require_numpy()
+        parts: List = []
+        names = bytearray()
+        rows: List[tuple] = []
+
+        def flush():
+            if rows:
+                parts.append(np.array(rows, dtype=RECORD_DTYPE))
+                rows.clear()
+
+        for r in records:
+            nb = r.file_name.encode('utf-8', errors='replace')
+            rows.append((r.record_number, r.sequence, r.flags, r.parent, r.parent_seq,
+                         r.size, r.alloc_size, r.created, r.modified, r.mft_modified,
+                         r.accessed, len(names), len(nb), _ext(r.file_name)))
+            names += nb
+            if len(rows) >= batch:
+                flush()
+        flush()
+        arr = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+        return cls(arr, np.frombuffer(bytes(names), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes + self.names.nbytes
+
+    def name(self, i: int) -> str:
+        row = self.records[i]
+        off = int(row['name_off'])
+        return bytes(self.names[off:off + int(row['name_len'])]).decode('utf-8', errors='replace')
+
+    def query(
+        self,
+        deleted: Optional[bool] = None,
+        is_dir: Optional[bool] = None,
+        ext: Union[str, Iterable[str], None] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Union[int, datetime, None] = None,
+        modified_before: Union[int, datetime, None] = None,
+        parent: Optional[int] = None,
+    ):
+        """Return the row indices matching every given condition."""
+        rec = self.records
+        mask = np.ones(len(rec), dtype=bool)
+        if deleted is not None:
+            in_use = (rec['flags'] & FLAG_IN_USE) != 0
+            mask &= ~in_use if deleted else in_use
+        if is_dir is not None:
+            d = (rec['flags'] & FLAG_DIRECTORY) != 0
+            mask &= d if is_dir else ~d
+        if ext is not None:
+            exts = [ext] if isinstance(ext, str) else list(ext)
+            col = rec['ext']
+            hit = np.zeros(len(rec), dtype=bool)
+            for e in exts:
+                hit |= col == e.lower().lstrip('.').encode()[:8]
+            mask &= hit
+        if min_size is not None:
+            mask &= rec['size'] >= min_size
+        if max_size is not None:
+            mask &= rec['size'] <= max_size
+        if modified_after is not None:
+            mask &= rec['modified'] >= to_filetime(modified_after)
+        if modified_before is not None:
+            mask &= rec['modified'] < to_filetime(modified_before)
+        if parent is not None:
+            mask &= rec['parent'] == parent
+        return np.flatnonzero(mask)
+
+    def sort(self, idx=None, by: str = 'modified', descending: bool = False):
+        """Order row indices ``idx`` (all rows if None) by column ``by``."""
+        if idx is None:
+            idx = np.arange(len(self.records))
+        order = np.argsort(self.records[by][idx], kind='stable')
+        if descending:
+            order = order[::-1]
+        return idx[order]
+
+    def save(self, path: str):
+        """Save to ``path.npz``, or to a directory of ``.npy`` files for mmap loading."""
+        if path.endswith('.npz'):
+            np.savez(path, records=self.records, names=self.names)
+            return
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'records.npy'), self.records)
+        np.save(os.path.join(path, 'names.npy'), self.names)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "MFTTable":
+        _require_numpy()
+        if path.endswith('.npz'):
+            with np.load(path) as z:
+                return cls(z['records'], z['names'])
+        mode = 'r' if mmap else None
+        return cls(np.load(os.path.join(path, 'records.npy'), mmap_mode=mode),
+                   np.load(os.path.join(path, 'names.npy'), mmap_mode=mode))
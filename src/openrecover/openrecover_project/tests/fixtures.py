@@ -0,0 +1,10 @@
+"""
+Small file fixtures shared by the tests.
+"""
+
+import base64
+
+# a complete 1x1 PNG: signature, IHDR, IDAT and IEND with its CRC
+PNG_BYTES = base64.b64decode(
+    b"iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/"
+    b"x8AAwMB/6X6CtwAAAAASUVORK5CYII=")
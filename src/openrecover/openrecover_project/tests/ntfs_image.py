@@ -0,0 +1,276 @@
+"""
+Build small synthetic NTFS volumes for tests.
+
+Only the structures OpenRecover reads are produced: the boot sector, a
+contiguous MFT whose record 0 describes itself, the ``$Bitmap`` record
+and whatever file records a test adds.  Records carry real update
+sequence fixups, ``$STANDARD_INFORMATION``, ``$FILE_NAME`` and
+``$DATA`` attributes; directories added with :meth:`NTFSImage.add_dir`
+also get a ``$I30`` index.
+"""
+
+import struct
+from typing import List, Optional, Tuple
+
+FILETIME_2024 = 133485408000000000  # 2024-01-01T00:00:00Z
+
+def encode_runlist(runs: List[Tuple[Optional[int], int]]) -> bytes:
+    out = bytearray()
+    prev = 0
+    for lcn, length in runs:
+        lb = length.to_bytes((length.bit_length() + 8) // 8, 'little')
+        if lcn is None:
+            out.append(len(lb))
+            out += lb
+            continue
+        delta = lcn - prev
+        n = 1
+        while not -(1 << (8 * n - 1)) <= delta < (1 << (8 * n - 1)):
+            n += 1
+        out.append(len(lb) | (n << 4))
+        out += lb + delta.to_bytes(n, 'little', signed=True)
+        prev = lcn
+    return bytes(out + b'\x00')
+
+def _attr_header(atype: int, length: int, nonres: int, name: str, flags: int, attr_id: int,
+                 name_off: int) -> bytearray:
+    h = bytearray(length)
+    struct.pack_into('<IIBBHHH', h, 0, atype, length, nonres, len(name), name_off, flags, attr_id)
+    return h
+
+def resident_attr(atype: int, value: bytes, name: str = "", attr_id: int = 0) -> bytes:
+    name_b = name.encode('utf-16-le')
+    voff = (24 + len(name_b) + 7) & ~7
+    length = (voff + len(value) + 7) & ~7
+    h = _attr_header(atype, length, 0, name, 0, attr_id, 24)
+    struct.pack_into('<IH', h, 16, len(value), voff)
+    h[24:24 + len(name_b)] = name_b
+    h[voff:voff + len(value)] = value
+    return bytes(h)
+
+def nonresident_attr(atype: int, runs, data_size: int, cluster_size: int, name: str = "",
+                     flags: int = 0, compression_unit: int = 0, attr_id: int = 0) -> bytes:
+    name_b = name.encode('utf-16-le')
+    rl = encode_runlist(runs)
+    hdr = 72 if compression_unit else 64
+    runs_off = (hdr + len(name_b) + 7) & ~7
+    length = (runs_off + len(rl) + 7) & ~7
+    h = _attr_header(atype, length, 1, name, flags, attr_id, hdr)
+    clusters = sum(n for _, n in runs)
+    struct.pack_into('<QQHH', h, 16, 0, max(0, clusters - 1), runs_off, compression_unit)
+    alloc = clusters * cluster_size
+    struct.pack_into('<QQQ', h, 40, alloc, data_size, data_size)
+    h[hdr:hdr + len(name_b)] = name_b
+    h[runs_off:runs_off + len(rl)] = rl
+    return bytes(h)
+
+def standard_information(times=(FILETIME_2024,) * 4, flags: int = 0) -> bytes:
+    return resident_attr(0x10, struct.pack('<QQQQI', *times, flags) + b'\x00' * 28)
+
+def file_name_value(name: str, parent: int = 5, parent_seq: int = 5, times=(FILETIME_2024,) * 4,
+                    size: int = 0, is_dir: bool = False, namespace: int = 1) -> bytes:
+    name_b = name.encode('utf-16-le')
+    return (struct.pack('<Q', parent | (parent_seq << 48)) + struct.pack('<QQQQ', *times)
+            + struct.pack('<QQII', size, size, 0x10000000 if is_dir else 0x20, 0)
+            + bytes([len(name), namespace]) + name_b)
+
+def file_name(name: str, **kw) -> bytes:
+    return resident_attr(0x30, file_name_value(name, **kw))
+
+def mft_record(number: int, attrs: List[bytes], seq: int = 1, in_use: bool = True,
+               is_dir: bool = False, record_size: int = 1024, usn: int = 1) -> bytes:
+    rec = bytearray(record_size)
+    sectors = record_size // 512
+    usa_off, attrs_off = 0x30, (0x30 + 2 * (sectors + 1) + 7) & ~7
+    flags = (1 if in_use else 0) | (2 if is_dir else 0)
+    body = b''.join(attrs) + struct.pack('<II', 0xFFFFFFFF, 0)
+    struct.pack_into('<4sHHQHHHHII', rec, 0, b'FILE', usa_off, sectors + 1, 0, seq, 1,
+                     attrs_off, flags, attrs_off + len(body), record_size)
+    struct.pack_into('<QHHI', rec, 0x20, 0, len(attrs), 0, number)
+    rec[attrs_off:attrs_off + len(body)] = body
+    _apply_usa(rec, usa_off, sectors, usn)
+    return bytes(rec)
+
+def _apply_usa(buf: bytearray, usa_off: int, sectors: int, usn: int = 1):
+    struct.pack_into('<H', buf, usa_off, usn)
+    for i in range(1, sectors + 1):
+        end = i * 512
+        buf[usa_off + 2 * i:usa_off + 2 * i + 2] = buf[end - 2:end]
+        struct.pack_into('<H', buf, end - 2, usn)
+
+def index_entry(number: int, name: str, seq: int = 1, parent: int = 5, parent_seq: int = 5,
+                size: int = 0, is_dir: bool = False, namespace: int = 1) -> bytes:
+    key = file_name_value(name, parent, parent_seq, size=size, is_dir=is_dir, namespace=namespace)
+    length = (16 + len(key) + 7) & ~7
+    e = bytearray(length)
+    struct.pack_into('<QHHI', e, 0, number | (seq << 48), length, len(key), 0)
+    e[16:16 + len(key)] = key
+    return bytes(e)
+
+def _index_entries(entries: List[bytes], subnode: Optional[int] = None) -> bytes:
+    if subnode is None:
+        last = struct.pack('<QHHI', 0, 16, 0, 2)
+    else:
+        last = struct.pack('<QHHIQ', 0, 24, 0, 3, subnode)
+    return b''.join(entries) + last
+
+def index_root(entries: List[bytes], block_size: int = 4096, subnode: Optional[int] = None) -> bytes:
+    body = _index_entries(entries, subnode)
+    value = struct.pack('<IIIB3x', 0x30, 1, block_size, 1)
+    value += struct.pack('<IIII', 16, 16 + len(body), 16 + len(body), 0 if subnode is None else 1)
+    return resident_attr(0x90, value + body, name="$I30")
+
+def indx_block(entries: List[bytes], vcn: int = 0, block_size: int = 4096) -> bytes:
+    buf = bytearray(block_size)
+    sectors = block_size // 512
+    usa_off = 0x28
+    first = (usa_off + 2 * (sectors + 1) + 7) & ~7
+    body = _index_entries(entries)
+    struct.pack_into('<4sHHQQ', buf, 0, b'INDX', usa_off, sectors + 1, 0, vcn)
+    struct.pack_into('<IIII', buf, 0x18, first - 0x18, first - 0x18 + len(body), block_size - 0x18, 0)
+    buf[first:first + len(body)] = body
+    _apply_usa(buf, usa_off, sectors)
+    return bytes(buf)
+
+def usn_record(record: int, name: str, reason: int, usn: int = 0, seq: int = 1, parent: int = 5,
+               parent_seq: int = 5, timestamp: int = FILETIME_2024, major: int = 2) -> bytes:
+    """A change journal record, version 2 or 3 (128-bit file references)."""
+    fref, pref = record | seq << 48, parent | parent_seq << 48
+    if major == 2:
+        head = struct.pack('<QQ', fref, pref)
+    else:
+        head = fref.to_bytes(16, 'little') + pref.to_bytes(16, 'little')
+    name_b = name.encode('utf-16-le')
+    name_off = 8 + len(head) + 36
+    length = (name_off + len(name_b) + 7) & ~7
+    rec = struct.pack('<IHH', length, major, 0) + head + struct.pack(
+        '<qqIIIIHH', usn, timestamp, reason, 0, 0, 0x20, len(name_b), name_off) + name_b
+    return rec + b'\x00' * (length - len(rec))
+
+class NTFSImage:
+    """Minimal NTFS volume builder.
+
+    Cluster 0 holds the boot sector, the MFT starts at ``mft_lcn`` and the
+    ``$Bitmap`` content is placed right after it.  Use :meth:`alloc` to
+    reserve clusters for file data and :meth:`add` to write records.
+    """
+
+    def __init__(self, clusters: int = 256, cluster_size: int = 4096, record_size: int = 1024,
+                 mft_lcn: int = 4, mft_records: int = 64):
+        self.clusters = clusters
+        self.cluster_size = cluster_size
+        self.record_size = record_size
+        self.mft_lcn = mft_lcn
+        self.mft_records = mft_records
+        self.mft_clusters = -(-mft_records * record_size // cluster_size)
+        self.data = bytearray(clusters * cluster_size)
+        self.used = bytearray(clusters)
+        self.records = {}
+        self.bitmap_lcn = mft_lcn + self.mft_clusters
+        self.bitmap_clusters = -(-(clusters // 8) // cluster_size)
+        self.used[0] = 1  # boot sector
+        self.mark(mft_lcn, self.mft_clusters)
+        self.mark(self.bitmap_lcn, self.bitmap_clusters)
+        self.next_free = self.bitmap_lcn + self.bitmap_clusters
+        self.add(0, "$MFT", data_runs=[(mft_lcn, self.mft_clusters)],
+                 data_size=mft_records * record_size, parent=5)
+        self.add(5, ".", is_dir=True, parent=5)
+
+    def mark(self, lcn: int, count: int, used: int = 1):
+        for c in range(lcn, lcn + count):
+            self.used[c] = used
+
+    def alloc(self, data: bytes, lcn: Optional[int] = None, used: bool = True) -> List[Tuple[int, int]]:
+        """Write ``data`` contiguously at ``lcn`` (or the next free cluster)."""
+        n = max(1, -(-len(data) // self.cluster_size))
+        if lcn is None:
+            lcn = self.next_free
+            self.next_free += n
+        off = lcn * self.cluster_size
+        self.data[off:off + len(data)] = data
+        if used:
+            self.mark(lcn, n)
+        return [(lcn, n)]
+
+    def put(self, lcn: int, data: bytes):
+        off = lcn * self.cluster_size
+        self.data[off:off + len(data)] = data
+
+    def add(self, number: int, name: str, data: Optional[bytes] = None, data_runs=None,
+            data_size: int = 0, parent: int = 5, parent_seq: int = 5, seq: int = 1,
+            in_use: bool = True, is_dir: bool = False, times=(FILETIME_2024,) * 4,
+            extra_attrs: List[bytes] = (), data_flags: int = 0, compression_unit: int = 0,
+            names: List[str] = ()):
+        attrs = [standard_information(times)]
+        size = len(data) if data is not None else data_size
+        for n in [name, *names]:
+            attrs.append(file_name(n, parent=parent, parent_seq=parent_seq, times=times,
+                                   size=size, is_dir=is_dir))
+        if data is not None:
+            attrs.append(resident_attr(0x80, data))
+        elif data_runs is not None:
+            attrs.append(nonresident_attr(0x80, data_runs, data_size, self.cluster_size,
+                                          flags=data_flags, compression_unit=compression_unit))
+        attrs.extend(extra_attrs)
+        self.records[number] = mft_record(number, attrs, seq=seq, in_use=in_use, is_dir=is_dir,
+                                          record_size=self.record_size)
+
+    def add_dir(self, number: int, name: str, entries: List[bytes] = (), in_block: bool = False,
+                **kw):
+        """Add a directory whose ``$I30`` index holds ``entries`` (see :func:`index_entry`).
+
+        With ``in_block`` the entries go to ``INDX`` blocks (one cluster
+        each, as many as needed) of a non-resident ``$INDEX_ALLOCATION``
+        instead of the index root.
+        """
+        if not in_block:
+            attrs = [index_root(list(entries))]
+        else:
+            room = self.cluster_size - 0x80  # header, update sequence array and last entry
+            blocks, cur, used = [], [], 0
+            for e in entries:
+                if cur and used + len(e) > room:
+                    blocks.append(cur)
+                    cur, used = [], 0
+                cur.append(e)
+                used += len(e)
+            blocks.append(cur)
+            data = b''.join(indx_block(b, vcn, self.cluster_size) for vcn, b in enumerate(blocks))
+            runs = self.alloc(data)
+            bitmap = bytearray((len(blocks) + 63) // 64 * 8)
+            for i in range(len(blocks)):
+                bitmap[i >> 3] |= 1 << (i & 7)
+            attrs = [index_root([], self.cluster_size, subnode=0),
+                     nonresident_attr(0xA0, runs, len(data), self.cluster_size, name="$I30"),
+                     resident_attr(0xB0, bytes(bitmap), name="$I30")]
+        self.add(number, name, is_dir=True, extra_attrs=attrs, **kw)
+
+    def boot_sector(self) -> bytes:
+        bs = bytearray(512)
+        bs[0:3] = b'\xebR\x90'
+        bs[3:11] = b'NTFS    '
+        struct.pack_into('<HB', bs, 0x0B, 512, self.cluster_size // 512)
+        struct.pack_into('<QQQ', bs, 0x28, self.clusters * (self.cluster_size // 512),
+                         self.mft_lcn, self.mft_lcn)
+        rs = self.record_size
+        struct.pack_into('<b', bs, 0x40, rs // self.cluster_size if rs >= self.cluster_size
+                         else -(rs.bit_length() - 1))
+        struct.pack_into('<b', bs, 0x44, 1)
+        struct.pack_into('<Q', bs, 0x48, 0x1234ABCD)
+        bs[510:512] = b'\x55\xaa'
+        return bytes(bs)
+
+    def build(self) -> bytes:
+        bitmap = bytearray(-(-self.clusters // 8))
+        for c, u in enumerate(self.used):
+            if u:
+                bitmap[c // 8] |= 1 << (c % 8)
+        self.put(self.bitmap_lcn, bytes(bitmap))
+        self.add(6, "$Bitmap", data_runs=[(self.bitmap_lcn, self.bitmap_clusters)],
+                 data_size=len(bitmap))
+        self.data[0:512] = self.boot_sector()
+        base = self.mft_lcn * self.cluster_size
+        for n, rec in self.records.items():
+            off = base + n * self.record_size
+            self.data[off:off + self.record_size] = rec
+        return bytes(self.data)
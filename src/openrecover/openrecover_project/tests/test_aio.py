@@ -0,0 +1,71 @@
+import os
+import asyncio
+import tempfile
+from openrecover.aio import ScanControl
+from openrecover.carver import FileCarver
+from openrecover.scanner import NTFSScanner
+from openrecover.signatures import PNG
+from fixtures import PNG_BYTES
+
+def _image(tmp: str) -> str:
+    png = PNG_BYTES
+    img = bytearray(256 * 1024)
+    for pos in range(1000, len(img) - 1000, 32 * 1024):
+        img[pos:pos + len(png)] = png
+    img[500:504] = b'FILE'
+    p = os.path.join(tmp, 'img.bin')
+    with open(p, 'wb') as f:
+        f.write(img)
+    return p
+
+def test_ascan_matches_scan_and_throttles_progress():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp)
+        kw = dict(chunk=8192, overlap=512, min_size=0, deduplicate=False, write_output=False)
+        c = FileCarver(src, os.path.join(tmp, 'o'), [PNG], **kw)
+        expected = [r.start for r in c.scan()]
+        c.close()
+
+        calls = []
+        c = FileCarver(src, os.path.join(tmp, 'o'), [PNG],
+                       progress_cb=lambda cur, total: calls.append(cur), **kw)
+
+        async def run():
+            return [r.start async for r in c.ascan(progress_interval=60)]
+        got = asyncio.run(run())
+        c.close()
+        assert got == expected
+        assert len(calls) <= 2  # first chunk + final
+
+def test_pause_suspends_and_stop_ends_scan():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp)
+        c = FileCarver(src, os.path.join(tmp, 'o'), [PNG], chunk=8192, overlap=512,
+                       min_size=0, deduplicate=False, write_output=False)
+
+        async def run():
+            ctl = ScanControl()
+            gen = c.ascan(control=ctl)
+            first = await gen.__anext__()
+            ctl.pause()
+            before = c.stats['bytes_read']
+            nxt = asyncio.ensure_future(gen.__anext__())
+            await asyncio.sleep(0.2)
+            assert not nxt.done() and c.stats['bytes_read'] == before
+            ctl.resume()
+            second = await nxt
+            ctl.stop()
+            rest = [r async for r in gen]
+            return first, second, rest
+        first, second, rest = asyncio.run(run())
+        c.close()
+        assert second.start > first.start
+        assert rest == []
+
+def test_ascan_volume():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp)
+
+        async def run():
+            return [r.offset async for r in NTFSScanner(record_size=64).ascan_volume(src)]
+        assert asyncio.run(run()) == [500]
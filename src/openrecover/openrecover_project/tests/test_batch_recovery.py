@@ -0,0 +1,72 @@
+import os
+import tempfile
+from ntfs_image import NTFSImage
+from openrecover.carver import CarveResult
+from openrecover.parser import MFTParser
+from openrecover.recovery import Extent, FileRecovery, ResidentWriter, plan_reads
+from openrecover.scanner import NTFSScanner
+from openrecover.signatures import JPEG
+from openrecover.volume import NTFSVolume
+
+def test_plan_reads_coalesces_nearby_extents():
+    ext = [Extent(0, 0, 10000, 100), Extent(1, 0, 0, 100), Extent(0, 100, 150, 50), Extent(2, 0, 10100, 10)]
+    reads = plan_reads(ext, max_gap=100, max_read=1 << 20)
+    assert [(s, e) for s, e, _ in reads] == [(0, 200), (10000, 10110)]
+    assert [len(g) for _, _, g in plan_reads(ext, max_gap=100, max_read=150)] == [1, 1, 2]
+    reads = plan_reads([Extent(0, 4, 1000, 250)], max_gap=0, max_read=100)
+    assert [(s, e, [(x.file_off, x.length) for x in g]) for s, e, g in reads] == [
+        (1000, 1100, [(4, 100)]), (1100, 1200, [(104, 100)]), (1200, 1250, [(204, 50)])]
+
+def test_recover_batch_scatters_interleaved_runs():
+    img = NTFSImage(clusters=128)
+    cs = img.cluster_size
+    a = bytes(range(256)) * 40          # 10240 bytes, 3 clusters
+    b = b'B' * (2 * cs + 17)
+    # interleave a and b cluster by cluster, with a sparse hole in b
+    base = img.next_free
+    for k in range(3):
+        img.alloc(a[k * cs:(k + 1) * cs], lcn=base + 2 * k)
+    img.alloc(b[:cs], lcn=base + 1)
+    img.alloc(b[2 * cs:], lcn=base + 3)
+    b = b[:cs] + b'\0' * cs + b[2 * cs:]
+    img.add(40, "a.bin", data_runs=[(base, 1), (base + 2, 1), (base + 4, 1)], data_size=len(a))
+    img.add(41, "b.bin", data_runs=[(base + 1, 1), (None, 1), (base + 3, 1)], data_size=len(b))
+    img.add(42, "small.txt", data=b'resident')
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'vol.img')
+        with open(src, 'wb') as f:
+            f.write(img.build())
+        vol = NTFSVolume(src)
+        parser = MFTParser()
+        recs = {n: parser.parse(raw) for n, raw in vol.iter_records()}
+        vol.close()
+        hit = CarveResult(JPEG, (base + 1) * cs, (base + 2) * cs, "", True, "", b"")
+        rec = FileRecovery(src, os.path.join(tmp, 'out'), cluster_size=cs)
+        seen = []
+        paths = rec.recover_batch([recs[40], recs[41], recs[42], hit],
+                                  progress_cb=lambda d, t: seen.append((d, t)))
+        got = [open(p, 'rb').read() for p in paths]
+        assert got == [a, b, b'resident', b[:cs]]
+        assert len(seen) == 1 and seen[0][0] == seen[0][1]  # one coalesced sweep
+
+def test_resident_files_written_from_the_mft_scan_alone():
+    img = NTFSImage(clusters=128, mft_records=256)
+    for n in range(16, 216):
+        img.add(n, "config.ini" if n % 2 else f"note{n}.txt", data=f"file {n}".encode(),
+                in_use=n % 3 != 0)
+    img.add(220, "big.bin", data_runs=img.alloc(b'x' * 5000), data_size=5000)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'vol.img')
+        with open(src, 'wb') as f:
+            f.write(img.build())
+        parser = MFTParser()
+        records = [parser.parse(r.raw, r.offset) for r in NTFSScanner().scan_volume(src)]
+        # the writer never touches the source: point it at a path that does not exist
+        rec = FileRecovery(os.path.join(tmp, 'missing.img'), os.path.join(tmp, 'out'))
+        with ResidentWriter(rec, batch_files=32) as w:
+            paths = {p.record_number: w.add(p) for p in records}
+        assert paths[220] is None and paths[5] is None and w.files == 200
+        assert open(paths[17], 'rb').read() == b'file 17'
+        assert open(paths[19], 'rb').read() == b'file 19'  # same name, numbered
+        assert paths[17] != paths[19]
+        assert open(paths[18], 'rb').read() == b'file 18'
@@ -0,0 +1,80 @@
+import os
+import struct
+import hashlib
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.parser import parse_boot_sector
+from openrecover.signatures import PNG
+from fixtures import PNG_BYTES
+
+def _boot_sector(sectors_per_cluster: int = 8) -> bytes:
+    bs = bytearray(512)
+    bs[3:11] = b'NTFS    '
+    struct.pack_into('<HB', bs, 0x0B, 512, sectors_per_cluster)
+    struct.pack_into('<QQQ', bs, 0x28, 2048, 4, 8)
+    struct.pack_into('<b', bs, 0x40, -10)
+    struct.pack_into('<b', bs, 0x44, 1)
+    bs[510:512] = b'\x55\xaa'
+    return bytes(bs)
+
+def _carve(path: str, out: str, **kw):
+    c = FileCarver(path, out, [PNG], chunk=8192, overlap=256, min_size=0, **kw)
+    try:
+        return list(c.scan()), c
+    finally:
+        c.close()
+
+def test_parse_boot_sector():
+    bs = parse_boot_sector(_boot_sector(8))
+    assert bs is not None
+    assert bs.cluster_size == 4096
+    assert bs.record_size == 1024
+    assert bs.mft_lcn == 4
+    assert parse_boot_sector(b'\x00' * 512) is None
+
+def test_fast_index_only_tests_cluster_aligned_offsets():
+    png = PNG_BYTES
+    img = bytearray(_boot_sector(8) + b'\x00' * (32 * 1024 - 512))
+    img[8192:8192 + len(png)] = png          # cluster aligned
+    img[12345:12345 + len(png)] = png[:-1] + b'\x83'  # unaligned, different bytes
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'vol.img')
+        with open(src, 'wb') as f:
+            f.write(img)
+        full, _ = _carve(src, os.path.join(tmp, 'a'), write_output=False, deduplicate=False)
+        fast, c = _carve(src, os.path.join(tmp, 'b'), write_output=False, deduplicate=False, fast_index=True)
+        assert c.align == 4096
+        assert sorted(r.start for r in full) == [8192, 12345]
+        assert [r.start for r in fast] == [8192]
+
+def test_fast_index_falls_back_to_sector_alignment():
+    png = PNG_BYTES
+    img = bytearray(16 * 1024)
+    img[1536:1536 + len(png)] = png
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'raw.img')
+        with open(src, 'wb') as f:
+            f.write(img)
+        fast, c = _carve(src, os.path.join(tmp, 'out'), write_output=False, fast_index=True)
+        assert c.align == 512
+        assert [r.start for r in fast] == [1536]
+
+def test_large_hits_are_streamed_with_a_bounded_window():
+    from openrecover.signatures import JPEG
+    body = os.urandom(300_000).replace(b'\xff\xd9', b'\x00\x00')
+    jpeg = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00' + body + b'\xff\xd9'
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'img.bin')
+        with open(src, 'wb') as f:
+            f.write(b'\0' * 4096 + jpeg + b'\0' * 4096)
+        c = FileCarver(src, os.path.join(tmp, 'out'), [JPEG], chunk=262144, overlap=256,
+                       min_size=0, max_inflight_bytes=16384, digests=("md5",))
+        hits = list(c.scan())
+        c.close()
+        assert len(hits) == 1
+        r = hits[0]
+        assert r.preview_only and (r.start, r.end) == (4096, 4096 + len(jpeg))
+        assert open(r.out_path, 'rb').read() == jpeg
+        assert r.raw_data == jpeg[:len(r.raw_data)]
+        assert r.hashes == {"md5": hashlib.md5(jpeg).hexdigest()}
+        assert c.stats["bytes_copied"] == len(jpeg)
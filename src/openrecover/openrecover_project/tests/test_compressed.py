@@ -0,0 +1,90 @@
+import os
+import gzip
+import zlib
+import random
+import tempfile
+from fixtures import PNG_BYTES
+from ntfs_image import NTFSImage
+from openrecover.carver import FileCarver
+from openrecover.compressed import CompressedSource, make_seekable
+from openrecover.rawio import open_source
+from openrecover.signatures import PNG
+from openrecover.volume import NTFSVolume
+
+def _image() -> bytes:
+    rnd = random.Random(5)
+    return (os.urandom(300_000) + bytes(2_000_000) + PNG_BYTES
+            + bytes(rnd.choice(b'abc ') for _ in range(400_000)) + os.urandom(100_000))
+
+def _check_random_reads(src, data, n=200):
+    rnd = random.Random(1)
+    for _ in range(n):
+        off, size = rnd.randrange(len(data)), rnd.randrange(1, 300_000)
+        assert src.read_at(off, size) == data[off:off + size]
+
+def test_single_stream_gzip_and_persisted_index():
+    data = _image()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'disk.img.gz')
+        with open(path, 'wb') as f:
+            f.write(gzip.compress(data))
+        src = CompressedSource(path, spacing=1 << 16)
+        assert src.length == len(data) and os.path.isfile(path + '.seekidx')
+        assert any(state is not None for _, _, state in src._cps)  # inflater snapshots
+        _check_random_reads(src, data)
+        src._cache.clear()
+        src.frames_decoded = 0
+        assert b''.join(src.read_at(o, 4096) for o in range(0, len(data), 4096)) == data
+        assert src.frames_decoded == -(-len(data) // src.spacing)  # one decode per frame
+        src.close()
+        src = CompressedSource(path, spacing=1 << 16)  # loaded: no decode pass
+        assert src.length == len(data) and src.frames_decoded == 0
+        _check_random_reads(src, data, 20)
+        src.close()
+
+def test_seekable_members_and_scanners_read_through():
+    img = NTFSImage(clusters=64)
+    img.add(40, "a.txt", data=b'hello')
+    vol = img.build() + bytes(100_000) + PNG_BYTES + bytes(50_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, 'vol.img')
+        with open(raw, 'wb') as f:
+            f.write(vol)
+        path = os.path.join(tmp, 'vol.img.gz')
+        assert make_seekable(raw, path, member_size=32768) == len(vol)
+        os.remove(raw)
+        src = open_source(path)
+        assert isinstance(src, CompressedSource) and all(s is None for _, _, s in src._cps)
+        _check_random_reads(src, vol, 50)
+        src.close()
+        v = NTFSVolume(path)
+        assert any(n == 40 for n, _ in v.iter_records())
+        v.close()
+        c = FileCarver(path, os.path.join(tmp, 'out'), [PNG], chunk=65536, overlap=4096, min_size=0)
+        hits = list(c.scan())
+        c.close()
+        assert [h.start for h in hits] == [len(vol) - 50_000 - len(PNG_BYTES)]
+        assert open(hits[0].out_path, 'rb').read() == PNG_BYTES
+
+def _stored_member(data: bytes, size: int) -> bytes:
+    """A gzip member of exactly ``size`` compressed bytes (stored blocks) from a prefix of ``data``."""
+    for n in range(size - 18 - 5 * (size // 65535 + 1), size):
+        c = zlib.compressobj(0, zlib.DEFLATED, 31)
+        member = c.compress(data[:n]) + c.flush()
+        if len(member) == size:
+            return member
+    raise AssertionError("no stored member of that size")
+
+def test_member_boundary_one_byte_before_a_read_boundary():
+    # the second member's magic starts one byte before the first 1 MiB read ends
+    first = _stored_member(os.urandom(1 << 20), 1048575)
+    second = gzip.compress(PNG_BYTES + bytes(5000))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'disk.img.gz')
+        with open(path, 'wb') as f:
+            f.write(first + second)
+        data = zlib.decompress(first, 31) + PNG_BYTES + bytes(5000)
+        src = CompressedSource(path, spacing=1 << 16)
+        assert src.length == len(data)
+        assert src.read_at(len(data) - 5000 - len(PNG_BYTES), len(PNG_BYTES)) == PNG_BYTES
+        src.close()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import pytest
+from fixtures import PNG_BYTES
+from openrecover.carver import FileCarver
+from openrecover.container import PackReader, PackWriter, index_path, split_ref
+from openrecover.export import export_hits
+from openrecover.signatures import PNG
+
+def test_pack_roundtrip_append_and_torn_index():
+    text = b'hello packed world ' * 500
+    with tempfile.TemporaryDirectory() as tmp:
+        pack = os.path.join(tmp, 'out.pack')
+        src = os.path.join(tmp, 'src.bin')
+        with open(src, 'wb') as f:
+            f.write(os.urandom(5000))
+        with PackWriter(pack, compression="deflate") as w:
+            ref = w.add("txt/a.txt", text, type="txt")
+            with open(src, 'rb') as f:
+                _, n = w.add_range("bin/b.bin", f.fileno(), 1000, 3000, type="bin")
+        assert split_ref(ref) == (pack, "txt/a.txt") and n == 3000
+        with PackWriter(pack) as w:  # reopening appends
+            w.add("raw/c.bin", b'\x01\x02')
+        with open(index_path(pack), 'a') as f:
+            f.write('{"name": "torn", "offs')
+        with PackReader(pack) as r:
+            assert [e["name"] for e in r] == ["txt/a.txt", "bin/b.bin", "raw/c.bin"]
+            assert r.entry("txt/a.txt")["codec"] == "deflate"
+            assert r.entry(0)["stored"] < len(text)
+            assert r.read("txt/a.txt") == text and r.preview(0, 100) == text[:100]
+            assert r.read(1) == open(src, 'rb').read()[1000:4000]
+            out = r.extract("bin/b.bin", os.path.join(tmp, 'x'))
+            assert out == os.path.join(tmp, 'x', 'bin', 'b.bin')
+            assert open(out, 'rb').read() == r.read(1)
+
+def test_carver_and_export_write_into_pack():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'img.bin')
+        with open(src, 'wb') as f:
+            f.write(b'\0' * 1000 + PNG_BYTES + b'\0' * 1000)
+        out = os.path.join(tmp, 'out')
+        pack = os.path.join(out, 'carved.pack')
+        c = FileCarver(src, out, [PNG], chunk=8192, overlap=256, min_size=0, container=pack)
+        hits = list(c.scan())
+        c.close()
+        assert len(hits) == 1 and sorted(os.listdir(out)) == ['carved.pack', 'carved.pack.idx']
+        with PackReader(pack) as r:
+            e = r.entry(split_ref(hits[0].out_path)[1])
+            assert (e["type"], e["src_offset"]) == ("png", 1000)
+            assert r.read(e["name"]) == PNG_BYTES
+
+        hits[0].raw_data, hits[0].preview_only = PNG_BYTES[:16], True
+        summary = export_hits(src, hits, os.path.join(tmp, 'exp'),
+                              container=os.path.join(tmp, 'exp.pack'))
+        assert summary.written == 1 and not os.path.exists(os.path.join(tmp, 'exp'))
+        with PackReader(os.path.join(tmp, 'exp.pack')) as r:
+            assert r.read(split_ref(summary.paths[0])[1]) == PNG_BYTES
+
+def test_failed_range_copy_does_not_shift_later_entries():
+    class Failing:
+        def read_at(self, off, size):
+            if off >= 1 << 20:
+                raise OSError(5, "I/O error")
+            return b"A" * size
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pack = os.path.join(tmp, 'x.pack')
+        with PackWriter(pack) as w:
+            with pytest.raises(OSError):
+                w.add_range("bad", Failing(), 0, 2 << 20)
+            w.add("good", b"hello world")
+        with PackReader(pack) as r:
+            assert [e["name"] for e in r] == ["good"]
+            assert r.read("good") == b"hello world"
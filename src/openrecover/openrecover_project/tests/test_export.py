@@ -0,0 +1,39 @@
+import os
+import tempfile
+from openrecover.carver import CarveResult
+from openrecover.container import PackWriter
+from openrecover.export import export_hits
+from openrecover.signatures import JPEG, PNG
+
+def test_export_hits_writes_all_and_summarizes():
+    src_data = bytes(range(256)) * 64
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'img.bin')
+        with open(src, 'wb') as f:
+            f.write(src_data)
+        hits = [CarveResult(PNG, 9000, 9100, "", True, "", b""),        # read from the source
+                CarveResult(JPEG, 100, 104, "", True, "", b"\xff\xd8ok")]
+        seen = []
+        s = export_hits(src, hits, os.path.join(tmp, 'out'), workers=2,
+                        progress_cb=lambda d, t: seen.append((d, t)))
+        assert (s.total, s.written, s.failed, s.cancelled) == (2, 2, [], False)
+        assert open(s.paths[0], 'rb').read() == src_data[9000:9100]
+        assert open(s.paths[1], 'rb').read() == b"\xff\xd8ok"
+        assert sorted(seen)[-1] == (2, 2)
+
+def test_export_hits_cancel():
+    hits = [CarveResult(JPEG, i, i + 1, "", True, "", b"x") for i in range(10)]
+    with tempfile.TemporaryDirectory() as tmp:
+        s = export_hits("", hits, tmp, stop_flag=lambda: True)
+        assert s.cancelled and s.written == 0
+
+class _BrokenPack(PackWriter):
+    def add(self, name, data, **meta):
+        raise RuntimeError("codec failure")   # not an OSError
+
+def test_export_failures_release_their_inflight_bytes():
+    hits = [CarveResult(JPEG, i, i + 3, "", True, "", b"abc") for i in range(3)]
+    with tempfile.TemporaryDirectory() as tmp:
+        with _BrokenPack(os.path.join(tmp, 'x.pack')) as pack:
+            s = export_hits("", hits, tmp, workers=1, max_inflight_bytes=4, container=pack)
+        assert s.written == 0 and [i for i, _ in s.failed] == [0, 1, 2]
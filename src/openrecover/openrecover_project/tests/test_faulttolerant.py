@@ -0,0 +1,82 @@
+import os
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.rawio import FaultTolerantReader, SkipMap
+from openrecover.signatures import PNG
+from fixtures import PNG_BYTES
+
+class FlakyDisk:
+    def __init__(self, data: bytes, bad):
+        self.data = data
+        self.bad = bad      # list of [start, end)
+        self.calls = 0
+
+    def read_at(self, off: int, size: int) -> bytes:
+        self.calls += 1
+        for s, e in self.bad:
+            if off < e and s < off + size:
+                raise OSError(5, "I/O error")
+        return self.data[off:off + size]
+
+def test_bisection_isolates_bad_sectors_and_skip_map_is_reused():
+    data = bytes(range(256)) * 4096          # 1 MiB
+    disk = FlakyDisk(data, [(5000, 5100), (700_000, 700_001)])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'skip.json')
+        r = FaultTolerantReader(disk.read_at, sector=512, skip_map=SkipMap(path))
+        out = r.read_at(0, len(data))
+        assert len(out) == len(data)
+        assert r.skip_map.ranges == [[4608, 5120], [699904, 700416]]
+        expected = bytearray(data)
+        expected[4608:5120] = bytes(512)
+        expected[699904:700416] = bytes(512)
+        assert out == bytes(expected)
+        r.skip_map.save()
+        # a later scan skips the known bad sectors without touching them
+        disk.calls = 0
+        r2 = FaultTolerantReader(disk.read_at, sector=512, skip_map=SkipMap(path))
+        assert r2.read_at(0, len(data)) == bytes(expected)
+        assert r2.failed_reads == 0 and disk.calls == 3
+
+def test_large_bad_area_is_skipped_whole():
+    data = bytes(range(256)) * (4 << 12)   # 4 MiB
+    disk = FlakyDisk(data, [(1 << 20, 3 << 20)])
+    r = FaultTolerantReader(disk.read_at, sector=512, max_bad_sectors=8)
+    out = r.read_at(0, 4 << 20)
+    assert len(out) == 4 << 20 and out[:1 << 20] == data[:1 << 20]
+    assert disk.calls < 200
+    # only the isolated sectors are known bad; the coarse skip is for this reader only
+    assert r.skip_map.bad_bytes == 8 * 512
+    assert all(1 << 20 <= s and e <= 3 << 20 for s, e in r.skip_map.ranges)
+    assert r.provisional.bad_bytes >= (2 << 20) - 8 * 512
+    r2 = FaultTolerantReader(disk.read_at, sector=512, skip_map=r.skip_map, max_bad_sectors=1 << 20)
+    assert r2.read_at(0, 4 << 20)[3 << 20:] == data[3 << 20:]
+    assert r2.skip_map.ranges == [[1 << 20, 3 << 20]]
+
+def test_scattered_bad_sectors_do_not_condemn_good_ones():
+    data = bytes(range(256)) * (4 << 12)
+    bad = [(k * 31 * 1024 + 7, k * 31 * 1024 + 8) for k in range(128)]
+    disk = FlakyDisk(data, bad)
+    r = FaultTolerantReader(disk.read_at, sector=512, max_bad_sectors=8)
+    r.read_at(0, 4 << 20)
+    assert r.skip_map.bad_bytes == 8 * 512
+
+def test_carver_reads_past_bad_sectors():
+    blob = bytearray(1 << 20)
+    blob[600_000:600_000 + len(PNG_BYTES)] = PNG_BYTES
+
+    class Carver(FileCarver):
+        def _read_source(self, off, size):
+            if off < 100_000 and 90_000 < off + size:
+                raise OSError(5, "I/O error")
+            return super()._read_source(off, size)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'img.bin')
+        with open(src, 'wb') as f:
+            f.write(blob)
+        c = Carver(src, tmp, [PNG], chunk=256 * 1024, overlap=512, min_size=0, write_output=False)
+        hits = list(c.scan())
+        c.close()
+        assert [h.start for h in hits] == [600_000]
+        assert c.stats["bad_bytes"] == 10752 and c.stats["skip_map"] == [[89600, 100352]]
@@ -0,0 +1,79 @@
+import os
+import time
+import tempfile
+from openrecover.fstree import FSTree
+from ntfs_image import NTFSImage, index_entry
+
+def _odd_name(entry: bytes) -> bytes:
+    e = bytearray(entry)
+    e[16 + 66:16 + 68] = b"\x00\xd8"  # lone surrogate: legal in NTFS (UCS-2) names
+    return bytes(e)
+
+def _image(path):
+    img = NTFSImage(clusters=64, mft_records=64)
+    img.add_dir(5, ".", [
+        index_entry(5, ".", seq=5, is_dir=True),
+        index_entry(20, "Docs", is_dir=True),
+        index_entry(21, "readme.txt", size=5),
+        index_entry(21, "README~1.TXT", size=5, namespace=2),
+        _odd_name(index_entry(25, "xy", size=1)),
+    ], seq=5)
+    img.add_dir(20, "Docs", [index_entry(22, "a.txt", parent=20, parent_seq=1, size=3)],
+                in_block=True)
+    img.add(21, "readme.txt", data=b"hello")
+    img.add(22, "a.txt", data=b"abc", parent=20, parent_seq=1)
+    img.add(23, "gone.jpg", data=b"\xff\xd8\xff", parent=20, parent_seq=1, in_use=False)
+    img.add(24, "stale.bin", data=b"old", parent=20, parent_seq=9, in_use=False)  # earlier Docs
+    with open(path, "wb") as f:
+        f.write(img.build())
+
+def test_lists_directories_from_their_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vol.img")
+        _image(path)
+        with FSTree(path) as tree:
+            assert tree.root().is_dir
+            root = tree.children(5)
+            assert [(e.name, e.is_dir) for e in root] == [
+                ("Docs", True), ("readme.txt", False), ("\ufffdy", False)]
+            assert root[1].size == 5 and root[1].record == 21
+            assert tree.records_read == 1  # only the root record was parsed
+            assert tree.wait_prefetch(5)
+            assert tree.prefetched(20)
+            docs = tree.children(20)
+            assert [e.name for e in docs] == ["a.txt"]
+            assert tree.record(22).file_name == "a.txt"
+
+def test_deleted_scan_merges_into_listings():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vol.img")
+        _image(path)
+        with FSTree(path, prefetch=False) as tree:
+            tree.scan_deleted(batch=16).join()
+            assert tree.deleted_ready.is_set()
+            docs = tree.children(20)
+            assert [(e.name, e.deleted) for e in docs] == [("a.txt", False), ("gone.jpg", True)]
+            assert "stale.bin" not in [e.name for e in docs]
+            assert [e.name for e in tree.children(5)][:2] == ["Docs", "readme.txt"]
+
+def test_root_and_expansion_are_fast_on_a_large_mft():
+    n = 3000
+    img = NTFSImage(clusters=2048, mft_records=n + 64)
+    img.add_dir(5, ".", [index_entry(30 + i, f"dir{i}", is_dir=True) for i in range(20)],
+                in_block=True, seq=5)
+    img.add_dir(30, "dir0", [index_entry(64 + i, f"file{i:05d}.txt", parent=30, parent_seq=1,
+                                         size=i) for i in range(n)], in_block=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vol.img")
+        with open(path, "wb") as f:
+            f.write(img.build())
+        t0 = time.perf_counter()
+        with FSTree(path, prefetch=False) as tree:
+            assert len(tree.children(5)) == 20
+            t1 = time.perf_counter()
+            files = tree.children(30)
+            t2 = time.perf_counter()
+            assert len(files) == n and files[-1].name == f"file{n - 1:05d}.txt"
+            assert tree.records_read == 2
+        assert t1 - t0 < 0.1  # open the volume and list the root
+        assert t2 - t1 < 0.1  # expand a folder of 3000 files held in INDX blocks
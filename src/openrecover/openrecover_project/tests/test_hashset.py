@@ -0,0 +1,71 @@
+import os
+import hashlib
+import tempfile
+from ntfs_image import NTFSImage
+from fixtures import PNG_BYTES
+from openrecover.carver import FileCarver
+from openrecover.hashset import HashSet, build_hashset, read_digests
+from openrecover.parser import MFTParser
+from openrecover.recovery import FileRecovery
+from openrecover.signatures import PNG
+from openrecover.volume import NTFSVolume
+
+def test_build_merges_runs_and_looks_up():
+    known = [hashlib.md5(b'%d' % i).digest() for i in range(5000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'known.idx')
+        # small batches force spilled runs; duplicates and junk are dropped
+        n = build_hashset(known + known[:100] + [b'short'], path, "md5", batch=700)
+        assert n == 5000 and not [p for p in os.listdir(tmp) if p.endswith('.run')]
+        with HashSet(path) as hs:
+            assert len(hs) == 5000 and hs.algorithm == "md5"
+            assert all(d in hs for d in known)
+            assert known[7].hex() in hs and known[7].hex().upper() in hs
+            misses = sum(hashlib.md5(b'x%d' % i).digest() in hs for i in range(5000))
+            assert misses == 0
+
+def test_read_digests_nsrl_csv():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'NSRLFile.txt')
+        md5 = hashlib.md5(b'a').hexdigest().upper()
+        sha1 = hashlib.sha1(b'a').hexdigest().upper()
+        with open(path, 'w') as f:
+            f.write('"SHA-1","MD5","CRC32","FileName","FileSize"\n')
+            f.write(f'"{sha1}","{md5}","E8B7BE43","a.txt",1\n')
+        assert list(read_digests(path, "md5")) == [bytes.fromhex(md5)]
+        assert list(read_digests(path, "sha1")) == [bytes.fromhex(sha1)]
+
+def test_known_files_are_not_written():
+    other = PNG_BYTES[:30] + bytes([PNG_BYTES[30] ^ 1]) + PNG_BYTES[31:]  # not in the set
+    with tempfile.TemporaryDirectory() as tmp:
+        idx = os.path.join(tmp, 'known.idx')
+        build_hashset([hashlib.sha1(PNG_BYTES).digest(), hashlib.sha1(b'resident').digest()],
+                      idx, "sha1")
+        src = os.path.join(tmp, 'img.bin')
+        with open(src, 'wb') as f:
+            f.write(b'\0' * 1000 + PNG_BYTES + b'\0' * 3000 + other + b'\0' * 1000)
+        out = os.path.join(tmp, 'out')
+        c = FileCarver(src, out, [PNG], chunk=8192, overlap=256, min_size=0, known_hashes=idx)
+        hits = list(c.scan())
+        c.close()
+        assert [h.start for h in hits] == [1000 + len(PNG_BYTES) + 3000]
+        assert c.stats["known_skipped"] == 1
+        assert os.listdir(os.path.join(out, 'png')) == [os.path.basename(hits[0].out_path)]
+
+        img = NTFSImage(clusters=64)
+        runs = img.alloc(PNG_BYTES)
+        img.add(40, "stock.png", data_runs=runs, data_size=len(PNG_BYTES))
+        img.add(41, "r.txt", data=b'resident')
+        img.add(42, "mine.txt", data=b'mine')
+        vol_path = os.path.join(tmp, 'vol.img')
+        with open(vol_path, 'wb') as f:
+            f.write(img.build())
+        vol = NTFSVolume(vol_path)
+        recs = {n: MFTParser().parse(raw) for n, raw in vol.iter_records()}
+        vol.close()
+        rec = FileRecovery(vol_path, os.path.join(tmp, 'rec'), cluster_size=img.cluster_size,
+                           known_hashes=idx)
+        paths = rec.recover_batch([recs[40], recs[41], recs[42]])
+        rec.close()
+        assert paths[:2] == [None, None] and rec.known_skipped == 2
+        assert os.listdir(os.path.join(tmp, 'rec')) == ['mine.txt']
@@ -0,0 +1,61 @@
+import os
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.container import PackReader
+from openrecover.signatures import PNG
+from fixtures import PNG_BYTES
+
+BLOCK = 64 * 1024
+
+def _scan(src, out, manifest, **kw):
+    c = FileCarver(src, out, [PNG], chunk=BLOCK * 2, overlap=1024, min_size=0,
+                   deduplicate=False, block_manifest=manifest, block_size=BLOCK, **kw)
+    try:
+        return sorted(r.start for r in c.scan()), c.stats
+    finally:
+        c.close()
+
+def test_rescan_reuses_hits_of_unchanged_blocks():
+    png = PNG_BYTES
+    img = bytearray(16 * BLOCK)
+    for b in (1, 5, 9, 13):
+        img[b * BLOCK + 100:b * BLOCK + 100 + len(png)] = png
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'disk.img')
+        manifest = os.path.join(tmp, 'blocks.json')
+        out = os.path.join(tmp, 'out')
+        with open(src, 'wb') as f:
+            f.write(img)
+        first, stats1 = _scan(src, out, manifest)
+        assert stats1['rescanned_bytes'] == len(img)
+        assert os.path.isfile(manifest)
+
+        # new file in block 9, block 13's file overwritten
+        img[9 * BLOCK + 5000:9 * BLOCK + 5000 + len(png)] = png
+        img[13 * BLOCK + 100:13 * BLOCK + 200] = b'\x00' * 100
+        with open(src, 'wb') as f:
+            f.write(img)
+        second, stats2 = _scan(src, out, manifest)
+        assert second == [BLOCK + 100, 5 * BLOCK + 100, 9 * BLOCK + 100, 9 * BLOCK + 5000]
+        assert stats2['reused_hits'] == 2
+        assert stats2['rescanned_bytes'] == 6 * BLOCK  # blocks 8-10 and 12-14
+
+        third, stats3 = _scan(src, out, manifest)
+        assert third == second
+        assert stats3['rescanned_bytes'] == 0
+        assert stats3['reused_hits'] == 4
+
+def test_reused_hits_are_not_appended_to_the_pack_again():
+    img = bytearray(4 * BLOCK)
+    img[BLOCK + 100:BLOCK + 100 + len(PNG_BYTES)] = PNG_BYTES
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'disk.img')
+        with open(src, 'wb') as f:
+            f.write(img)
+        manifest, pack = os.path.join(tmp, 'blocks.json'), os.path.join(tmp, 'out', 'carved.pack')
+        for _ in range(2):
+            starts, stats = _scan(src, os.path.join(tmp, 'out'), manifest, container=pack)
+            assert starts == [BLOCK + 100]
+        assert stats['reused_hits'] == 1
+        with PackReader(pack) as r:
+            assert len(r) == 1 and r.read(0) == PNG_BYTES
@@ -0,0 +1,64 @@
+import os
+import random
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.intervals import IntervalIndex
+from openrecover.signatures import PNG
+from ntfs_image import NTFSImage, FILETIME_2024
+from fixtures import PNG_BYTES
+
+def test_overlap_queries_match_brute_force():
+    rnd = random.Random(7)
+    spans = []
+    idx = IntervalIndex()
+    for v in range(2000):
+        s = rnd.randrange(1_000_000)
+        e = s + rnd.randrange(1, 5000 if v % 50 else 200_000)  # a few long, stale runs
+        spans.append((s, e, v))
+        idx.add(s, e, v)
+    idx.freeze()
+    for _ in range(300):
+        qs = rnd.randrange(1_000_000)
+        qe = qs + rnd.randrange(1, 3000)
+        want = sorted(v for s, e, v in spans if s < qe and e > qs)
+        assert sorted(v for _, _, v in idx.overlapping(qs, qe)) == want
+
+def _variant(k: int) -> bytes:  # same PNG, different digest
+    return PNG_BYTES[:30] + bytes([PNG_BYTES[30] ^ k]) + PNG_BYTES[31:]
+
+def _volume(tmp):
+    img = NTFSImage(clusters=128)
+    cs = img.cluster_size
+    img.add(30, "Photos", is_dir=True, in_use=False, parent_seq=1)
+    whole = img.alloc(PNG_BYTES)
+    img.add(40, "beach.png", data_runs=whole, data_size=len(PNG_BYTES), parent=30, parent_seq=1,
+            in_use=False, times=(FILETIME_2024 + 1,) * 4)
+    # a second PNG inside a larger file, one cluster in
+    other = _variant(1)
+    inner = img.alloc(b'\0' * cs + other)
+    img.add(41, "album.bin", data_runs=inner, data_size=cs + len(other), in_use=False)
+    free = img.alloc(_variant(2), used=False)  # owned by nothing
+    src = os.path.join(tmp, "vol.img")
+    with open(src, "wb") as f:
+        f.write(img.build())
+    return src, whole[0][0] * cs, inner[0][0] * cs + cs, free[0][0] * cs
+
+def test_carver_annotates_hits_with_their_mft_record():
+    with tempfile.TemporaryDirectory() as tmp:
+        src, at_whole, at_inner, at_free = _volume(tmp)
+        c = FileCarver(src, os.path.join(tmp, "out"), [PNG], min_size=16, mft_index=True)
+        hits = {h.start: h for h in c.scan()}
+        c.close()
+        assert sorted(hits) == [at_whole, at_inner, at_free]
+        o = hits[at_whole].origin
+        assert (o.record, o.path, o.modified, o.deleted) == (40, "Photos/beach.png", FILETIME_2024 + 1, True)
+        assert o.file_offset == 0 and o.duplicate
+        o = hits[at_inner].origin
+        assert o.record == 41 and o.file_offset == 4096 and not o.duplicate
+        assert hits[at_free].origin is None
+        assert c.stats["mft_duplicates"] == 1
+
+        c = FileCarver(src, os.path.join(tmp, "out2"), [PNG], min_size=16, mft_index=True,
+                       skip_mft_duplicates=True)
+        assert sorted(h.start for h in c.scan()) == [at_inner, at_free]
+        c.close()
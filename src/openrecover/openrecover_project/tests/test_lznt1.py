@@ -0,0 +1,76 @@
+import os
+import random
+import tempfile
+from ntfs_image import NTFSImage
+from openrecover.lznt1 import compress, decompress
+from openrecover.parser import MFTParser
+from openrecover.recovery import FileRecovery
+from openrecover.volume import NTFSVolume
+
+def _text(n: int, seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    words = [bytes(rnd.choice(b'etaoinshr') for _ in range(rnd.randint(2, 8))) for _ in range(200)]
+    return b' '.join(rnd.choice(words) for _ in range(n))[:n]
+
+# the LZNT1 example of [MS-XCA] (Microsoft's compression spec): one compressed chunk
+# as RtlCompressBuffer produces it, holding a NUL-terminated string
+MS_XCA_PACKED = bytes.fromhex(
+    "38b08846232000204720410010a24701a045204400084501507900c04520"
+    "0524138805b4024a44ef0358028c091601484500be009e000401189000")
+MS_XCA_PLAIN = (b"F# F# G A A G F# E D D E F# F# E E F# F# G A A G F# E D D E F# E D D "
+                b"E E F# D E F# G F# D E F# G F# E D E A "
+                b"F# F# G A A G F# E D D E F# E D D\0")
+
+def test_reference_vector():
+    assert decompress(MS_XCA_PACKED) == MS_XCA_PLAIN
+    assert decompress(MS_XCA_PACKED + b"\0\0", 4096) == MS_XCA_PLAIN.ljust(4096, b"\0")
+    img = NTFSImage(clusters=1024, cluster_size=512)
+    (lcn, n), = img.alloc(MS_XCA_PACKED)
+    img.add(40, "ode.txt", data_runs=[(lcn, n), (None, 16 - n)], data_size=len(MS_XCA_PLAIN),
+            data_flags=0x0001, compression_unit=4)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'vol.img')
+        with open(src, 'wb') as f:
+            f.write(img.build())
+        vol = NTFSVolume(src)
+        rec = {k: MFTParser().parse(raw) for k, raw in vol.iter_records()}[40]
+        vol.close()
+        (path,) = FileRecovery(src, os.path.join(tmp, 'out'), cluster_size=512).recover_batch([rec])
+        assert open(path, 'rb').read() == MS_XCA_PLAIN
+
+def test_roundtrip_and_damaged_input():
+    for data in (_text(20000), os.urandom(9000), b'x' * 10000, b'ab' * 3000 + b'tail'):
+        assert decompress(compress(data)) == data
+    c = bytearray(compress(_text(8192)))
+    c[40:60] = b'\xff' * 20           # garbage back-references: no exception, size kept
+    assert len(decompress(bytes(c), 8192)) == 8192
+
+def test_recover_batch_decompresses_ntfs_compressed_file():
+    cs, unit_clusters = 512, 16
+    unit = cs * unit_clusters
+    plain = _text(unit, 1) + os.urandom(unit) + bytes(unit) + _text(3000, 2)
+    img = NTFSImage(clusters=1024, cluster_size=cs)
+    runs = []
+    for k in range(0, len(plain), unit):
+        part = plain[k:k + unit]
+        if not part.strip(b'\0'):
+            runs.append((None, unit_clusters))                   # sparse unit
+            continue
+        packed = compress(part)
+        if len(packed) + cs <= unit:
+            (lcn, n), = img.alloc(packed)
+            runs += [(lcn, n), (None, unit_clusters - n)]        # compressed unit
+        else:
+            runs += img.alloc(part.ljust(unit, b'\0'))           # stored raw
+    img.add(40, "doc.txt", data_runs=runs, data_size=len(plain), data_flags=0x0001,
+            compression_unit=4)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'vol.img')
+        with open(src, 'wb') as f:
+            f.write(img.build())
+        vol = NTFSVolume(src)
+        rec = {n: MFTParser().parse(raw) for n, raw in vol.iter_records()}[40]
+        vol.close()
+        assert rec.compression_unit == 4 and rec.data_flags & 1
+        (path,) = FileRecovery(src, os.path.join(tmp, 'out'), cluster_size=cs).recover_batch([rec])
+        assert open(path, 'rb').read() == plain
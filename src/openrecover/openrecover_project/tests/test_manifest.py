@@ -0,0 +1,79 @@
+import os
+import hashlib
+import tempfile
+from ntfs_image import NTFSImage
+from openrecover.carver import FileCarver
+from openrecover.manifest import Hasher, StreamHash, load_manifest
+from openrecover.parser import MFTParser
+from openrecover.recovery import FileRecovery
+from openrecover.signatures import PNG
+from openrecover.volume import NTFSVolume
+from fixtures import PNG_BYTES
+
+def _digests(data: bytes) -> dict:
+    return {n: hashlib.new(n, data).hexdigest() for n in ("sha256", "md5", "sha1")}
+
+def test_carver_hashes_once_and_writes_manifest():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'img.bin')
+        with open(src, 'wb') as f:
+            f.write(b'\0' * 1000 + PNG_BYTES + b'\0' * 3000 + PNG_BYTES + b'\0' * 1000)
+        man = os.path.join(tmp, 'hashes.jsonl')
+        c = FileCarver(src, os.path.join(tmp, 'out'), [PNG], chunk=8192, overlap=256,
+                       min_size=0, digests=("sha256", "md5", "sha1"), hash_manifest=man)
+        hits = list(c.scan())
+        c.close()
+        assert len(hits) == 1  # the second copy is a duplicate
+        entries = load_manifest(man)
+        assert len(entries) == 1
+        e = entries[0]
+        written = open(hits[0].out_path, 'rb').read()
+        assert e["hashes"] == hits[0].hashes == _digests(written)
+        assert (e["offset"], e["length"], e["type"], e["path"]) == (1000, len(written), "png", hits[0].out_path)
+
+def test_stream_hash_out_of_order_with_holes():
+    data = b'a' * 10 + b'\0' * 5 + b'b' * 7 + b'\0' * 3
+    sh = StreamHash(Hasher(["sha256"]), len(data), holes=[(10, 5)])
+    assert not sh.feed(15, b'b' * 7)
+    assert not sh.feed(0, b'a' * 10)
+    sh.finish()
+    assert sh.done and sh.hasher.hexdigests() == {"sha256": hashlib.sha256(data).hexdigest()}
+
+def test_stream_hash_rereads_the_file_past_its_buffer_cap():
+    data = os.urandom(100)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'f.bin')
+        with open(path, 'wb') as f:
+            f.write(data)
+        sh = StreamHash(Hasher(["sha256"]), len(data), path=path, max_pending=20)
+        assert not sh.feed(0, data[:10])
+        for off in (70, 40):   # 60 bytes ahead of the prefix: over the cap
+            assert not sh.feed(off, data[off:off + 30])
+        assert sh.reread and not sh.feed(10, data[10:40])
+        sh.finish()
+        assert sh.done and sh.hasher.hexdigests() == {"sha256": hashlib.sha256(data).hexdigest()}
+
+def test_batch_recovery_manifest_matches_output():
+    img = NTFSImage(clusters=64)
+    cs = img.cluster_size
+    body = os.urandom(3 * cs - 100)
+    runs = img.alloc(body[2 * cs:]) + img.alloc(body[:2 * cs])
+    img.add(40, "x.bin", data_runs=[runs[1], runs[0]], data_size=len(body))
+    img.add(41, "r.txt", data=b'resident')
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'vol.img')
+        with open(src, 'wb') as f:
+            f.write(img.build())
+        vol = NTFSVolume(src)
+        recs = {n: MFTParser().parse(raw) for n, raw in vol.iter_records()}
+        vol.close()
+        man = os.path.join(tmp, 'm.jsonl')
+        rec = FileRecovery(src, os.path.join(tmp, 'out'), cluster_size=cs,
+                           digests=("sha256", "md5"), hash_manifest=man)
+        paths = rec.recover_batch([recs[40], recs[41]])
+        rec.close()
+        by_record = {e["record"]: e for e in load_manifest(man)}
+        for n, p in zip((40, 41), paths):
+            data = open(p, 'rb').read()
+            assert by_record[n]["hashes"] == {k: v for k, v in _digests(data).items() if k != "sha1"}
+        assert open(paths[0], 'rb').read() == body
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+import pytest
+from openrecover.parser import MFTParser
+from openrecover.volume import NTFSVolume
+from ntfs_image import NTFSImage, FILETIME_2024
+
+np = pytest.importorskip("numpy")
+from openrecover.mfttable import MFTTable, to_filetime
+
+DAY = 864_000_000_000
+
+def _table(tmp):
+    img = NTFSImage(clusters=128, mft_records=64)
+    img.add(20, 'report.docx', data_runs=img.alloc(b'D' * 8192), data_size=2_000_000,
+            in_use=False, times=(FILETIME_2024 + 5 * DAY,) * 4)
+    img.add(21, 'old.docx', data_runs=img.alloc(b'D' * 4096), data_size=3_000_000,
+            in_use=False, times=(FILETIME_2024,) * 4)
+    img.add(22, 'small.docx', data=b'tiny', in_use=False, times=(FILETIME_2024 + 5 * DAY,) * 4)
+    img.add(23, 'live.docx', data_runs=img.alloc(b'D' * 4096), data_size=2_000_000,
+            times=(FILETIME_2024 + 5 * DAY,) * 4)
+    img.add(24, 'photo.JPG', data=b'x' * 100, in_use=False)
+    src = os.path.join(tmp, 'vol.img')
+    with open(src, 'wb') as f:
+        f.write(img.build())
+    vol = NTFSVolume(src)
+    parser = MFTParser(vol.record_size)
+    try:
+        return MFTTable.from_records(parser.parse(raw) for _, raw in vol.iter_records())
+    finally:
+        vol.close()
+
+def test_parser_reads_structured_records():
+    img = NTFSImage(clusters=64)
+    img.add(30, 'notes.txt', data=b'hello', parent=5, seq=7, in_use=False)
+    raw = img.records[30]
+    p = MFTParser(1024).parse(raw, offset=123456)
+    assert (p.record_number, p.file_name, p.sequence, p.size) == (30, 'notes.txt', 7, 5)
+    assert p.is_deleted and p.parent == 5 and p.resident_data == b'hello'
+    assert p.modified == FILETIME_2024
+
+def test_query_sort_and_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        t = _table(tmp)
+        after = datetime(2024, 1, 3, tzinfo=timezone.utc)
+        idx = t.query(deleted=True, ext='docx', min_size=1_000_000, modified_after=after)
+        assert [t.name(i) for i in idx] == ['report.docx']
+        assert [t.name(i) for i in t.query(ext=['jpg'])] == ['photo.JPG']
+        by_size = t.sort(t.query(ext='docx'), by='size', descending=True)
+        assert t.name(by_size[0]) == 'old.docx'
+        for path in (os.path.join(tmp, 't.npz'), os.path.join(tmp, 'tdir')):
+            t.save(path)
+            t2 = MFTTable.load(path)
+            assert len(t2) == len(t)
+            assert [t2.name(i) for i in t2.query(deleted=True, ext='docx')] == \
+                   [t.name(i) for i in t.query(deleted=True, ext='docx')]
+        assert to_filetime(datetime(2024, 1, 1, tzinfo=timezone.utc)) == FILETIME_2024
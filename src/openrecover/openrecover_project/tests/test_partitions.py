@@ -0,0 +1,105 @@
+import os
+import struct
+import tempfile
+import uuid
+import zlib
+from ntfs_image import NTFSImage
+from openrecover.carver import FileCarver
+from openrecover.partitions import GPT_BASIC_DATA, _read_gpt, read_partitions
+from openrecover.scanner import NTFSScanner
+from openrecover.signatures import PNG
+from fixtures import PNG_BYTES
+
+SS = 512
+
+def _mbr_entry(sector: bytearray, slot: int, ptype: int, lba: int, count: int):
+    struct.pack_into('<B', sector, 446 + 16 * slot + 4, ptype)
+    struct.pack_into('<II', sector, 446 + 16 * slot + 8, lba, count)
+    sector[510:512] = b'\x55\xaa'
+
+def _mbr_disk(vol: bytes) -> bytes:
+    """Primary NTFS at LBA 2048, extended at 8192 holding two logical partitions."""
+    disk = bytearray(64 * 1024 * 1024 // 16)  # 4 MiB
+    mbr = bytearray(512)
+    _mbr_entry(mbr, 0, 0x07, 2048, len(vol) // SS)
+    _mbr_entry(mbr, 1, 0x0F, 6144, 2048)
+    disk[:512] = mbr
+    disk[2048 * SS:2048 * SS + len(vol)] = vol
+    ebr1 = bytearray(512)
+    _mbr_entry(ebr1, 0, 0x83, 63, 500)
+    _mbr_entry(ebr1, 1, 0x05, 1024, 1000)     # next EBR, relative to the extended start
+    ebr2 = bytearray(512)
+    _mbr_entry(ebr2, 0, 0x0B, 63, 900)
+    disk[6144 * SS:6145 * SS] = ebr1
+    disk[7168 * SS:7169 * SS] = ebr2
+    return bytes(disk)
+
+def test_mbr_with_logical_partitions_and_ntfs_probe():
+    vol = NTFSImage(clusters=128, cluster_size=4096).build()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'disk.img')
+        with open(path, 'wb') as f:
+            f.write(_mbr_disk(vol))
+        parts = read_partitions(path)
+        assert [(p.index, p.type, p.offset, p.size) for p in parts] == [
+            (0, "0x07", 2048 * SS, len(vol)),
+            (1, "0x83", (6144 + 63) * SS, 500 * SS),
+            (2, "0x0b", (7168 + 63) * SS, 900 * SS),
+        ]
+        assert (parts[0].fs, parts[0].cluster_size, parts[0].mft_offset) == ("ntfs", 4096, 2048 * SS + 4 * 4096)
+        assert parts[1].fs == ""
+        scanner = NTFSScanner(record_size=64)
+        recs = list(scanner.scan_volume(path, partition=0))
+        assert (scanner.record_size, scanner.stats["record_size"]) == (64, 1024)
+        assert all(len(r.raw) == 1024 for r in recs)
+        assert recs and all(parts[0].offset <= r.offset < parts[0].end for r in recs)
+
+def _gpt_header(entries_lba, count, esize):
+    hdr = bytearray(92)
+    hdr[:8] = b'EFI PART'
+    struct.pack_into('<I', hdr, 0x0C, 92)
+    struct.pack_into('<Q', hdr, 0x48, entries_lba)
+    struct.pack_into('<II', hdr, 0x50, count, esize)
+    struct.pack_into('<I', hdr, 0x10, zlib.crc32(hdr))
+    return hdr
+
+def test_damaged_or_hostile_gpt_header_is_rejected():
+    reads = []
+
+    def read_at(off, size):
+        reads.append(size)
+        return bytes(disk[off:off + size])
+
+    disk = bytearray(64 * 1024)
+    disk[SS:SS + 92] = _gpt_header(2, 4, 0xFFFFFF80)        # valid CRC, absurd entry size
+    assert _read_gpt(read_at, SS) is None and max(reads) <= SS
+    hdr = _gpt_header(2, 4, 128)
+    hdr[0x50] ^= 1                                          # count damaged after the CRC
+    disk[SS:SS + 92] = hdr
+    assert _read_gpt(read_at, SS) is None
+
+def test_gpt_and_partition_scoped_carving():
+    disk = bytearray(2 * 1024 * 1024)
+    mbr = bytearray(512)
+    _mbr_entry(mbr, 0, 0xEE, 1, len(disk) // SS - 1)
+    disk[:512] = mbr
+    disk[SS:SS + 92] = _gpt_header(2, 128, 128)
+    entry = bytearray(128)
+    entry[:16] = uuid.UUID(GPT_BASIC_DATA).bytes_le
+    struct.pack_into('<QQ', entry, 32, 2048, 3071)
+    entry[56:56 + 8] = "data".encode('utf-16-le')
+    disk[2 * SS:2 * SS + 128] = entry
+    disk[100 * SS:100 * SS + len(PNG_BYTES)] = PNG_BYTES          # outside any partition
+    disk[2100 * SS:2100 * SS + len(PNG_BYTES)] = PNG_BYTES[:-1] + b'\x83'  # inside, distinct
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'gpt.img')
+        with open(path, 'wb') as f:
+            f.write(disk)
+        (p,) = read_partitions(path)
+        assert (p.scheme, p.type, p.name, p.offset, p.size) == ("gpt", GPT_BASIC_DATA, "data", 2048 * SS, 1024 * SS)
+        c = FileCarver(path, os.path.join(tmp, 'out'), [PNG], chunk=65536, overlap=256,
+                       min_size=0, partition=0, write_output=False)
+        hits = list(c.scan())
+        c.close()
+        assert [h.start for h in hits] == [2100 * SS]
+        assert c.stats["bytes_read"] <= p.size + 65536
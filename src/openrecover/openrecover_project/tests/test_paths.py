@@ -0,0 +1,62 @@
+import os
+import time
+import tempfile
+from openrecover.parser import ParsedRecord
+from openrecover.paths import PathResolver
+from openrecover.recovery import FileRecovery
+
+def _rec(n, name, parent, is_dir=False, seq=1, parent_seq=0, deleted=False):
+    return ParsedRecord(record_number=n, file_name=name, size=0, is_deleted=deleted, raw=b'FILE',
+                        sequence=seq, is_dir=is_dir, parent=parent, parent_seq=parent_seq)
+
+def _records():
+    return [
+        _rec(5, '.', 5, is_dir=True, seq=5),
+        _rec(30, 'Users', 5, is_dir=True, parent_seq=5),
+        _rec(31, 'alice', 30, is_dir=True, parent_seq=1),
+        _rec(40, 'cv.docx', 31, parent_seq=1, deleted=True),
+        _rec(41, 'stale.txt', 31, parent_seq=9),       # parent was reused since
+        _rec(50, 'a', 51, is_dir=True),                 # cycle a <-> b
+        _rec(51, 'b', 50, is_dir=True),
+        _rec(52, 'in_cycle.txt', 50),
+        _rec(60, 'lost.bin', 999),
+        _rec(32, 'gone', 5, is_dir=True, seq=3, deleted=True),
+        _rec(42, 'kept.txt', 32, parent_seq=2, deleted=True),  # parent deleted afterwards
+    ]
+
+def test_damaged_record_numbers_are_ignored():
+    r = PathResolver(_records()[:3], limit=1000)
+    assert not r.add(_rec(0xFFFFFFFF, 'bad', 5)) and not r.add(_rec(33, 'moved', 5), number=34)
+    assert r.add(_rec(34, 'ok', 31, parent_seq=1), number=34)
+    assert not PathResolver().add(_rec(0xFFFFFFFF, 'bad', 5))   # no limit: still no 4G-slot growth
+    assert r.path(34) == 'Users/alice/ok' and 33 not in r
+
+def test_resolves_paths_orphans_and_cycles():
+    r = PathResolver(_records())
+    assert r.path(40) == 'Users/alice/cv.docx'
+    assert r.path(41) == '$Orphan/stale.txt'
+    assert r.path(60) == '$Orphan/lost.bin'
+    assert r.path(42) == 'gone/kept.txt'
+    assert r.path(52).startswith('$Orphan/') and r.path(52).endswith('in_cycle.txt')
+    assert dict(r.resolve_all())[31] == 'Users/alice'
+
+def test_recovery_writes_original_tree():
+    recs = _records()
+    with tempfile.TemporaryDirectory() as tmp:
+        rec = FileRecovery(os.path.join(tmp, 'img'), os.path.join(tmp, 'out'), resolver=PathResolver(recs))
+        out = rec.recover(recs[3])
+        assert out == os.path.join(tmp, 'out', 'Users', 'alice', 'cv.docx')
+        assert os.path.isfile(out)
+
+def test_resolution_scales_linearly():
+    recs = [_rec(5, '.', 5, is_dir=True, seq=5)]
+    n = 16
+    for d in range(n, 2000 + n):  # 2000 directories, each nested in the previous
+        recs.append(_rec(d, f'd{d}', d - 1 if d > n else 5, is_dir=True))
+    for f in range(3000, 203000):
+        recs.append(_rec(f, f'f{f}.txt', n + f % 2000))
+    r = PathResolver(recs)
+    t0 = time.perf_counter()
+    paths = dict(r.resolve_all())
+    assert time.perf_counter() - t0 < 10
+    assert paths[3001].count('/') == 1002  # 1002 nested directories above it
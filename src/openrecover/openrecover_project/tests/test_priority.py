@@ -0,0 +1,66 @@
+import os
+import random
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.priority import plan_priority
+from openrecover.signatures import PNG
+from ntfs_image import NTFSImage
+from fixtures import PNG_BYTES
+
+def _variant(k: int) -> bytes:  # same PNG, different digest
+    return PNG_BYTES[:30] + bytes([PNG_BYTES[30] ^ k]) + PNG_BYTES[31:]
+
+def test_plan_covers_the_window_once_in_tier_order():
+    window = [(0, 100), (200, 300)]
+    plan = plan_priority(window, deleted=[(250, 260)], free=[(50, 220)], dense=[(0, 60), (280, 400)])
+    assert plan == [
+        ("deleted", [(250, 260)]),
+        ("free-dense", [(50, 60)]),
+        ("free", [(60, 100), (200, 220)]),
+        ("dense", [(0, 50), (280, 300)]),
+        ("rest", [(220, 250), (260, 280)]),
+    ]
+
+def _scan(src, out, **kw):
+    seen = []
+    c = FileCarver(src, out, [PNG], min_size=16, chunk=65536, overlap=4096,
+                   progress_cb=lambda cur, total: seen.append((cur, total)), **kw)
+    try:
+        return [r.start for r in c.scan()], c, seen
+    finally:
+        c.close()
+
+def test_deleted_files_and_free_space_are_carved_first():
+    img = NTFSImage(clusters=256)
+    cs = img.cluster_size
+    img.add(40, "live.png", data_runs=img.alloc(_variant(1), lcn=40), data_size=len(PNG_BYTES))
+    img.alloc(_variant(2), lcn=120, used=False)     # free space, no record
+    img.add(41, "gone.png", data_runs=img.alloc(_variant(3), lcn=220, used=False),
+            data_size=len(PNG_BYTES), in_use=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "vol.img")
+        with open(src, "wb") as f:
+            f.write(img.build())
+        linear, _, _ = _scan(src, os.path.join(tmp, "a"))
+        assert linear == [40 * cs, 120 * cs, 220 * cs]
+        hits, c, seen = _scan(src, os.path.join(tmp, "b"), priority=True)
+        assert hits == [220 * cs, 120 * cs, 40 * cs]
+        assert c.stats["priority"]["deleted"] == cs
+        assert sum(c.stats["priority"].values()) == c.scan_total == len(img.data)
+        done = [cur for cur, _ in seen]
+        assert done == sorted(done) and seen[-1] == (c.scan_total, c.scan_total)
+
+def test_sampled_dense_blocks_come_first_without_ntfs():
+    rnd = random.Random(9)
+    B = 65536
+    data = bytearray(16 * B)
+    data[B:B + len(PNG_BYTES)] = _variant(1)
+    data[12 * B:13 * B] = bytes(rnd.getrandbits(8) for _ in range(B))
+    data[12 * B + 512:12 * B + 512 + len(PNG_BYTES)] = _variant(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "disk.img")
+        with open(src, "wb") as f:
+            f.write(data)
+        hits, c, _ = _scan(src, os.path.join(tmp, "out"), priority=True)
+        assert hits == [12 * B + 512, B]
+        assert c.stats["priority"]["dense"] == B
@@ -0,0 +1,102 @@
+import os
+import json
+import pytest
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from openrecover.service import JobScheduler, make_server
+
+def _image(tmp: str, name: str, size: int = 256 * 1024) -> str:
+    p = os.path.join(tmp, name)
+    with open(p, 'wb') as f:
+        f.write(os.urandom(size))
+    return p
+
+def test_same_device_jobs_are_serialized():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = _image(tmp, 'a.img'), _image(tmp, 'b.img')
+        sched = JobScheduler(max_jobs=4, per_device=1)
+        j1 = sched.submit('image', {'source': a, 'out': os.path.join(tmp, 'a.copy')})
+        j2 = sched.submit('image', {'source': b, 'out': os.path.join(tmp, 'b.copy')})
+        assert j1.device == j2.device
+        sched.wait(j1.job_id, 10)
+        sched.wait(j2.job_id, 10)
+        assert j1.state == j2.state == 'done'
+        started2 = next(e['ts'] for e in j2.events if e.get('state') == 'running')
+        finished1 = next(e['ts'] for e in j1.events if e.get('state') == 'done')
+        assert started2 >= finished1
+        with open(a, 'rb') as f1, open(os.path.join(tmp, 'a.copy'), 'rb') as f2:
+            assert f1.read() == f2.read()
+
+def _call(url, method='GET', body=None, headers=None, token=''):
+    h = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json', **(headers or {})}
+    req = urllib.request.Request(url, method=method, headers=h,
+                                 data=None if body is None else json.dumps(body).encode())
+    try:
+        with urllib.request.urlopen(req, timeout=10) as r:
+            return r.status, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def test_http_submit_and_stream_events():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp, 'src.img')
+        sched = JobScheduler(max_jobs=2)
+        srv = make_server(sched, port=0)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{srv.server_address[1]}"
+        try:
+            status, body = _call(base + '/jobs', 'POST', token=srv.token, body={
+                'kind': 'carve', 'params': {'source': src, 'out': os.path.join(tmp, 'out')}})
+            assert status == 201
+            job = json.loads(body)
+            status, body = _call(f"{base}/jobs/{job['id']}/events", token=srv.token)
+            events = [json.loads(line) for line in body.splitlines()]
+            assert events[-1] == {**events[-1], 'type': 'status', 'state': 'done'}
+            assert [e['seq'] for e in events] == list(range(len(events)))
+        finally:
+            srv.shutdown()
+            srv.server_close()
+
+def test_http_rejects_foreign_requests():
+    sched = JobScheduler(max_jobs=1)
+    srv = make_server(sched, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    job = {'kind': 'image', 'params': {'source': '/nonexistent'}}
+    try:
+        assert _call(base + '/jobs')[0] == 401
+        assert _call(base + '/jobs', token='wrong')[0] == 401
+        assert _call(base + '/jobs', token=srv.token, headers={'Host': 'evil.example'})[0] == 403
+        assert _call(base + '/jobs', 'POST', job, token=srv.token,
+                     headers={'Content-Type': 'text/plain'})[0] == 415
+        assert _call(base + '/jobs', 'POST', {'kind': 'image', 'params': ['x']}, token=srv.token)[0] == 400
+        assert _call(base + '/jobs', 'POST', ['x'], token=srv.token)[0] == 400
+        assert _call(base + '/other/1', 'DELETE', token=srv.token)[0] == 404
+        status, body = _call(base + '/jobs', 'POST', job, token=srv.token)
+        assert _call(f"{base}/jobs/{json.loads(body)['id']}/events?since=abc", token=srv.token)[0] == 400
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+def test_events_are_capped_and_finished_jobs_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        sched = JobScheduler(max_jobs=1, max_events=4, keep_finished=1)
+        jobs = []
+        for i in range(2):
+            job = sched.submit('image', {'source': _image(tmp, f'{i}.img'), 'out': os.path.join(tmp, f'{i}.copy')})
+            sched.wait(job.job_id, 10)
+            jobs.append(job)
+        with sched._lock:
+            for n in range(10):
+                sched._event(jobs[1], {'type': 'note', 'n': n})
+        assert [j.job_id for j in sched.list()] == [jobs[1].job_id]
+        assert len(jobs[1].events) <= 5
+        seqs = [e['seq'] for e in sched.events(jobs[1].job_id, 0, timeout=0)]
+        assert seqs == list(range(jobs[1].event_count - len(seqs), jobs[1].event_count))
+        assert sched.events(jobs[0], 0, timeout=0)[-1]['state'] == 'done'   # evicted, still readable
+        assert sched.wait(jobs[0], 0) is jobs[0]
+        for call in (sched.wait, sched.events):
+            with pytest.raises(KeyError, match='unknown job'):
+                call(jobs[0].job_id, timeout=0)
@@ -0,0 +1,79 @@
+import os
+import hashlib
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.signatures import PNG
+from openrecover.shard import _take_over, claim_shard, plan_shards, run_shard, merge_shards, next_unclaimed, shard_path
+from fixtures import PNG_BYTES
+
+def _image(tmp: str) -> str:
+    png = PNG_BYTES
+    img = bytearray(64 * 1024)
+    for pos in (100, 16384 - 20, 40000):  # the middle one straddles a shard edge
+        img[pos:pos + len(png)] = png
+    img[50000:50000 + len(png)] = png[:-1] + b'\x83'
+    src = os.path.join(tmp, 'img.bin')
+    with open(src, 'wb') as f:
+        f.write(img)
+    return src
+
+def test_overlap_does_not_duplicate_hits():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp)
+        c = FileCarver(src, os.path.join(tmp, 'out'), [PNG], chunk=4096, overlap=1024,
+                       min_size=0, deduplicate=False, write_output=False)
+        starts = [r.start for r in c.scan()]
+        c.close()
+        assert sorted(starts) == [100, 16364, 40000, 50000]
+
+def test_shards_cover_straddling_files_and_merge():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp)
+        d = os.path.join(tmp, 'shards')
+        m = plan_shards(src, d, count=4, align=4096, types=['png'], min_size=0, dedup=False)
+        assert [s['end'] for s in m['shards']] == [16384, 32768, 49152, 65536]
+        while True:
+            sid = next_unclaimed(d)
+            if sid is None:
+                break
+            run_shard(d, sid, chunk=4096, overlap=512, max_inflight_bytes=64)  # streamed hits
+        merged = merge_shards(d)
+        # 16364 starts in shard 0 and is carved whole past its end
+        assert [h['start'] for h in merged] == [100, 16364, 40000, 50000]
+        assert [h['shard'] for h in merged] == [0, 0, 2, 3]
+        assert all(h['length'] == len(PNG_BYTES) for h in merged)
+        assert merged[0]['sha256'] == hashlib.sha256(PNG_BYTES).hexdigest()
+        assert os.path.isfile(os.path.join(d, 'merged.jsonl'))
+
+def test_stale_claims_expire_and_can_be_forced():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp)
+        d = os.path.join(tmp, 'shards')
+        plan_shards(src, d, count=2, align=4096, types=['png'], min_size=0, dedup=False)
+        assert claim_shard(d, 0) and not claim_shard(d, 0)
+        claim = os.path.join(shard_path(d, 0), 'claim')
+        os.utime(claim, (0, 0))   # the host that took it went quiet long ago
+        assert not claim_shard(d, 0) and next_unclaimed(d) == 1
+        assert next_unclaimed(d, stale_after=3600) == 0
+        assert not claim_shard(d, 0, stale_after=3600) and claim_shard(d, 0, force=True)
+        run_shard(d, 0, chunk=4096, overlap=512)
+        assert not claim_shard(d, 0, force=True)   # finished shards stay finished
+
+def test_takeover_acting_on_an_old_look_loses():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _image(tmp)
+        d = os.path.join(tmp, 'shards')
+        plan_shards(src, d, count=2, align=4096, types=['png'], min_size=0, dedup=False)
+        assert claim_shard(d, 0)
+        claim = os.path.join(shard_path(d, 0), 'claim')
+        os.utime(claim, (0, 0))
+        seen = os.stat(claim)                       # host B finds the claim stale...
+        assert claim_shard(d, 0, stale_after=3600)  # ...host A takes it over first...
+        assert not _take_over(shard_path(d, 0), seen, 3600, False)   # ...so B gives up
+        assert not _take_over(shard_path(d, 0), seen, 3600, True)
+        assert sorted(os.listdir(shard_path(d, 0))) == ['claim']
+        lock = os.path.join(shard_path(d, 0), 'claim.lock')
+        open(lock, 'w').close()
+        assert not claim_shard(d, 0, force=True)    # a takeover is in progress
+        os.utime(lock, (0, 0))                       # its host died mid-takeover
+        assert claim_shard(d, 0, force=True) and not os.path.exists(lock)
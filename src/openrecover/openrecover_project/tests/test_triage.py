@@ -0,0 +1,58 @@
+import os
+import random
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.signatures import PNG, FileSignature
+from openrecover.triage import (
+    CONSTANT, HIGH_ENTROPY, STRUCTURED, TEXT, TRIAGE_BLOCK, TriageMap, classify_blocks,
+)
+from fixtures import PNG_BYTES
+
+LOG = FileSignature(name="log", ext="log", header=b"LOG:", footer=b":END", text=True)
+B = TRIAGE_BLOCK
+
+def test_classifies_blocks_from_their_histograms():
+    rnd = random.Random(3)
+    noise = bytes(rnd.getrandbits(8) for _ in range(B))
+    text = (b"The quick brown fox jumps over the lazy dog.\r\n" * (B // 46 + 1))[:B]
+    structured = (bytes(range(16)) * 2 + b"\0" * 96) * (B // 128)
+    buf = b"\0" * B + noise + text + structured + b"\xff" * 100
+    assert classify_blocks(buf) == bytes([CONSTANT, HIGH_ENTROPY, TEXT, STRUCTURED, CONSTANT])
+
+def _image(path):
+    rnd = random.Random(5)
+    img = bytearray(10 * B)
+    img[B:2 * B] = bytes(rnd.getrandbits(8) for _ in range(B))
+    img[B + 1000:B + 1000 + len(PNG_BYTES)] = PNG_BYTES
+    img[B + 9000:B + 9013] = b"LOG:noise:END"       # a header by chance in compressed data
+    img[2 * B:3 * B] = (b"log line\n" * (B // 9 + 1))[:B]
+    img[2 * B + 900:2 * B + 915] = b"LOG:booted:END\n"
+    with open(path, "wb") as f:
+        f.write(img)
+
+def _scan(path, out, **kw):
+    c = FileCarver(path, out, [PNG, LOG], chunk=32768, overlap=1024, min_size=0, **kw)
+    try:
+        return sorted((r.sig.name, r.start) for r in c.scan()), c
+    finally:
+        c.close()
+
+def test_carver_prunes_constant_blocks_and_reuses_the_map():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "disk.img")
+        _image(src)
+        full, _ = _scan(src, os.path.join(tmp, "a"))
+        assert ("log", B + 9000) in full
+
+        tpath = os.path.join(tmp, "triage.map")
+        hits, c = _scan(src, os.path.join(tmp, "b"), triage=tpath)
+        assert hits == [("log", 2 * B + 900), ("png", B + 1000)]
+        assert c.stats["triage_text_skipped"] == 1
+        assert c.stats["triage"]["constant"] == 8
+        assert c.scan_total < 3 * B
+
+        tmap = TriageMap.load(tpath)
+        assert tmap is not None and tmap.at(B + 5) == HIGH_ENTROPY and tmap.at(2 * B) == TEXT
+        again, c = _scan(src, os.path.join(tmp, "c"), triage=tpath)
+        assert again == hits
+        assert c.stats["bytes_read"] < 3 * B  # the map was loaded, not rebuilt
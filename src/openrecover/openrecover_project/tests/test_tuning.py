@@ -0,0 +1,47 @@
+import os
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.signatures import ALL_SIGNATURES, PNG
+from openrecover.tuning import MIN_CHUNK, ChunkTuner, signature_window
+from fixtures import PNG_BYTES
+
+MB = 1024 * 1024
+
+def _drive(tuner, seconds_per_byte, rounds=40):
+    for _ in range(rounds):
+        n = tuner.chunk
+        tuner.record(n, seconds_per_byte(n) * n, 0.0)
+    return tuner.chunk
+
+def test_tuner_climbs_to_the_fastest_size_within_the_limit():
+    # per-call overhead dominates small reads; chunks past 16 MiB fall out of cache
+    cost = lambda n: 1e-9 + 0.004 / n + (5e-10 if n > 16 * MB else 0)
+    assert _drive(ChunkTuner(limit=64 * MB), cost) == 16 * MB
+    assert _drive(ChunkTuner(limit=8 * MB), cost) == 8 * MB
+    # small chunks win (e.g. a cache-starved network mount)
+    assert _drive(ChunkTuner(limit=64 * MB), lambda n: 1e-9 * (1 + n / MB)) == MIN_CHUNK
+
+def test_signature_window_covers_headers_and_validators():
+    w = signature_window(ALL_SIGNATURES)
+    assert w % 512 == 0
+    for sig in ALL_SIGNATURES:
+        assert w >= len(sig.header)
+        if sig.size_from_header_iso_bmff:
+            assert w >= sum(sig.size_from_header_iso_bmff)
+
+def test_auto_mode_finds_the_same_hits_and_reports_parameters():
+    blob = bytearray(3 * MB)
+    offsets = [5000, MB - 10, 2 * MB + 777]
+    for k, off in enumerate(offsets):
+        png = PNG_BYTES[:-1] + bytes([k])
+        blob[off:off + len(png)] = png
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'img.bin')
+        with open(src, 'wb') as f:
+            f.write(blob)
+        c = FileCarver(src, tmp, [PNG], chunk="auto", overlap="auto", min_size=0, write_output=False)
+        hits = list(c.scan())
+        c.close()
+        assert sorted(h.start for h in hits) == offsets
+        assert c.stats["overlap"] == signature_window([PNG])
+        assert c.stats["chunk"] >= MIN_CHUNK
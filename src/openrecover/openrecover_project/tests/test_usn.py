@@ -0,0 +1,95 @@
+import os
+import struct
+import tempfile
+from openrecover.recovery import FileRecovery
+from openrecover.scanner import NTFSScanner
+from openrecover.usn import USN_REASON_CLOSE, USN_REASON_FILE_CREATE, USN_REASON_FILE_DELETE
+from ntfs_image import FILETIME_2024, NTFSImage, index_entry, nonresident_attr, resident_attr, usn_record
+from fixtures import PNG_BYTES
+
+DELETE = USN_REASON_FILE_DELETE | USN_REASON_CLOSE
+SPARSE = 1000   # clusters of the journal's freed leading region
+
+def _journal(cs: int) -> bytes:
+    def page(*recs):
+        data = b"".join(recs)
+        return data + b"\0" * (cs - len(data))
+    return page(
+        usn_record(42, "photo.png", USN_REASON_FILE_CREATE, usn=100, parent=30, parent_seq=1),
+        usn_record(43, "old.txt", USN_REASON_FILE_CREATE, usn=110, parent=5, parent_seq=1),
+    ) + page(
+        usn_record(42, "photo.png", DELETE, usn=200, parent=30, parent_seq=1,
+                   timestamp=FILETIME_2024 + 10),
+        usn_record(43, "old.txt", DELETE, usn=210, parent=5, parent_seq=1),
+        usn_record(44, "notes.txt", DELETE, usn=220, parent=5, parent_seq=1, major=3),
+    )
+
+def _at_vcn(attr: bytes, vcn: int) -> bytes:
+    a = bytearray(attr)
+    struct.pack_into('<Q', a, 16, vcn)
+    return bytes(a)
+
+def _list_entry(atype: int, vcn: int, number: int, name: str) -> bytes:
+    nb = name.encode('utf-16-le')
+    length = (26 + len(nb) + 7) & ~7
+    e = struct.pack('<IHBBQQH', atype, length, len(nb) // 2, 26, vcn, number | 1 << 48, 0) + nb
+    return e + b"\0" * (length - len(e))
+
+def _image(path: str, split: bool = False):
+    img = NTFSImage(clusters=128)
+    cs = img.cluster_size
+    journal = _journal(cs)
+    runs = [(None, SPARSE)] + img.alloc(journal)
+    size = (SPARSE * cs) + len(journal)
+    img.add_dir(11, "$Extend", [index_entry(40, "$UsnJrnl", parent=11, parent_seq=1)], parent_seq=1)
+    if not split:
+        img.add(40, "$UsnJrnl", parent=11, parent_seq=1,
+                extra_attrs=[nonresident_attr(0x80, runs, size, cs, name="$J")])
+    else:  # the runs continue in extension record 41, found through $ATTRIBUTE_LIST
+        alist = _list_entry(0x80, 0, 40, "$J") + _list_entry(0x80, SPARSE, 41, "$J")
+        img.add(40, "$UsnJrnl", parent=11, parent_seq=1, extra_attrs=[
+            resident_attr(0x20, alist),
+            nonresident_attr(0x80, runs[:1], size, cs, name="$J")])
+        img.add(41, "", extra_attrs=[_at_vcn(nonresident_attr(0x80, runs[1:], size, cs, name="$J"),
+                                             SPARSE)])
+    img.add_dir(30, "Photos", [], parent_seq=1)
+    photo = img.alloc(PNG_BYTES, used=False)
+    img.add(42, "photo.png", data_runs=photo, data_size=len(PNG_BYTES), parent=30, parent_seq=1,
+            seq=2, in_use=False)
+    img.add(43, "new.txt", data=b"new", parent_seq=1, seq=3)   # reused since old.txt
+    img.add(44, "notes.txt", data=b"notes", parent_seq=1, seq=2, in_use=False)
+    with open(path, "wb") as f:
+        f.write(img.build())
+
+def test_journal_lists_deletions_joined_to_their_records():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "vol.img")
+        _image(src)
+        seen = []
+        scanner = NTFSScanner(progress_cb=lambda cur, total: seen.append((cur, total)))
+        found = scanner.recent_deletions(src)
+        assert [(d.usn.name, d.path, d.record is not None) for d in found] == [
+            ("notes.txt", "notes.txt", True),
+            ("old.txt", "old.txt", False),
+            ("photo.png", "Photos/photo.png", True),
+        ]
+        assert found[2].usn.timestamp == FILETIME_2024 + 10
+        assert seen[-1] == (2 * 4096, 2 * 4096)   # the sparse region was never read
+
+        # small reads cut records in two; the result must not change
+        assert [d.usn.usn for d in scanner.recent_deletions(src, read_size=1000)] == [220, 210, 200]
+        assert [d.usn.usn for d in scanner.recent_deletions(src, since=FILETIME_2024 + 1)] == [200]
+
+        st = scanner.stats
+        rec = FileRecovery(src, os.path.join(tmp, "out"), record_size=st["record_size"],
+                           cluster_size=st["cluster_size"], volume_offset=st["volume_offset"])
+        with open(rec.recover(found[2].record), "rb") as f:
+            assert f.read() == PNG_BYTES
+        rec.close()
+
+def test_journal_runs_continue_through_the_attribute_list():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "vol.img")
+        _image(src, split=True)
+        found = NTFSScanner().recent_deletions(src)
+        assert [d.usn.record for d in found] == [44, 43, 42]
@@ -0,0 +1,76 @@
+import os
+import struct
+import tempfile
+from openrecover.carver import FileCarver
+from openrecover.parser import ATTR_DATA, MFTParser, apply_fixups, decode_runlist, find_attribute
+from openrecover.signatures import PNG
+from openrecover.volume import NTFSVolume, unallocated_ranges
+from ntfs_image import NTFSImage, encode_runlist, file_name_value, mft_record, resident_attr
+from fixtures import PNG_BYTES
+
+def _write(tmp: str, data: bytes) -> str:
+    p = os.path.join(tmp, 'vol.img')
+    with open(p, 'wb') as f:
+        f.write(data)
+    return p
+
+def test_runlist_roundtrip_with_sparse_and_negative_deltas():
+    runs = [(100, 8), (None, 16), (40, 3), (70000, 1)]
+    assert decode_runlist(encode_runlist(runs)) == runs
+
+def test_fixups_restore_sector_tails():
+    rec = mft_record(7, [resident_attr(ATTR_DATA, b'x' * 600)], usn=0x4242)
+    assert rec[510:512] == b'\x42\x42'
+    fixed = apply_fixups(rec)
+    assert find_attribute(fixed, ATTR_DATA).value == b'x' * 600
+
+def test_parser_keeps_structure_for_odd_names_and_4k_sectors():
+    fn = bytearray(file_name_value('ab', parent=9))
+    fn[66:68] = b'\x00\xd8'  # lone high surrogate
+    rec = mft_record(8, [resident_attr(0x30, bytes(fn)), resident_attr(ATTR_DATA, b'hi')])
+    p = MFTParser(1024).parse(rec)
+    assert p.parent == 9 and p.resident_data == b'hi' and p.file_name.endswith('b')
+    # a 4096-byte record on a 4Kn volume has a single fixup, at the end of its only sector
+    clean = apply_fixups(mft_record(9, [resident_attr(ATTR_DATA, b'z' * 3000)], record_size=4096))
+    buf = bytearray(clean)
+    struct.pack_into('<H', buf, 6, 2)
+    buf[4094:4096] = b'\x07\x07'
+    buf[0x30:0x34] = b'\x07\x07' + clean[4094:4096]
+    fixed = apply_fixups(bytes(buf), 4096)
+    assert fixed[0x34:] == clean[0x34:]
+    p = MFTParser(4096, sector_size=4096).parse(bytes(buf))
+    assert p.record_number == 9 and p.resident_data == b'z' * 3000
+
+def test_volume_reads_records_and_free_ranges():
+    img = NTFSImage(clusters=64)
+    img.add(40, 'live.bin', data_runs=img.alloc(b'L' * 8192, lcn=30), data_size=8192)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _write(tmp, img.build())
+        vol = NTFSVolume(src)
+        try:
+            assert vol.cluster_size == 4096
+            data = find_attribute(vol.read_record(40), ATTR_DATA)
+            assert vol.read_attribute(data) == b'L' * 8192
+            runs = vol.free_cluster_runs()
+        finally:
+            vol.close()
+        used_to = img.bitmap_lcn + img.bitmap_clusters
+        assert runs == [(1, 3), (used_to, 30 - used_to), (32, 32)]
+        merged = unallocated_ranges(src, merge_gap=2 * 4096)
+        assert merged == [(4096, 4 * 4096), (used_to * 4096, 64 * 4096)]
+
+def test_carver_scans_only_unallocated_ranges():
+    png = PNG_BYTES
+    img = NTFSImage(clusters=64)
+    img.add(40, 'live.png', data_runs=img.alloc(png, lcn=20), data_size=len(png))
+    img.alloc(png[:-1] + b'\x83', lcn=40, used=False)  # deleted, unallocated
+    with tempfile.TemporaryDirectory() as tmp:
+        src = _write(tmp, img.build())
+        ranges = unallocated_ranges(src)
+        c = FileCarver(src, os.path.join(tmp, 'out'), [PNG], chunk=16384, overlap=512,
+                       min_size=0, deduplicate=False, write_output=False, ranges=ranges)
+        hits = [r.start for r in c.scan()]
+        c.close()
+        assert hits == [40 * 4096]
+        assert c.stats['range_bytes'] == sum(e - s for s, e in ranges)
+        assert c.stats['bytes_read'] < 64 * 4096 * 0.9
@@ -1,14 +1,85 @@
 """
 Simple MFT record parser for OpenRecover.
 
-This parser verifies the ``FILE`` signature and extracts a plausible
-file name from a candidate record. It does not interpret attribute
-runlists or timestamps; it only provides a heuristic placeholder.
+This parser verifies the ``FILE`` signature and decodes the record
+header, ``$STANDARD_INFORMATION``, ``$FILE_NAME`` and the unnamed
+``$DATA`` attribute (size, runlist or resident content).  Candidates
+that do not carry a valid record header fall back to a heuristic that
+extracts a plausible file name from the raw bytes.
+
+It also decodes the NTFS boot sector so callers can learn the volume
+geometry (sector size, cluster size, MFT location), and provides the
+low-level record helpers (update sequence fixups, attribute walking,
+runlist decoding) used to follow non-resident attributes on disk.
 """
 
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
 import re
+import struct
+
+ATTR_STANDARD_INFORMATION = 0x10
+ATTR_ATTRIBUTE_LIST = 0x20
+ATTR_FILE_NAME = 0x30
+ATTR_DATA = 0x80
+ATTR_INDEX_ROOT = 0x90
+ATTR_INDEX_ALLOCATION = 0xA0
+ATTR_BITMAP = 0xB0
+ATTR_END = 0xFFFFFFFF
+
+# a run is (lcn, clusters); lcn is None for sparse runs
+Run = Tuple[Optional[int], int]
+
+@dataclass
+class BootSector:
+    bytes_per_sector: int
+    sectors_per_cluster: int
+    total_sectors: int
+    mft_lcn: int
+    mftmirr_lcn: int
+    record_size: int
+    index_block_size: int
+    serial: int
+
+    @property
+    def cluster_size(self) -> int:
+        return self.bytes_per_sector * self.sectors_per_cluster
+
+    @property
+    def volume_size(self) -> int:
+        return self.total_sectors * self.bytes_per_sector
+
+def _clusters_or_bytes(value: int, cluster_size: int) -> int:
+    # Positive values count clusters, negative ones encode 2**-value bytes.
+    if value < 0:
+        return 1 << (-value)
+    return value * cluster_size
+
+def parse_boot_sector(data: bytes) -> Optional[BootSector]:
+    """Decode an NTFS boot sector, or return None if ``data`` is not one."""
+    if len(data) < 512 or data[3:11] != b'NTFS    ' or data[510:512] != b'\x55\xaa':
+        return None
+    bps, spc = struct.unpack_from('<HB', data, 0x0B)
+    if spc > 0x80:
+        spc = 1 << (256 - spc)
+    if bps not in (512, 1024, 2048, 4096) or spc == 0 or spc & (spc - 1):
+        return None
+    total, mft, mirr = struct.unpack_from('<QQQ', data, 0x28)
+    rec, = struct.unpack_from('<b', data, 0x40)
+    idx, = struct.unpack_from('<b', data, 0x44)
+    serial, = struct.unpack_from('<Q', data, 0x48)
+    cs = bps * spc
+    return BootSector(
+        bytes_per_sector=bps,
+        sectors_per_cluster=spc,
+        total_sectors=total,
+        mft_lcn=mft,
+        mftmirr_lcn=mirr,
+        record_size=_clusters_or_bytes(rec, cs),
+        index_block_size=_clusters_or_bytes(idx, cs),
+        serial=serial,
+    )
 
 @dataclass
 class ParsedRecord:
@@ -17,15 +88,42 @@ class ParsedRecord:
     size: int
     is_deleted: bool
     raw: bytes
+    sequence: int = 0
+    is_dir: bool = False
+    parent: int = 0             # parent directory record number
+    parent_seq: int = 0
+    created: int = 0            # FILETIME (100 ns ticks since 1601-01-01 UTC)
+    modified: int = 0
+    mft_modified: int = 0
+    accessed: int = 0
+    alloc_size: int = 0
+    data_runs: List[Run] = field(default_factory=list)
+    resident_data: Optional[bytes] = None
+    data_flags: int = 0         # $DATA attribute flags (0x1 compressed, 0x4000 encrypted, 0x8000 sparse)
+    compression_unit: int = 0
+
+    @property
+    def flags(self) -> int:
+        return (0 if self.is_deleted else 0x1) | (0x2 if self.is_dir else 0)
+
+# $FILE_NAME namespaces in order of preference: Win32, Win32&DOS, POSIX, DOS
+_NAMESPACE_RANK = {1: 0, 3: 1, 0: 2, 2: 3}
 
 class MFTParser:
-    def __init__(self, record_size: int = 1024) -> None:
+    def __init__(self, record_size: int = 1024, sector_size: int = 512) -> None:
         self.record_size = record_size
+        self.sector_size = sector_size  # update sequence stride: the volume's bytes per sector
 
     def parse(self, record: bytes, offset: int = 0) -> ParsedRecord:
         if len(record) < 4 or record[:4] != b'FILE':
             raise ValueError("Not an MFT record: missing FILE signature")
         rec_num = offset // self.record_size if self.record_size else 0
+        try:
+            parsed = self._parse_structured(record, rec_num)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            parsed = None
+        if parsed is not None:
+            return parsed
         name = ""
         ascii_pattern = re.compile(rb'[\x20-\x7e]{3,255}')
         for m in ascii_pattern.finditer(record):
@@ -34,3 +132,151 @@ class MFTParser:
                 name = text.strip()
                 break
         return ParsedRecord(record_number=rec_num, file_name=name, size=0, is_deleted=False, raw=record)
+
+    def _parse_structured(self, record: bytes, rec_num: int) -> Optional[ParsedRecord]:
+        usa_off, = struct.unpack_from('<H', record, 4)
+        seq, _links, attrs_off, flags = struct.unpack_from('<HHHH', record, 0x10)
+        if usa_off < 0x28 or attrs_off < usa_off or attrs_off >= len(record):
+            return None
+        try:
+            fixed = apply_fixups(record, self.sector_size)
+        except ValueError:
+            fixed = record  # already fixed up, e.g. by NTFSVolume
+        if usa_off >= 0x30:  # NTFS 3.1 stores the record number in the header
+            rec_num, = struct.unpack_from('<I', fixed, 0x2C)
+        p = ParsedRecord(record_number=rec_num, file_name="", size=0,
+                         is_deleted=not flags & 0x1, raw=record, sequence=seq,
+                         is_dir=bool(flags & 0x2))
+        rank = 99
+        have_si = False
+        for a in iter_attributes(fixed):
+            if a.type == ATTR_STANDARD_INFORMATION and a.resident and len(a.value) >= 32:
+                p.created, p.modified, p.mft_modified, p.accessed = struct.unpack_from('<QQQQ', a.value)
+                have_si = True
+            elif a.type == ATTR_FILE_NAME and a.resident and len(a.value) >= 66:
+                fn = parse_file_name(a.value)
+                r = _NAMESPACE_RANK.get(fn.namespace, 4)
+                if r < rank:
+                    rank = r
+                    p.file_name = fn.name
+                    p.parent, p.parent_seq = fn.parent, fn.parent_seq
+                    if not have_si:
+                        p.created, p.modified, p.mft_modified, p.accessed = fn.times
+                    if not p.size:
+                        p.size, p.alloc_size = fn.size, fn.alloc_size
+            elif a.type == ATTR_DATA and a.name == "":
+                p.data_flags = a.flags
+                if a.resident:
+                    p.resident_data = a.value
+                    p.size = p.alloc_size = len(a.value)
+                elif a.start_vcn == 0:
+                    p.data_runs = a.runs
+                    p.size, p.alloc_size = a.data_size, a.alloc_size
+                    p.compression_unit = a.compression_unit
+                else:
+                    p.data_runs = p.data_runs + a.runs
+        return p
+
+@dataclass
+class FileNameAttr:
+    parent: int
+    parent_seq: int
+    times: Tuple[int, int, int, int]
+    alloc_size: int
+    size: int
+    flags: int
+    namespace: int
+    name: str
+
+def parse_file_name(value: bytes) -> FileNameAttr:
+    """Decode a ``$FILE_NAME`` attribute value (also used by index entries)."""
+    ref, = struct.unpack_from('<Q', value, 0)
+    times = struct.unpack_from('<QQQQ', value, 8)
+    alloc, size, flags = struct.unpack_from('<QQI', value, 40)
+    name_len, namespace = value[64], value[65]
+    # NTFS names are UCS-2: a lone surrogate is legal there but not in UTF-16
+    name = value[66:66 + 2 * name_len].decode('utf-16-le', errors='replace')
+    return FileNameAttr(ref & 0xFFFFFFFFFFFF, ref >> 48, times, alloc, size, flags, namespace, name)
+
+@dataclass
+class Attribute:
+    type: int
+    name: str
+    resident: bool
+    flags: int
+    value: bytes = b""          # resident content
+    runs: List[Run] = field(default_factory=list)
+    start_vcn: int = 0
+    data_size: int = 0
+    alloc_size: int = 0
+    compression_unit: int = 0   # log2 of clusters per compression unit
+
+    @property
+    def compressed(self) -> bool:
+        return bool(self.flags & 0x0001)
+
+def apply_fixups(record: bytes, sector_size: int = 512) -> bytes:
+    """Restore the sector tails replaced by the update sequence array."""
+    if len(record) < 8:
+        raise ValueError("record too short for fixups")
+    usa_off, usa_count = struct.unpack_from('<HH', record, 4)
+    if usa_count < 2 or usa_off + 2 * usa_count > len(record):
+        raise ValueError("invalid update sequence array")
+    buf = bytearray(record)
+    usn = buf[usa_off:usa_off + 2]
+    for i in range(1, usa_count):
+        end = i * sector_size
+        if end > len(buf):
+            break
+        if buf[end - 2:end] != usn:
+            raise ValueError(f"fixup mismatch in sector {i - 1}")
+        buf[end - 2:end] = buf[usa_off + 2 * i:usa_off + 2 * i + 2]
+    return bytes(buf)
+
+def decode_runlist(data: bytes, pos: int = 0) -> List[Run]:
+    runs: List[Run] = []
+    lcn = 0
+    while pos < len(data):
+        h = data[pos]
+        if h == 0:
+            break
+        len_size, off_size = h & 0x0F, h >> 4
+        pos += 1
+        if len_size == 0 or pos + len_size + off_size > len(data):
+            break
+        length = int.from_bytes(data[pos:pos + len_size], 'little')
+        pos += len_size
+        if off_size:
+            lcn += int.from_bytes(data[pos:pos + off_size], 'little', signed=True)
+            runs.append((lcn, length))
+        else:
+            runs.append((None, length))
+        pos += off_size
+    return runs
+
+def iter_attributes(record: bytes) -> Iterator[Attribute]:
+    """Walk the attributes of a fixed-up MFT record."""
+    off, = struct.unpack_from('<H', record, 0x14)
+    while off + 16 <= len(record):
+        atype, alen = struct.unpack_from('<II', record, off)
+        if atype == ATTR_END or alen < 16 or off + alen > len(record):
+            break
+        nonres, name_len, name_off, flags = struct.unpack_from('<BBHH', record, off + 8)
+        name = record[off + name_off:off + name_off + 2 * name_len].decode('utf-16-le', errors='replace')
+        if not nonres:
+            vlen, voff = struct.unpack_from('<IH', record, off + 16)
+            value = record[off + voff:off + voff + vlen]
+            yield Attribute(atype, name, True, flags, value=value, data_size=len(value))
+        elif alen >= 64:
+            start_vcn, _last, runs_off, cu = struct.unpack_from('<QQHH', record, off + 16)
+            alloc, size = struct.unpack_from('<QQ', record, off + 40)
+            runs = decode_runlist(record[off:off + alen], runs_off)
+            yield Attribute(atype, name, False, flags, runs=runs, start_vcn=start_vcn,
+                            data_size=size, alloc_size=alloc, compression_unit=cu)
+        off += alen
+
+def find_attribute(record: bytes, atype: int, name: str = "") -> Optional[Attribute]:
+    for a in iter_attributes(record):
+        if a.type == atype and a.name == name:
+            return a
+    return None
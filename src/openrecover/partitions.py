@@ -0,0 +1,157 @@
+"""
+MBR and GPT partition tables.
+
+:func:`read_partitions` lists the partitions of a whole-disk image or
+device: MBR primaries, logical partitions in the extended-partition
+(EBR) chain, or the entries of a GPT (found through the protective MBR).
+Each partition's boot sector is checked so NTFS volumes come back with
+their cluster size and MFT offset.  A source that starts with an NTFS
+boot sector (a volume image) is returned as a single partition.
+"""
+
+from __future__ import annotations
+import zlib
+import struct
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from .parser import parse_boot_sector
+from .rawio import open_source
+
+MBR_EXTENDED = (0x05, 0x0F, 0x85)
+MBR_GPT_PROTECTIVE = 0xEE
+GPT_SIGNATURE = b'EFI PART'
+GPT_BASIC_DATA = "ebd0a0a2-b9e5-4433-87c0-68b6b72699c7"
+
+_MAX_EBR = 128  # guard against looping EBR chains
+
+@dataclass
+class Partition:
+    index: int
+    scheme: str            # "mbr", "gpt" or "none" (the source is a bare volume)
+    type: str              # MBR type byte as "0x07", or the GPT type GUID
+    offset: int            # byte offset of the first sector
+    size: int
+    name: str = ""
+    fs: str = ""           # "ntfs" when an NTFS boot sector was found
+    cluster_size: int = 0
+    record_size: int = 0
+    mft_offset: int = 0    # absolute byte offset of the MFT (NTFS only)
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+def _probe(read_at, p: Partition) -> Partition:
+    try:
+        bs = parse_boot_sector(read_at(p.offset, 512))
+    except Exception:
+        bs = None
+    if bs is not None:
+        p.fs = "ntfs"
+        p.cluster_size = bs.cluster_size
+        p.record_size = bs.record_size
+        p.mft_offset = p.offset + bs.mft_lcn * bs.cluster_size
+    return p
+
+def _mbr_entries(sector: bytes) -> List[Tuple[int, int, int]]:
+    """(type, first LBA, sector count) of the four MBR/EBR slots, empty ones skipped."""
+    out = []
+    for i in range(4):
+        ptype, = struct.unpack_from('<B', sector, 446 + 16 * i + 4)
+        lba, count = struct.unpack_from('<II', sector, 446 + 16 * i + 8)
+        if ptype and count:
+            out.append((ptype, lba, count))
+    return out
+
+def _read_mbr(read_at, sector: bytes, ss: int) -> List[Partition]:
+    parts: List[Partition] = []
+    logical: List[Partition] = []
+    for ptype, lba, count in _mbr_entries(sector):
+        if ptype not in MBR_EXTENDED:
+            parts.append(Partition(0, "mbr", f"0x{ptype:02x}", lba * ss, count * ss))
+            continue
+        ext_base, ebr, seen = lba, lba, set()
+        while ebr not in seen and len(seen) < _MAX_EBR:
+            seen.add(ebr)
+            es = read_at(ebr * ss, 512)
+            if len(es) < 512 or es[510:512] != b'\x55\xaa':
+                break
+            nxt = None
+            for t, rel, n in _mbr_entries(es)[:2]:
+                if t in MBR_EXTENDED:
+                    nxt = ext_base + rel       # next EBR: relative to the extended partition
+                else:
+                    logical.append(Partition(0, "mbr", f"0x{t:02x}", (ebr + rel) * ss, n * ss))
+            if nxt is None:
+                break
+            ebr = nxt
+    return parts + logical
+
+def _read_gpt(read_at, ss: int) -> Optional[List[Partition]]:
+    hdr = read_at(ss, ss)
+    if len(hdr) < 92 or hdr[:8] != GPT_SIGNATURE:
+        return None
+    hsize, crc = struct.unpack_from('<II', hdr, 0x0C)
+    if not 92 <= hsize <= len(hdr):
+        return None
+    if zlib.crc32(hdr[:0x10] + b'\0\0\0\0' + hdr[0x14:hsize]) != crc:
+        return None  # damaged, or not a GPT header at this sector size
+    entries_lba, = struct.unpack_from('<Q', hdr, 0x48)
+    count, esize = struct.unpack_from('<II', hdr, 0x50)
+    if esize < 128 or esize > 4096 or esize % 128 or count > 4096:
+        return None
+    table = read_at(entries_lba * ss, count * esize)
+    parts: List[Partition] = []
+    for i in range(len(table) // esize):
+        e = table[i * esize:(i + 1) * esize]
+        if e[:16] == b'\x00' * 16:
+            continue
+        first, last = struct.unpack_from('<QQ', e, 32)
+        name = e[56:128].decode('utf-16-le', errors='replace').split('\x00', 1)[0]
+        parts.append(Partition(0, "gpt", str(uuid.UUID(bytes_le=bytes(e[:16]))),
+                               first * ss, (last - first + 1) * ss, name=name))
+    return parts
+
+def read_partitions(source, sector_size: int = 0) -> List[Partition]:
+    """Partitions of ``source`` (a path or an object with ``read_at``), in table order.
+
+    ``sector_size`` 0 tries 512 and then 4096 for GPT disks.
+    """
+    own = isinstance(source, str)
+    src = open_source(source) if own else source
+    try:
+        read_at = src.read_at
+        sector = read_at(0, 512)
+        if len(sector) < 512:
+            return []
+        if parse_boot_sector(sector) is not None:
+            total = getattr(src, "length", None) or 0
+            return [_probe(read_at, Partition(0, "none", "ntfs", 0, total))]
+        if sector[510:512] != b'\x55\xaa':
+            return []
+        parts: Optional[List[Partition]] = None
+        if any(t == MBR_GPT_PROTECTIVE for t, _, _ in _mbr_entries(sector)):
+            for ss in ([sector_size] if sector_size else [512, 4096]):
+                parts = _read_gpt(read_at, ss)
+                if parts is not None:
+                    break
+        if parts is None:
+            parts = _read_mbr(read_at, sector, sector_size or 512)
+        for i, p in enumerate(parts):
+            p.index = i
+            _probe(read_at, p)
+        return parts
+    finally:
+        if own:
+            src.close()
+
+def get_partition(source, index: int) -> Partition:
+    parts = read_partitions(source)
+    if not 0 <= index < len(parts):
+        raise IndexError(f"partition {index} not found ({len(parts)} partitions)")
+    return parts[index]
+
+def partition_ranges(source) -> List[Tuple[int, int]]:
+    """``[start, end)`` of every partition, for scanning without the gaps between them."""
+    return [(p.offset, p.end) for p in read_partitions(source)]
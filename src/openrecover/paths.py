@@ -0,0 +1,140 @@
+"""
+Full-path reconstruction over the MFT parent graph.
+
+:class:`PathResolver` indexes records by number in compact arrays and
+resolves every directory path once, caching it, so resolving all
+records costs O(n) instead of walking each record's ancestors.  A
+parent reference only counts if its sequence number matches the parent
+record (or the parent's next sequence, when the parent was deleted
+after the child).  Records whose chain is broken or loops are placed
+under ``$Orphan``.
+
+Record numbers come from the record header, which damage can set to
+anything, so the arrays only grow up to ``limit`` (the MFT record
+count) and, without one, by at most ``MAX_GROW`` slots at a time.
+"""
+
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .parser import ParsedRecord
+
+ROOT_RECORD = 5
+ORPHAN_DIR = "$Orphan"
+SEP = "/"
+
+_NONE = 0xFFFFFFFFFFFFFFFF
+MAX_GROW = 1 << 24
+
+class PathResolver:
+    def __init__(self, records: Iterable[ParsedRecord] = (), limit: int = 0) -> None:
+        self.limit = limit
+        self._parent = array('Q')
+        self._pseq = array('H')
+        self._seq = array('H')
+        self._flags = array('B')   # 1 present, 2 directory, 4 deleted
+        self._names: List[str] = []
+        self._dirs: Dict[int, str] = {ROOT_RECORD: ""}
+        for rec in records:
+            self.add(rec)
+
+    def _grow(self, n: int):
+        missing = n + 1 - len(self._parent)
+        if missing > 0:
+            self._parent.extend([_NONE] * missing)
+            self._pseq.extend([0] * missing)
+            self._seq.extend([0] * missing)
+            self._flags.extend([0] * missing)
+            self._names.extend([""] * missing)
+
+    def add(self, rec: ParsedRecord, number: Optional[int] = None) -> bool:
+        """Index ``rec``; False (and ignored) if its number is implausible.
+
+        ``number`` is the slot the record was read from, when known; a
+        header number that disagrees with it is damage.
+        """
+        n = rec.record_number
+        if n < 0 or (number is not None and n != number):
+            return False
+        if n >= (self.limit or len(self._parent) + MAX_GROW):
+            return False
+        self._grow(n)
+        self._parent[n] = rec.parent
+        self._pseq[n] = rec.parent_seq & 0xFFFF
+        self._seq[n] = rec.sequence & 0xFFFF
+        self._flags[n] = 1 | (2 if rec.is_dir else 0) | (4 if rec.is_deleted else 0)
+        self._names[n] = rec.file_name
+        if len(self._dirs) > 1:
+            self._dirs = {ROOT_RECORD: ""}  # the graph changed; drop cached paths
+        return True
+
+    def __contains__(self, number: int) -> bool:
+        return 0 <= number < len(self._flags) and bool(self._flags[number] & 1)
+
+    def name(self, number: int) -> str:
+        return self._names[number] if number in self else ""
+
+    def _check_parent(self, number: int, p: int, want: int) -> Optional[int]:
+        if p == number or p not in self or not self._flags[p] & 2:
+            return None
+        have = self._seq[p]
+        if want and want != have and not (self._flags[p] & 4 and (want + 1) & 0xFFFF == have):
+            return None
+        return p
+
+    def _valid_parent(self, number: int) -> Optional[int]:
+        return self._check_parent(number, self._parent[number], self._pseq[number])
+
+    def dir_path(self, number: int) -> str:
+        """Path of directory ``number`` relative to the volume root (cached)."""
+        cached = self._dirs.get(number)
+        if cached is not None:
+            return cached
+        chain: List[int] = []
+        on_chain = set()
+        cur: Optional[int] = number
+        base = ORPHAN_DIR
+        while cur is not None:
+            hit = self._dirs.get(cur)
+            if hit is not None:
+                base = hit
+                break
+            if cur in on_chain:  # cycle: everything from here on is orphaned
+                break
+            on_chain.add(cur)
+            chain.append(cur)
+            cur = self._valid_parent(cur)
+        for n in reversed(chain):
+            base = self._join(base, self._names[n] or f"record_{n}")
+            self._dirs[n] = base
+        return self._dirs[number]
+
+    @staticmethod
+    def _join(base: str, name: str) -> str:
+        return f"{base}{SEP}{name}" if base else name
+
+    def path(self, rec: Union[ParsedRecord, int]) -> str:
+        """Full path of a record relative to the volume root."""
+        if isinstance(rec, ParsedRecord):
+            number, name = rec.record_number, rec.file_name
+        else:
+            number, name = rec, self.name(rec)
+        if number == ROOT_RECORD:
+            return ""
+        if number in self and self._flags[number] & 2:
+            return self.dir_path(number)
+        name = name or f"record_{number}"
+        if number in self:
+            parent = self._valid_parent(number)
+        elif isinstance(rec, ParsedRecord):
+            parent = self._check_parent(number, rec.parent, rec.parent_seq & 0xFFFF)
+        else:
+            parent = None
+        if parent is None:
+            return self._join(ORPHAN_DIR, name)
+        return self._join(self.dir_path(parent), name)
+
+    def resolve_all(self) -> Iterator[Tuple[int, str]]:
+        for n in range(len(self._flags)):
+            if self._flags[n] & 1:
+                yield n, self.path(n)
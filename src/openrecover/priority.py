@@ -0,0 +1,140 @@
+"""
+Priority order for carving: the regions most likely to hold lost files first.
+
+:func:`plan_priority` splits the scan window into tiers and returns its
+ranges tier by tier, every byte exactly once:
+
+1. ``deleted`` -- the first clusters of files whose MFT records are
+   deleted, where their headers are,
+2. ``free-dense`` -- free space that looks like compressed data,
+3. ``free`` -- the rest of the free space,
+4. ``dense`` -- allocated space that looks like compressed data,
+5. ``rest`` -- everything else.
+
+"Looks like compressed data" is the ``HIGH_ENTROPY`` class of a
+:class:`~openrecover.triage.TriageMap` when there is one, else of one
+block sampled per cell by :func:`sample_dense`.  JPEG, PNG, ZIP and
+video content all fall in that class.
+"""
+
+from __future__ import annotations
+import struct
+from typing import Callable, Iterable, List, Tuple
+
+from .parser import MFTParser
+from .triage import HIGH_ENTROPY, classify_blocks
+
+Range = Tuple[int, int]
+TIERS = ("deleted", "free-dense", "free", "dense", "rest")
+PRIORITY_SAMPLES = 1024
+SAMPLE_BLOCK = 4096          # a seek costs more than the read, so keep it small
+
+def merge(ranges: Iterable[Range]) -> List[Range]:
+    """Sort ``ranges`` and merge the overlapping and adjacent ones."""
+    out: List[Range] = []
+    for s, e in sorted(ranges):
+        if e <= s:
+            continue
+        if out and s <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], e))
+        else:
+            out.append((s, e))
+    return out
+
+def subtract(ranges: List[Range], holes: List[Range]) -> List[Range]:
+    """Sorted, disjoint ``ranges`` minus sorted, disjoint ``holes``."""
+    out: List[Range] = []
+    j = 0
+    for s, e in ranges:
+        while j < len(holes) and holes[j][1] <= s:
+            j += 1
+        k = j
+        while s < e and k < len(holes) and holes[k][0] < e:
+            hs, he = holes[k]
+            if hs > s:
+                out.append((s, hs))
+            s = max(s, he)
+            k += 1
+        if s < e:
+            out.append((s, e))
+    return out
+
+def intersect(a: List[Range], b: List[Range]) -> List[Range]:
+    """Intersection of two sorted, disjoint range lists."""
+    out: List[Range] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        s, e = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if s < e:
+            out.append((s, e))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+def deleted_file_starts(vol, span: int = 0) -> List[Range]:
+    """``[start, start + span)`` at the first cluster of every deleted file of ``vol``.
+
+    Records in use are skipped before they are parsed.  ``span`` defaults
+    to one cluster.
+    """
+    span = span or vol.cluster_size
+    parser = MFTParser(vol.record_size, vol.boot.bytes_per_sector)
+    out: List[Range] = []
+    for number, raw in vol.iter_records():
+        if raw[0x16] & 0x3:
+            continue  # in use, or a directory
+        try:
+            rec = parser.parse(raw, number * vol.record_size)
+        except (ValueError, struct.error):
+            continue
+        if rec.resident_data is not None or not rec.data_runs:
+            continue
+        lcn = rec.data_runs[0][0]
+        if lcn is not None:
+            start = vol.offset + lcn * vol.cluster_size
+            out.append((start, start + span))
+    return merge(out)
+
+def sample_dense(read_at: Callable[[int, int], bytes], window: List[Range],
+                 samples: int = PRIORITY_SAMPLES, block: int = SAMPLE_BLOCK) -> List[Range]:
+    """Cells of ``window`` whose sampled block is high-entropy.
+
+    The window is cut into ``samples`` cells of equal length and one
+    ``block`` at the start of each is classified, so the pass costs
+    ``samples`` small reads whatever the size of the window.
+    """
+    total = sum(e - s for s, e in window)
+    if not total:
+        return []
+    cell = max(block, -(-total // max(1, samples)))
+    out: List[Range] = []
+    for s, e in window:
+        for pos in range(s, e, cell):
+            try:
+                buf = read_at(pos, min(block, e - pos))
+            except OSError:
+                continue
+            if buf and classify_blocks(buf, block)[:1] == bytes([HIGH_ENTROPY]):
+                out.append((pos, min(e, pos + cell)))
+    return merge(out)
+
+def plan_priority(window: List[Range], deleted: List[Range] = (), free: List[Range] = (),
+                  dense: List[Range] = ()) -> List[Tuple[str, List[Range]]]:
+    """``(tier, ranges)`` covering sorted, disjoint ``window`` once, most promising first."""
+    free, dense = merge(free), merge(dense)
+    tiers = [
+        ("deleted", merge(deleted)),
+        ("free-dense", intersect(free, dense)),
+        ("free", free),
+        ("dense", dense),
+        ("rest", window),
+    ]
+    plan: List[Tuple[str, List[Range]]] = []
+    taken: List[Range] = []
+    for name, ranges in tiers:
+        ranges = subtract(intersect(window, ranges), taken)
+        plan.append((name, ranges))
+        taken = merge(taken + ranges)
+    return plan
@@ -1,6 +1,6 @@
-import os, ctypes
+import os, ctypes, json, bisect
 from ctypes import wintypes
-from typing import Optional
+from typing import Optional, Callable, List
 
 def to_raw_if_drive(path: str) -> str:
     p = (path or "").strip()
@@ -129,3 +129,259 @@ class RawDevice:
             self.close()
         except Exception:
             pass
+
+class FileSource:
+    """Image file opened for positional reads (same interface as RawDevice)."""
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb", buffering=0)
+
+    @property
+    def length(self) -> Optional[int]:
+        return os.fstat(self._f.fileno()).st_size
+
+    def fileno(self) -> int:
+        return self._f.fileno()
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if hasattr(os, 'pread'):
+            return os.pread(self._f.fileno(), size, offset)
+        self._f.seek(offset)
+        return self._f.read(size)
+
+    def close(self):
+        self._f.close()
+
+class SkipMap:
+    """Unreadable byte ranges of a source, kept sorted and merged.
+
+    With a ``path`` the map is loaded from and saved to a JSON file, so
+    later scans of the same device skip known bad areas without
+    touching them.
+    """
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+        self.ranges: List[List[int]] = []
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.ranges = [[int(s), int(e)] for s, e in json.load(f)["ranges"]]
+            except (OSError, ValueError, KeyError, TypeError):
+                self.ranges = []
+
+    @property
+    def bad_bytes(self) -> int:
+        return sum(e - s for s, e in self.ranges)
+
+    def add(self, start: int, end: int):
+        """Merge ``[start, end)`` into the map (in place, so ``ranges`` can be shared)."""
+        i = bisect.bisect_left(self.ranges, [start, start])
+        if i and self.ranges[i - 1][1] >= start:
+            i -= 1
+        j = i
+        while j < len(self.ranges) and self.ranges[j][0] <= end:
+            start = min(start, self.ranges[j][0])
+            end = max(end, self.ranges[j][1])
+            j += 1
+        self.ranges[i:j] = [[start, end]]
+
+    def overlapping(self, start: int, end: int) -> List[List[int]]:
+        i = bisect.bisect_left(self.ranges, [start, start])
+        if i and self.ranges[i - 1][1] > start:
+            i -= 1
+        out = []
+        while i < len(self.ranges) and self.ranges[i][0] < end:
+            out.append(self.ranges[i])
+            i += 1
+        return out
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "ranges": self.ranges}, f)
+        os.replace(tmp, self.path)
+
+class FaultTolerantReader:
+    """``read_at`` that never fails on bad sectors.
+
+    A failed read is split in halves on ``sector`` boundaries until the
+    unreadable sectors are isolated; they are recorded in the skip map
+    and returned as zeros, so offsets in the result stay exact.  Ranges
+    already in the map are zero-filled without being read again.  Once
+    one read has isolated ``max_bad_sectors`` bad sectors, its remaining
+    failing pieces are skipped whole instead of being split further.
+    Those pieces may still hold good sectors, so they go to the in-memory
+    ``provisional`` map, not the skip map: they are skipped for the
+    lifetime of this reader and probed again by the next one.
+    """
+
+    def __init__(self, read_at: Callable[[int, int], bytes], sector: int = 512,
+                 skip_map: Optional[SkipMap] = None,
+                 on_bad: Optional[Callable[[int, int], None]] = None,
+                 max_bad_sectors: int = 64) -> None:
+        self._read = read_at
+        self.sector = sector
+        self.max_bad_sectors = max_bad_sectors
+        self._budget = max_bad_sectors
+        self.skip_map = skip_map if skip_map is not None else SkipMap()
+        self.provisional = SkipMap()
+        self.on_bad = on_bad
+        self.failed_reads = 0
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        out = bytearray()
+        pos, end = offset, offset + size
+        known = sorted(self.skip_map.overlapping(offset, end) + self.provisional.overlapping(offset, end))
+        for bs, be in known:
+            if be <= pos:
+                continue
+            if bs > pos:
+                part = self._read_good(pos, bs - pos)
+                out += part
+                if len(part) < bs - pos:
+                    return bytes(out)  # end of the source
+            lo, hi = max(pos, bs), min(end, be)
+            out += bytes(hi - lo)
+            pos = hi
+        if pos < end:
+            out += self._read_good(pos, end - pos)
+        return bytes(out)
+
+    def _read_good(self, offset: int, size: int) -> bytes:
+        self._budget = self.max_bad_sectors
+        return self._bisect(offset, size)
+
+    def _bad(self, offset: int, size: int, isolated: bool = True) -> bytes:
+        (self.skip_map if isolated else self.provisional).add(offset, offset + size)
+        if self.on_bad:
+            self.on_bad(offset, offset + size)
+        return bytes(size)
+
+    def _bisect(self, offset: int, size: int) -> bytes:
+        try:
+            return self._read(offset, size)
+        except OSError:
+            self.failed_reads += 1
+        ss = self.sector
+        end = offset + size
+        if offset // ss == (end - 1) // ss:  # within one sector: isolated
+            self._budget -= 1
+            return self._bad(offset, size)
+        if self._budget <= 0:
+            # a large bad area: stop probing sector by sector and skip it whole, for now
+            return self._bad(offset, size, isolated=False)
+        mid = (offset + size // 2) // ss * ss
+        if mid <= offset:
+            mid = (offset // ss + 1) * ss
+        first = self._bisect(offset, mid - offset)
+        if len(first) < mid - offset:
+            return first
+        return first + self._bisect(mid, end - mid)
+
+_COPY_BLOCK = 1024 * 1024
+
+def copy_range(src, offset: int, length: int, dst_fd: int) -> int:
+    """Append ``length`` bytes at ``offset`` of ``src`` to ``dst_fd``; returns bytes copied.
+
+    ``src`` is a file descriptor or any object with ``read_at``.  Plain
+    file descriptors are copied inside the kernel with
+    ``os.copy_file_range`` or ``os.sendfile``; otherwise (raw devices,
+    unsupported filesystems) the range is streamed in 1 MiB blocks.
+    """
+    done = 0
+    if isinstance(src, int):
+        for fn in ("copy_file_range", "sendfile"):
+            if not hasattr(os, fn):
+                continue
+            try:
+                while done < length:
+                    n = min(length - done, 1 << 30)
+                    if fn == "copy_file_range":
+                        k = os.copy_file_range(src, dst_fd, n, offset + done)
+                    else:
+                        k = os.sendfile(dst_fd, src, offset + done, n)
+                    if k <= 0:
+                        return done  # end of the source
+                    done += k
+                return done
+            except OSError:
+                continue  # e.g. EXDEV or EINVAL: try the next method from where we are
+    while done < length:
+        n = min(length - done, _COPY_BLOCK)
+        if isinstance(src, int):
+            if hasattr(os, "pread"):
+                b = os.pread(src, n, offset + done)
+            else:   # Windows
+                os.lseek(src, offset + done, os.SEEK_SET)
+                b = os.read(src, n)
+        else:
+            b = src.read_at(offset + done, n)
+        if not b:
+            break
+        os.write(dst_fd, b)
+        done += len(b)
+    return done
+
+def open_source(path: str):
+    """Open an image file or raw device for ``read_at`` access.
+
+    gzip and zstd images are opened through a seek index
+    (:class:`~openrecover.compressed.CompressedSource`).
+    """
+    sp = to_raw_if_drive(path)
+    if os.path.isfile(sp):
+        from .compressed import CompressedSource, detect_format
+        if detect_format(sp):
+            return CompressedSource(sp)
+        return FileSource(sp)
+    return RawDevice(sp)
+
+def image_device(
+    src: str,
+    out: str,
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+    stop_flag: Optional[Callable[[], bool]] = None,
+) -> int:
+    """Copy ``src`` to the image file ``out``; returns bytes written.
+
+    Failing reads are retried with smaller blocks; a 4 KiB block that
+    still fails is written as zeros so later offsets stay aligned.
+    """
+    progress_cb = progress_cb or (lambda a, b: None)
+    stop_flag = stop_flag or (lambda: False)
+    src = to_raw_if_drive(src)
+    total = 0
+    try:
+        if os.path.isfile(src):
+            total = os.path.getsize(src)
+        else:
+            rd = RawDevice(src)
+            total = rd.length or 0
+            rd.close()
+    except Exception:
+        pass
+    bs_list = [1024*1024, 256*1024, 64*1024, 4096]
+    written = 0
+    with open(src, "rb", buffering=0) as fi, open(out, "wb", buffering=0) as fo:
+        while not stop_flag():
+            try:
+                b = fi.read(bs_list[0])
+            except Exception:
+                b = b""
+                for bs in bs_list[1:]:
+                    try:
+                        fi.seek(written)
+                        b = fi.read(bs); break
+                    except Exception: b = b""
+                if not b:
+                    try: fi.seek(written + 4096)
+                    except Exception: break
+                    b = b"\x00" * 4096
+            if not b: break
+            fo.write(b)
+            written += len(b)
+            progress_cb(written, total)
+    return written
@@ -1,26 +1,456 @@
 """
-Simple file recovery engine for OpenRecover.
+File recovery engine for OpenRecover.
 
-This minimal recovery implementation writes the raw MFT record bytes
-to an output file.  It does not interpret runlists, alternate data
-streams or non-resident attributes.
+:meth:`FileRecovery.recover` writes the content of one record: its
+resident ``$DATA`` as is, a non-resident stream through
+:meth:`~FileRecovery.recover_batch`.  Records whose ``$DATA`` could not
+be parsed are written as raw record bytes.  Alternate data streams are
+not recovered.
+
+With a :class:`~openrecover.paths.PathResolver`, files are written into
+their original directory tree below the output folder.
+
+:meth:`FileRecovery.recover_batch` recovers the content of many records
+or carve hits at once: every data run is sorted by physical offset,
+nearby runs are coalesced into large reads and the source is swept once
+from start to end, scattering the bytes to the output files.  Files
+with NTFS-compressed ``$DATA`` are decompressed unit by unit after the
+sweep, in order of their first cluster.  With a known-file hash set
+(:mod:`openrecover.hashset`) stock files are dropped once hashed.
 """
 
 from __future__ import annotations
 import os
+import queue
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Set, Tuple, Union
+from .carver import CarveResult
+from .hashset import HashSet, open_hashset
+from .lznt1 import iter_decompressed
+from .manifest import Hasher, HashManifest, StreamHash
 from .parser import ParsedRecord
+from .paths import PathResolver, SEP
+from .rawio import open_source
+
+DATA_FLAG_COMPRESSED = 0x0001
+DATA_FLAG_ENCRYPTED = 0x4000
+
+@dataclass
+class Extent:
+    target: int     # index into the batch
+    file_off: int   # offset in the output file
+    src_off: int    # absolute offset in the source
+    length: int
+
+def plan_reads(extents: Iterable[Extent], max_gap: int, max_read: int
+               ) -> List[Tuple[int, int, List[Extent]]]:
+    """Group extents sorted by source offset into reads ``(start, end, extents)``.
+
+    Extents closer than ``max_gap`` bytes share one read as long as the
+    read stays within ``max_read`` bytes; the gap is read and discarded,
+    which is cheaper than a seek on rotating disks.  Extents longer than
+    ``max_read`` are split into ``max_read`` pieces first.
+    """
+    pieces: List[Extent] = []
+    for e in extents:
+        for k in range(0, max(e.length, 1), max_read):
+            pieces.append(Extent(e.target, e.file_off + k, e.src_off + k, min(max_read, e.length - k)))
+    reads: List[Tuple[int, int, List[Extent]]] = []
+    for e in sorted(pieces, key=lambda e: e.src_off):
+        end = e.src_off + e.length
+        if reads:
+            start, cur_end, group = reads[-1]
+            if e.src_off - cur_end <= max_gap and max(end, cur_end) - start <= max_read:
+                group.append(e)
+                reads[-1] = (start, max(end, cur_end), group)
+                continue
+        reads.append((e.src_off, end, [e]))
+    return reads
+
+class _Handles:
+    """Small LRU of open output files, so a batch never holds thousands of fds."""
+
+    def __init__(self, paths: List[str], limit: int = 64) -> None:
+        self.paths = paths
+        self.limit = limit
+        self._open: "OrderedDict[int, object]" = OrderedDict()
+
+    def get(self, i: int):
+        f = self._open.pop(i, None)
+        if f is None:
+            if len(self._open) >= self.limit:
+                _, old = self._open.popitem(last=False)
+                old.close()
+            f = open(self.paths[i], 'r+b')
+        self._open[i] = f
+        return f
+
+    def drop(self, i: int):
+        f = self._open.pop(i, None)
+        if f is not None:
+            f.close()
+
+    def close(self):
+        for f in self._open.values():
+            f.close()
+        self._open.clear()
+
+def _safe_component(name: str) -> str:
+    safe = ''.join(c if c not in '\\/:*?"<>|' and ord(c) >= 32 else '_' for c in name)
+    return '_' if safe in ('', '.', '..') else safe
 
 class FileRecovery:
-    def __init__(self, source: str, output_dir: str, record_size: int = 1024) -> None:
+    def __init__(self, source: str, output_dir: str, record_size: int = 1024,
+                 resolver: Optional[PathResolver] = None, cluster_size: int = 4096,
+                 volume_offset: int = 0, digests: Iterable[str] = (),
+                 hash_manifest: str = "",
+                 known_hashes: Union[str, HashSet, None] = None) -> None:
         self.source = source
         self.output_dir = output_dir
         self.record_size = record_size
+        self.resolver = resolver
+        self.cluster_size = cluster_size
+        self.volume_offset = volume_offset
+        self.digests = list(digests) or (["sha256"] if hash_manifest else [])
+        Hasher(self.digests)
+        self.manifest = HashManifest(hash_manifest) if hash_manifest else None
+        self._own_known = isinstance(known_hashes, str)
+        self.known = open_hashset(known_hashes)
+        self.known_skipped = 0
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def recover(self, rec: ParsedRecord) -> str:
+    def output_path(self, rec: ParsedRecord) -> str:
+        """Where ``rec`` is written: its original path with a resolver, else a flat name."""
         name = rec.file_name or f"record_{rec.record_number}.bin"
-        safe_name = ''.join(c if c not in '\\/:*?"<>|' else '_' for c in name)
-        out_path = os.path.join(self.output_dir, safe_name)
+        if self.resolver is None:
+            return os.path.join(self.output_dir, _safe_component(name))
+        parts = [_safe_component(p) for p in self.resolver.path(rec).split(SEP) if p]
+        out_path = os.path.join(self.output_dir, *(parts or [_safe_component(name)]))
+        if os.path.exists(out_path):  # e.g. a deleted and a live file with the same name
+            stem, ext = os.path.splitext(out_path)
+            out_path = f"{stem}_{rec.record_number}{ext}"
+        return out_path
+
+    def close(self):
+        if self.manifest:
+            self.manifest.close()
+            self.manifest = None
+        if self.known is not None and self._own_known:
+            self.known.close()
+            self.known = None
+
+    @property
+    def _hashing(self) -> bool:
+        return self.manifest is not None or self.known is not None
+
+    def _hasher(self) -> Hasher:
+        return Hasher(self.digests + ([self.known.algorithm] if self.known is not None else []))
+
+    def _is_known(self, h: Hasher) -> bool:
+        if self.known is None:
+            return False
+        algo = self.known.algorithm
+        if h.hexdigests([algo])[algo] not in self.known:
+            return False
+        self.known_skipped += 1
+        return True
+
+    def _finish(self, item, path: str, length: int, h: Hasher) -> bool:
+        """Record a completed file, or delete it if it is a known file; True if kept."""
+        if self._is_known(h):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False
+        self._record(item, path, length, h)
+        return True
+
+    def _record(self, item: Union[ParsedRecord, CarveResult], path: str, length: int,
+                hasher: Hasher):
+        if self.manifest is None:
+            return
+        if isinstance(item, CarveResult):
+            info = dict(type=item.sig.name, offset=item.start)
+        else:
+            info = dict(type="mft", record=item.record_number, name=item.file_name,
+                        runs=[[lcn, n] for lcn, n in item.data_runs])
+        self.manifest.add(source=self.source, path=path, length=length,
+                          hashes=hasher.hexdigests(self.digests), **info)
+
+    def _write_resident(self, rec: ParsedRecord, out_path: str) -> Optional[str]:
+        """Write resident ``$DATA``; None (nothing written) for a known file."""
+        h = None
+        if self._hashing:
+            h = self._hasher()
+            h.update(rec.resident_data)
+            if self._is_known(h):
+                return None
+        with open(out_path, 'wb') as f:
+            f.write(rec.resident_data)
+        if h is not None:
+            self._record(rec, out_path, len(rec.resident_data), h)
+        return out_path
+
+    def recover(self, rec: ParsedRecord) -> Optional[str]:
+        """Recover one record's file content; None for known and encrypted files."""
+        if rec.resident_data is None and rec.data_runs:
+            return self.recover_batch([rec])[0]
+        out_path = self.output_path(rec)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        if rec.resident_data is not None:
+            return self._write_resident(rec, out_path)
         with open(out_path, 'wb') as f:
             f.write(rec.raw)
+        if self.manifest:
+            h = Hasher(self.digests)
+            h.update(rec.raw)
+            self._record(rec, out_path, len(rec.raw), h)
+        return out_path
+
+    def _carve_path(self, hit: CarveResult) -> str:
+        name = os.path.basename(hit.out_path) if hit.out_path else ""
+        name = name or f"{hit.sig.name}_{hit.start:012x}.{hit.sig.ext}"
+        out_path = os.path.join(self.output_dir, _safe_component(name))
+        if os.path.exists(out_path):
+            stem, ext = os.path.splitext(out_path)
+            out_path = f"{stem}_{hit.start:x}{ext}"
+        return out_path
+
+    def _layout(self, i: int, item: Union[ParsedRecord, CarveResult]
+                ) -> Tuple[List[Extent], List[Tuple[int, int]]]:
+        """Map an item to (extents to read, sparse holes as (file offset, length))."""
+        if isinstance(item, CarveResult):
+            return [Extent(i, 0, item.start, item.end - item.start)], []
+        cs = self.cluster_size
+        pos = 0
+        extents: List[Extent] = []
+        holes: List[Tuple[int, int]] = []
+        for lcn, clusters in item.data_runs:
+            n = min(clusters * cs, item.size - pos)
+            if n <= 0:
+                break
+            if lcn is None:  # sparse runs stay zero in the pre-sized output
+                holes.append((pos, n))
+            else:
+                extents.append(Extent(i, pos, self.volume_offset + lcn * cs, n))
+            pos += n
+        return extents, holes
+
+    def _write_compressed(self, src, rec: ParsedRecord, out_path: str) -> Tuple[int, bool]:
+        """Decompress ``rec``'s LZNT1 stream into ``out_path``.
+
+        Returns the source bytes read and whether the file was kept.
+        """
+        read = [0]
+
+        def read_at(off: int, size: int) -> bytes:
+            data = src.read_at(self.volume_offset + off, size)
+            read[0] += len(data)
+            return data
+
+        h = self._hasher() if self._hashing else None
+        with open(out_path, 'wb') as f:
+            for block in iter_decompressed(read_at, rec.data_runs, self.cluster_size,
+                                           rec.compression_unit, rec.size):
+                f.write(block)
+                if h is not None:
+                    h.update(block)
+        kept = h is None or self._finish(rec, out_path, rec.size, h)
+        return read[0], kept
+
+    def recover_batch(
+        self,
+        items: Iterable[Union[ParsedRecord, CarveResult]],
+        max_gap: int = 1024 * 1024,
+        max_read: int = 16 * 1024 * 1024,
+        progress_cb: Optional[Callable[[int, int], None]] = None,
+        stop_flag: Optional[Callable[[], bool]] = None,
+    ) -> List[Optional[str]]:
+        """Recover the content of many records or carve hits in one sweep.
+
+        Returns one output path per item, or None for items whose content
+        cannot be recovered (encrypted ``$DATA``) and for known files:
+        with a known-file hash set, a file found in it is deleted as soon
+        as its last byte is hashed, or never written if it is resident.
+        ``progress_cb(done, total)`` reports source bytes read.  With a
+        hash manifest, each file is hashed from the bytes of the sweep
+        and its entry is appended as soon as its last piece is written.
+        """
+        items = list(items)
+        paths: List[Optional[str]] = []
+        extents: List[Extent] = []
+        streams: dict = {}
+        compressed: List[int] = []
+        for i, item in enumerate(items):
+            if isinstance(item, ParsedRecord):
+                if item.data_flags & DATA_FLAG_ENCRYPTED:
+                    paths.append(None)
+                    continue
+                out_path, size = self.output_path(item), item.size
+                if (item.data_flags & DATA_FLAG_COMPRESSED and item.compression_unit
+                        and item.resident_data is None):
+                    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                    open(out_path, 'wb').close()  # reserve the name
+                    compressed.append(i)
+                    paths.append(out_path)
+                    continue
+            else:
+                out_path, size = self._carve_path(item), item.end - item.start
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            if isinstance(item, ParsedRecord) and item.resident_data is not None:
+                if self._write_resident(item, out_path) is None:
+                    paths.append(None)
+                    continue
+            else:
+                with open(out_path, 'wb') as f:
+                    f.truncate(size)
+                ext, holes = self._layout(i, item)
+                extents.extend(ext)
+                if self._hashing:
+                    streams[i] = StreamHash(self._hasher(), size, holes, path=out_path)
+            paths.append(out_path)
+
+        reads = plan_reads(extents, max_gap, max_read)
+        cs = self.cluster_size
+        total = sum(end - start for start, end, _ in reads)
+        total += sum(n * cs for i in compressed for lcn, n in items[i].data_runs if lcn is not None)
+        done = 0
+        src = open_source(self.source)
+        handles = _Handles(paths)
+        try:
+            for start, end, group in reads:
+                if stop_flag and stop_flag():
+                    break
+                buf = memoryview(src.read_at(start, end - start))
+                for e in group:
+                    rel = e.src_off - start
+                    chunk = buf[rel:rel + e.length]
+                    if chunk:
+                        f = handles.get(e.target)
+                        f.seek(e.file_off)
+                        f.write(chunk)
+                        sh = streams.get(e.target)
+                        if sh is not None and sh.feed(e.file_off, chunk):
+                            del streams[e.target]
+                            handles.drop(e.target)
+                            if not self._finish(items[e.target], paths[e.target], sh.size,
+                                                sh.hasher):
+                                paths[e.target] = None
+                done += end - start
+                if progress_cb:
+                    progress_cb(done, total)
+
+            def first_lcn(i):
+                return min((lcn for lcn, _ in items[i].data_runs if lcn is not None), default=0)
+
+            for i in sorted(compressed, key=first_lcn):
+                if stop_flag and stop_flag():
+                    break
+                n, kept = self._write_compressed(src, items[i], paths[i])
+                done += n
+                if not kept:
+                    paths[i] = None
+                if progress_cb:
+                    progress_cb(done, total)
+        finally:
+            handles.close()
+            src.close()
+        if not (stop_flag and stop_flag()):
+            for i, sh in sorted(streams.items()):  # zero tails past the last run
+                sh.finish()
+                if sh.done and not self._finish(items[i], paths[i], sh.size, sh.hasher):
+                    paths[i] = None
+        return paths
+
+class ResidentWriter:
+    """Bulk-writes resident files as records stream past in an MFT scan.
+
+    Small files live entirely in their MFT record, so :meth:`add` needs
+    no read from the source: it only assigns an output path and queues
+    the content.  Queued files are written in batches (``batch_files``
+    files or ``batch_bytes`` bytes) by one background thread while the
+    scan goes on.  Names are flat unless ``recovery`` has a resolver; a
+    name already used gets the record number appended.
+    """
+
+    def __init__(self, recovery: FileRecovery, batch_files: int = 2048,
+                 batch_bytes: int = 4 * 1024 * 1024, deleted_only: bool = False) -> None:
+        self.recovery = recovery
+        self.batch_files = batch_files
+        self.batch_bytes = batch_bytes
+        self.deleted_only = deleted_only
+        self.files = 0
+        self.bytes = 0
+        self._batch: List[Tuple[ParsedRecord, str]] = []
+        self._batch_size = 0
+        self._names: Set[str] = set()
+        self._dirs: Set[str] = set()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=2)   # bounds the memory held
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _path(self, rec: ParsedRecord) -> str:
+        out_path = self.recovery.output_path(rec)
+        if out_path in self._names or os.path.exists(out_path):
+            stem, ext = os.path.splitext(out_path)
+            out_path = f"{stem}_{rec.record_number}{ext}"
+        self._names.add(out_path)
+        return out_path
+
+    def add(self, rec: ParsedRecord) -> Optional[str]:
+        """Queue ``rec`` if it is a resident file; returns its output path, else None."""
+        if self._error is not None:
+            raise self._error
+        if rec.resident_data is None or rec.is_dir or rec.data_flags & DATA_FLAG_ENCRYPTED:
+            return None
+        if self.deleted_only and not rec.is_deleted:
+            return None
+        out_path = self._path(rec)
+        self._batch.append((rec, out_path))
+        self._batch_size += len(rec.resident_data)
+        if len(self._batch) >= self.batch_files or self._batch_size >= self.batch_bytes:
+            self.flush()
         return out_path
+
+    def flush(self) -> None:
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch, self._batch_size = [], 0
+
+    def _run(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                for rec, out_path in batch:
+                    d = os.path.dirname(out_path)
+                    if d not in self._dirs:
+                        os.makedirs(d, exist_ok=True)
+                        self._dirs.add(d)
+                    if self.recovery._write_resident(rec, out_path) is not None:
+                        self.files += 1
+                        self.bytes += len(rec.resident_data)
+            except OSError as e:
+                self._error = e
+
+    def close(self) -> None:
+        """Write what is queued and wait for the writer; re-raises a write error."""
+        if self._thread.is_alive():
+            self.flush()
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "ResidentWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
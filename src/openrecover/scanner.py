@@ -6,13 +6,21 @@ over Master File Table (MFT) records on NTFS volumes. The
 implementation is deliberately simple and conservative: it searches
 for the ASCII ``FILE`` signature within a binary stream and returns
 the surrounding bytes as candidate MFT records.
+
+On a whole-disk image a scan can be limited to one partition; for an
+NTFS partition the record size is then taken from its boot sector.
+:meth:`NTFSScanner.recent_deletions` is the fast path for files deleted
+recently: it reads the change journal instead of scanning.
+Reads go through a :class:`~openrecover.rawio.FaultTolerantReader`, so
+bad sectors are isolated, zero-filled and remembered in the skip map.
 """
 
 from __future__ import annotations
 import os
 from dataclasses import dataclass
-from typing import Iterable, List
-from .rawio import RawDevice, to_raw_if_drive
+from typing import Callable, Iterable, List, Optional, Union
+from .partitions import Partition, get_partition, read_partitions
+from .rawio import FaultTolerantReader, SkipMap, open_source, to_raw_if_drive
 from .utils import is_ntfs
 
 @dataclass
@@ -21,8 +29,14 @@ class MFTRecord:
     raw: bytes
 
 class NTFSScanner:
-    def __init__(self, record_size: int = 1024) -> None:
+    def __init__(self, record_size: int = 1024,
+                 progress_cb: Optional[Callable[[int, int], None]] = None,
+                 skip_map: Union[str, SkipMap, None] = None, sector_size: int = 512) -> None:
         self.record_size = record_size
+        self.progress_cb = progress_cb or (lambda a, b: None)
+        self.skip_map = skip_map if isinstance(skip_map, SkipMap) else SkipMap(skip_map or "")
+        self.sector_size = sector_size
+        self.stats = {"bytes_read": 0, "skip_map": self.skip_map.ranges}
 
     def list_ntfs_volumes(self) -> List[str]:
         vols: List[str] = []
@@ -41,41 +55,112 @@ class NTFSScanner:
                 pass
             return vols
 
-    def scan_volume(self, source: str, max_records: int = 0) -> Iterable[MFTRecord]:
+    def list_partitions(self, source: str) -> List[Partition]:
+        """MBR/GPT partitions of a whole-disk image or device."""
+        return read_partitions(to_raw_if_drive(source))
+
+    def scan_volume(self, source: str, max_records: int = 0,
+                    partition: Optional[int] = None) -> Iterable[MFTRecord]:
+        for rec in self._scan_volume(source, max_records, partition):
+            if rec is not None:
+                yield rec
+
+    def recent_deletions(self, source: str, partition: Optional[int] = None, since: int = 0,
+                         read_size: int = 16 * 1024 * 1024) -> List["JournalDeletion"]:
+        """Files deleted according to the volume's change journal, newest first.
+
+        Only the allocated part of ``$UsnJrnl:$J`` and the MFT records it
+        names are read.  Entries whose ``record`` is set can be passed to
+        :meth:`~openrecover.recovery.FileRecovery.recover` as they are,
+        with the volume geometry left in ``stats``.
+        Raises ValueError if the volume is not NTFS or has no journal.
+        """
+        from .usn import recent_deletions
+        from .volume import NTFSVolume
         path = to_raw_if_drive(source)
-        rd = RawDevice(path)
-        total = rd.length or 0
+        offset = get_partition(path, partition).offset if partition is not None else 0
+        rd = open_source(path)
+        reader = FaultTolerantReader(rd.read_at, sector=self.sector_size, skip_map=self.skip_map)
+        try:
+            vol = NTFSVolume(reader, offset)
+            # the geometry FileRecovery needs for the non-resident files found
+            self.stats.update(volume_offset=offset, cluster_size=vol.cluster_size,
+                              record_size=vol.record_size)
+            return recent_deletions(vol, since, read_size, self.progress_cb)
+        finally:
+            self.stats["failed_reads"] = reader.failed_reads
+            self.stats["bad_bytes"] = self.skip_map.bad_bytes
+            self.stats["unprobed_bytes"] = reader.provisional.bad_bytes
+            self.skip_map.save()
+            rd.close()
+
+    def ascan_volume(self, source: str, max_records: int = 0, control=None, executor=None,
+                     progress_interval: float = 0.1, partition: Optional[int] = None):
+        """Async-generator version of :meth:`scan_volume` (see ``FileCarver.ascan``)."""
+        from .aio import drive
+        return drive(self._scan_volume(source, max_records, partition), self, control, executor,
+                     progress_interval)
+
+    def _scan_volume(self, source: str, max_records: int = 0, partition: Optional[int] = None):
+        """Yield MFT records, and None after every chunk as a checkpoint.
+
+        Record offsets are absolute; progress is relative to the scanned window.
+        A partition's own record size wins over ``record_size`` for this
+        scan only; the size used is left in ``stats``.
+        """
+        path = to_raw_if_drive(source)
+        base, end = 0, 0
+        record_size = self.record_size
+        if partition is not None:
+            p = get_partition(path, partition)
+            base, end = p.offset, p.end
+            if p.record_size:
+                record_size = p.record_size
+        self.stats["record_size"] = record_size
+        rd = open_source(path)
+        reader = FaultTolerantReader(rd.read_at, sector=self.sector_size, skip_map=self.skip_map)
+        end = end or rd.length or 0
+        total = end - base if end else 0
         chunk_size = 16 * 1024 * 1024
         overlap = 512
-        offset = 0
+        offset = base
         produced = 0
-        while total == 0 or offset < total:
-            try:
-                data = rd.read_at(offset, chunk_size)
-            except Exception:
-                offset += self.record_size if self.record_size else 4096
-                continue
-            if not data:
-                break
-            start = 0
-            while True:
-                idx = data.find(b'FILE', start)
-                if idx < 0:
+        try:
+            while end == 0 or offset < end:
+                size = min(chunk_size, end - offset) if end else chunk_size
+                data = reader.read_at(offset, size)
+                self.stats["bytes_read"] += len(data)
+                if not data:
+                    break
+                last = len(data) < size or bool(end and offset + len(data) >= end)
+                # signatures in the overlap tail are found again by the next chunk
+                owned = len(data) if last else len(data) - overlap
+                start = 0
+                while True:
+                    idx = data.find(b'FILE', start, owned + 3)
+                    if idx < 0 or (end and offset + idx + 4 > end):
+                        break
+                    record_offset = offset + idx
+                    if record_size:
+                        rec_bytes = reader.read_at(record_offset, record_size)
+                    else:
+                        next_idx = data.find(b'FILE', idx + 4)
+                        rec_end = next_idx if next_idx >= 0 else len(data)
+                        rec_bytes = data[idx:rec_end]
+                    yield MFTRecord(offset=record_offset, raw=rec_bytes)
+                    produced += 1
+                    if max_records and produced >= max_records:
+                        return
+                    start = idx + 4
+                if last:
                     break
-                record_offset = offset + idx
-                if self.record_size:
-                    rec_bytes = rd.read_at(record_offset, self.record_size)
-                else:
-                    next_idx = data.find(b'FILE', idx + 4)
-                    end = next_idx if next_idx >= 0 else len(data)
-                    rec_bytes = data[idx:end]
-                yield MFTRecord(offset=record_offset, raw=rec_bytes)
-                produced += 1
-                if max_records and produced >= max_records:
-                    rd.close()
-                    return
-                start = idx + 4
-            if len(data) < chunk_size:
-                break
-            offset += chunk_size - overlap
-        rd.close()
+                offset += owned
+                self.progress_cb(offset - base, total)
+                yield None
+            self.progress_cb(total or offset - base, total)
+        finally:
+            self.stats["failed_reads"] = reader.failed_reads
+            self.stats["bad_bytes"] = self.skip_map.bad_bytes
+            self.stats["unprobed_bytes"] = reader.provisional.bad_bytes
+            self.skip_map.save()
+            rd.close()
@@ -0,0 +1,484 @@
+"""
+Headless scan service for running many recovery jobs at once.
+
+Jobs (carve, MFT scan, imaging, recovery, change-journal deletions) are submitted over a small
+JSON HTTP API on localhost or a Unix socket and queued in a
+:class:`JobScheduler`.  The scheduler runs at most ``max_jobs`` jobs in
+total and at most ``per_device`` jobs per physical device, so jobs on
+different drives run in parallel while jobs on the same spindle are
+serialized.  Each job keeps an append-only event list (status,
+progress, results) that clients stream as newline-delimited JSON; only
+its last ``max_events`` events are kept, and only the last
+``keep_finished`` finished jobs.
+
+Over TCP every request needs ``Authorization: Bearer <token>`` with the
+server's token (``make_server(...).token``) and a ``Host`` naming this
+machine, so web pages the user visits cannot drive the service; POST
+bodies must be ``application/json``.  A Unix socket is protected by its
+file permissions and needs no token.
+
+API::
+
+    POST   /jobs                  {"kind": "carve", "params": {...}}
+    GET    /jobs                  list jobs
+    GET    /jobs/<id>             job status
+    GET    /jobs/<id>/events      stream events (?since=N to resume)
+    DELETE /jobs/<id>             cancel
+"""
+
+from __future__ import annotations
+import os
+import hmac
+import json
+import time
+import secrets
+import socketserver
+import threading
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from .carver import FileCarver
+from .parser import MFTParser
+from .rawio import image_device, open_source, to_raw_if_drive
+from .recovery import FileRecovery, ResidentWriter
+from .scanner import NTFSScanner
+from .signatures import ALL_SIGNATURES
+
+JOB_KINDS = ("carve", "mft", "image", "recover", "journal")
+FINISHED = ("done", "failed", "cancelled")
+
+def device_key(source: str) -> str:
+    """Identify the physical device behind ``source`` for I/O scheduling."""
+    p = to_raw_if_drive(source)
+    if os.name == "nt":
+        if p.startswith("\\\\.\\"):
+            return p.upper()
+        drive = os.path.splitdrive(os.path.abspath(p))[0]
+        return ("\\\\.\\" + drive).upper() if drive else p.upper()
+    try:
+        import stat
+        st = os.stat(p)
+        dev = st.st_rdev if stat.S_ISBLK(st.st_mode) else st.st_dev
+        sys_path = os.path.realpath(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+        if os.path.exists(os.path.join(sys_path, "partition")):
+            sys_path = os.path.dirname(sys_path)
+        if os.path.isdir(sys_path):
+            return os.path.basename(sys_path)
+        return f"dev:{os.major(dev)}:{os.minor(dev)}"
+    except Exception:
+        return os.path.abspath(p)
+
+@dataclass
+class Job:
+    job_id: int
+    kind: str
+    params: dict
+    device: str
+    state: str = "queued"
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    events: List[dict] = field(default_factory=list)
+    dropped: int = 0            # events trimmed from the front of ``events``
+    cancel: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def event_count(self) -> int:
+        return self.dropped + len(self.events)
+
+    def info(self) -> dict:
+        return {"id": self.job_id, "kind": self.kind, "device": self.device,
+                "state": self.state, "error": self.error, "params": self.params,
+                "events": self.event_count}
+
+class JobScheduler:
+    """FIFO job queue with a global and a per-device concurrency limit."""
+
+    def __init__(self, max_jobs: int = 0, per_device: int = 1, progress_interval: float = 0.25,
+                 max_events: int = 10000, keep_finished: int = 100):
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.per_device = max(1, per_device)
+        self.progress_interval = progress_interval
+        self.max_events = max(1, max_events)
+        self.keep_finished = max(0, keep_finished)
+        self._lock = threading.Condition()
+        self._jobs: Dict[int, Job] = {}
+        self._finished: deque[int] = deque()
+        self._queue: deque[Job] = deque()
+        self._running: Dict[str, int] = {}
+        self._active = 0
+        self._next_id = 1
+
+    def submit(self, kind: str, params: dict) -> Job:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind {kind!r}; expected one of {', '.join(JOB_KINDS)}")
+        if not isinstance(params, dict):
+            raise ValueError("params must be an object")
+        if not params.get("source"):
+            raise ValueError("params.source is required")
+        with self._lock:
+            job = Job(self._next_id, kind, params, device_key(params["source"]))
+            self._next_id += 1
+            self._jobs[job.job_id] = job
+            self._queue.append(job)
+            self._event(job, {"type": "status", "state": "queued"})
+            self._dispatch()
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: int) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.state in FINISHED:
+                return False
+            job.cancel.set()
+            if job.state == "queued":
+                self._queue.remove(job)
+                self._finish(job, "cancelled")
+            return True
+
+    def events(self, job, since: int = 0, timeout: float = 30.0) -> List[dict]:
+        """Return events of ``job`` (a Job or its id) from sequence number ``since`` on,
+        waiting up to ``timeout`` for new ones.
+
+        Events already trimmed are skipped; the ``seq`` of each event tells.
+        A Job keeps working after it has been evicted; an unknown or
+        evicted id raises KeyError.
+        """
+        with self._lock:
+            job = self._lookup(job)
+            self._lock.wait_for(lambda: job.event_count > since or job.state in FINISHED, timeout)
+            return job.events[max(0, since - job.dropped):]
+
+    def wait(self, job, timeout: Optional[float] = None) -> Job:
+        """Wait for ``job`` (a Job or its id) to finish; KeyError if the id is unknown or evicted."""
+        with self._lock:
+            job = self._lookup(job)
+            self._lock.wait_for(lambda: job.state in FINISHED, timeout)
+        return job
+
+    # ---- internals (call with self._lock held) ----
+    def _lookup(self, job) -> Job:
+        if isinstance(job, Job):
+            return job
+        found = self._jobs.get(job)
+        if found is None:
+            raise KeyError(f"unknown job {job}")
+        return found
+
+    def _event(self, job: Job, ev: dict):
+        ev["seq"] = job.event_count
+        ev["ts"] = time.time()
+        job.events.append(ev)
+        if len(job.events) >= self.max_events + max(1, self.max_events // 4):
+            n = len(job.events) - self.max_events   # trim in batches, not per event
+            del job.events[:n]
+            job.dropped += n
+        self._lock.notify_all()
+
+    def _finish(self, job: Job, state: str, error: str = ""):
+        job.state = state
+        job.error = error
+        self._event(job, {"type": "status", "state": state, "error": error})
+        self._finished.append(job.job_id)
+        while len(self._finished) > self.keep_finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def _dispatch(self):
+        for job in list(self._queue):
+            if self._active >= self.max_jobs:
+                break
+            if self._running.get(job.device, 0) >= self.per_device:
+                continue
+            self._queue.remove(job)
+            self._active += 1
+            self._running[job.device] = self._running.get(job.device, 0) + 1
+            job.state = "running"
+            self._event(job, {"type": "status", "state": "running"})
+            threading.Thread(target=self._run, args=(job,), daemon=True,
+                             name=f"job-{job.job_id}").start()
+
+    def _run(self, job: Job):
+        last = [0.0]
+
+        def emit(ev: dict):
+            with self._lock:
+                self._event(job, ev)
+
+        def progress(cur: int, total: int):
+            now = time.monotonic()
+            if now - last[0] >= self.progress_interval:
+                last[0] = now
+                emit({"type": "progress", "cur": int(cur), "total": int(total or 0)})
+
+        state, error = "done", ""
+        try:
+            RUNNERS[job.kind](job.params, emit, progress, job.cancel.is_set)
+            if job.cancel.is_set():
+                state = "cancelled"
+        except Exception:
+            state, error = "failed", traceback.format_exc()
+        with self._lock:
+            self._active -= 1
+            self._running[job.device] -= 1
+            if not self._running[job.device]:
+                del self._running[job.device]
+            self._finish(job, state, error)
+            self._dispatch()
+
+# ---- job runners: (params, emit, progress, cancelled) ----
+
+def _run_carve(params: dict, emit, progress, cancelled):
+    sig_map = {sig.name: sig for sig in ALL_SIGNATURES}
+    sigs = [sig_map[t] for t in params.get("types", []) if t in sig_map] or ALL_SIGNATURES
+    c = FileCarver(
+        params["source"], params["out"], sigs,
+        min_size=params.get("min_size", 256),
+        deduplicate=params.get("dedup", True),
+        fast_index=params.get("fast_index", False),
+        start_offset=params.get("start_offset", 0),
+        end_offset=params.get("end_offset", 0),
+        max_files=params.get("max_files", 0),
+        known_hashes=params.get("known_hashes"),
+        container=params.get("container"),
+        container_compression=params.get("container_compression", "none"),
+        progress_cb=progress,
+        stop_flag=cancelled,
+    )
+    try:
+        for r in c.scan():
+            emit({"type": "result", "sig": r.sig.name, "start": r.start, "end": r.end,
+                  "out_path": r.out_path, "ok": r.ok, "note": r.note})
+    finally:
+        c.close()
+
+def _run_mft(params: dict, emit, progress, cancelled):
+    record_size = params.get("record_size", 1024)
+    sector_size = params.get("sector_size", 512)
+    scanner = NTFSScanner(record_size=record_size, sector_size=sector_size)
+    parser = MFTParser(record_size=record_size, sector_size=sector_size)
+    # with "out", resident files are written in the same pass, from the records themselves
+    writer = None
+    if params.get("out"):
+        writer = ResidentWriter(FileRecovery(params["source"], params["out"], record_size=record_size,
+                                             known_hashes=params.get("known_hashes")),
+                                deleted_only=params.get("deleted_only", False))
+    try:
+        for rec in scanner.scan_volume(params["source"], max_records=params.get("max_records", 0)):
+            if cancelled():
+                break
+            try:
+                p = parser.parse(rec.raw, offset=rec.offset)
+            except ValueError:
+                continue
+            event = {"type": "result", "offset": rec.offset, "record_number": p.record_number,
+                     "file_name": p.file_name, "is_deleted": p.is_deleted}
+            if writer is not None:
+                event["out_path"] = writer.add(p)
+            emit(event)
+            progress(rec.offset, 0)
+    finally:
+        if writer is not None:
+            writer.close()
+            writer.recovery.close()
+
+def _run_journal(params: dict, emit, progress, cancelled):
+    scanner = NTFSScanner(sector_size=params.get("sector_size", 512), progress_cb=progress)
+    found = scanner.recent_deletions(params["source"], partition=params.get("partition"),
+                                     since=params.get("since", 0))
+    rec = None
+    if params.get("out"):
+        st = scanner.stats
+        rec = FileRecovery(params["source"], params["out"], record_size=st["record_size"],
+                           cluster_size=st["cluster_size"], volume_offset=st["volume_offset"],
+                           known_hashes=params.get("known_hashes"))
+    try:
+        for d in found:
+            if cancelled():
+                break
+            event = {"type": "result", "record_number": d.usn.record, "seq": d.usn.seq,
+                     "file_name": d.usn.name, "path": d.path, "timestamp": d.usn.timestamp,
+                     "usn": d.usn.usn, "in_mft": d.record is not None}
+            if rec is not None and d.record is not None:
+                event["out_path"] = rec.recover(d.record)
+            emit(event)
+    finally:
+        if rec is not None:
+            rec.close()
+
+def _run_image(params: dict, emit, progress, cancelled):
+    n = image_device(params["source"], params["out"], progress_cb=progress, stop_flag=cancelled)
+    emit({"type": "result", "out_path": params["out"], "bytes": n})
+
+def _run_recover(params: dict, emit, progress, cancelled):
+    record_size = params.get("record_size", 1024)
+    parser = MFTParser(record_size=record_size, sector_size=params.get("sector_size", 512))
+    rec = FileRecovery(params["source"], params["out"], record_size=record_size,
+                       known_hashes=params.get("known_hashes"))
+    offsets = params.get("offsets", [])
+    rd = open_source(params["source"])  # images, compressed images and devices alike
+    try:
+        for n, off in enumerate(offsets):
+            if cancelled():
+                break
+            parsed = parser.parse(rd.read_at(off, record_size), offset=off)
+            emit({"type": "result", "offset": off, "out_path": rec.recover(parsed)})
+            progress(n + 1, len(offsets))
+    finally:
+        rd.close()
+
+RUNNERS: Dict[str, Callable] = {
+    "carve": _run_carve,
+    "mft": _run_mft,
+    "image": _run_image,
+    "recover": _run_recover,
+    "journal": _run_journal,
+}
+
+# ---- HTTP front end ----
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+class _Handler(BaseHTTPRequestHandler):
+    scheduler: JobScheduler
+    token: str = ""             # required as a bearer token unless empty
+    hosts: frozenset = frozenset()   # accepted Host header names; empty accepts any
+
+    def address_string(self) -> str:
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def _json(self, code: int, obj):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _allowed(self) -> bool:
+        """Check Host and token; on failure the error response is already sent."""
+        if self.hosts:
+            host = urlparse("//" + (self.headers.get("Host") or "")).hostname or ""
+            if host not in self.hosts:
+                self._json(403, {"error": "requests must be addressed to localhost"})
+                return False
+        if self.token:
+            auth = self.headers.get("Authorization") or ""
+            if not hmac.compare_digest(auth.encode(), f"Bearer {self.token}".encode()):
+                self._json(401, {"error": "missing or wrong bearer token"})
+                return False
+        return True
+
+    def _job(self, parts: List[str]) -> Optional[Job]:
+        try:
+            job = self.scheduler.get(int(parts[1]))
+        except (IndexError, ValueError):
+            job = None
+        if job is None:
+            self._json(404, {"error": "no such job"})
+        return job
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["jobs"]:
+            return self._json(200, [j.info() for j in self.scheduler.list()])
+        if not parts or parts[0] != "jobs":
+            return self._json(404, {"error": "not found"})
+        job = self._job(parts)
+        if job is None:
+            return
+        if len(parts) == 2:
+            return self._json(200, job.info())
+        if parts[2:] != ["events"]:
+            return self._json(404, {"error": "not found"})
+        try:
+            since = int(parse_qs(url.query).get("since", ["0"])[0])
+        except ValueError:
+            return self._json(400, {"error": "since must be an integer"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            while True:
+                evs = self.scheduler.events(job, since)
+                for ev in evs:
+                    self.wfile.write((json.dumps(ev) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                if evs:
+                    since = evs[-1]["seq"] + 1
+                if job.state in FINISHED and since >= job.event_count:
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        if self.path.rstrip("/") != "/jobs":
+            return self._json(404, {"error": "not found"})
+        ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if ctype != "application/json":
+            return self._json(415, {"error": "the body must be application/json"})
+        try:
+            n = int(self.headers.get("Content-Length", "0"))
+            req = json.loads(self.rfile.read(n) or b"{}")
+            if not isinstance(req, dict):
+                raise ValueError("the body must be a JSON object")
+            params = req.get("params")
+            job = self.scheduler.submit(req.get("kind", ""), {} if params is None else params)
+        except (ValueError, KeyError) as e:
+            return self._json(400, {"error": str(e)})
+        self._json(201, job.info())
+
+    def do_DELETE(self):
+        if not self._allowed():
+            return
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if parts[:1] != ["jobs"] or len(parts) != 2:
+            return self._json(404, {"error": "not found"})
+        job = self._job(parts)
+        if job is None:
+            return
+        self._json(200, {"cancelled": self.scheduler.cancel(job.job_id)})
+
+    def log_message(self, fmt, *args):
+        pass
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+def make_server(scheduler: JobScheduler, host: str = "127.0.0.1", port: int = 8765,
+                unix_path: str = "", token: Optional[str] = None):
+    """Create (but do not start) an HTTP server bound to localhost or a Unix socket.
+
+    A TCP server requires a bearer token: ``token``, or a random one when
+    None; either way it is the returned server's ``token`` attribute.
+    """
+    if unix_path:
+        if not hasattr(socketserver, "UnixStreamServer"):
+            raise ValueError("Unix sockets are not available on this platform; use host and port")
+        handler = type("Handler", (_Handler,), {"scheduler": scheduler, "token": token or ""})
+        if os.path.exists(unix_path):
+            os.unlink(unix_path)
+        srv = _UnixHTTPServer(unix_path, handler)
+    else:
+        token = token or secrets.token_urlsafe(32)
+        hosts = LOCAL_HOSTS | ({host} if host not in ("", "0.0.0.0", "::") else set())
+        handler = type("Handler", (_Handler,), {"scheduler": scheduler, "token": token,
+                                                "hosts": frozenset(hosts)})
+        srv = ThreadingHTTPServer((host, port), handler)
+    srv.token = handler.token
+    return srv
@@ -0,0 +1,295 @@
+"""
+Sharded carving across several machines.
+
+A shard directory on shared storage holds everything the machines need
+to cooperate: ``manifest.json`` describes the source and the byte range
+of every shard, and each shard gets its own ``shard_NNNN`` folder with
+the carved files, a ``claim`` file naming the host that took it and a
+``results.jsonl`` that only appears (by atomic rename) once the shard
+has finished.  A shard owns the carve hits whose header starts inside
+its ``[start, end)`` range; files that run past the end are still
+carved in full by the shard that owns their header.
+
+A running shard touches its claim every ``CLAIM_HEARTBEAT`` seconds, so
+a claim that has not been touched for much longer belongs to a host
+that died; ``claim_shard(..., stale_after=...)`` takes such a claim
+over, and ``force=True`` takes any unfinished shard.  Takeovers of a
+shard are serialized by a short-lived ``claim.lock`` file.
+"""
+
+from __future__ import annotations
+import os
+import json
+import time
+import socket
+from dataclasses import dataclass, asdict
+from typing import Iterable, List, Optional
+from .carver import FileCarver
+from .rawio import open_source, to_raw_if_drive
+from .signatures import ALL_SIGNATURES
+
+MANIFEST = "manifest.json"
+RESULTS = "results.jsonl"
+MERGED = "merged.jsonl"
+CLAIM = "claim"
+CLAIM_LOCK = "claim.lock"
+CLAIM_HEARTBEAT = 60.0
+
+@dataclass
+class Shard:
+    shard_id: int
+    start: int
+    end: int
+
+def _source_size(source: str) -> int:
+    sp = to_raw_if_drive(source)
+    rd = open_source(sp)
+    try:
+        return rd.length or 0
+    finally:
+        rd.close()
+
+def shard_path(shard_dir: str, shard_id: int) -> str:
+    return os.path.join(shard_dir, f"shard_{shard_id:04d}")
+
+def plan_shards(
+    source: str,
+    shard_dir: str,
+    count: int = 0,
+    shard_size: int = 0,
+    align: int = 1024 * 1024,
+    types: Iterable[str] = (),
+    min_size: int = 256,
+    dedup: bool = True,
+) -> dict:
+    """Split ``source`` into shards and write the manifest into ``shard_dir``."""
+    size = _source_size(source)
+    if size <= 0:
+        raise ValueError(f"cannot determine size of {source}")
+    if not shard_size:
+        if count <= 0:
+            raise ValueError("either count or shard_size is required")
+        shard_size = -(-size // count)
+    align = max(1, align)
+    shard_size = max(align, -(-shard_size // align) * align)
+    shards = [Shard(i, start, min(size, start + shard_size))
+              for i, start in enumerate(range(0, size, shard_size))]
+    manifest = {
+        "version": 1,
+        "source": source,
+        "size": size,
+        "types": [t.lower() for t in types],
+        "min_size": min_size,
+        "dedup": dedup,
+        "shards": [asdict(s) for s in shards],
+    }
+    os.makedirs(shard_dir, exist_ok=True)
+    tmp = os.path.join(shard_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, os.path.join(shard_dir, MANIFEST))
+    return manifest
+
+def load_manifest(shard_dir: str) -> dict:
+    with open(os.path.join(shard_dir, MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_claim(path: str, flags: int = os.O_CREAT | os.O_EXCL | os.O_WRONLY) -> None:
+    fd = os.open(path, flags)
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{socket.gethostname()} {os.getpid()}\n")
+
+def _lock_claims(d: str) -> Optional[str]:
+    """Take the shard's takeover lock; None if another host holds it.
+
+    A lock older than ``CLAIM_HEARTBEAT`` was left by a host that died
+    mid-takeover and is broken, but only if it is still the file seen old.
+    """
+    lock = os.path.join(d, CLAIM_LOCK)
+    for _ in range(2):
+        try:
+            _write_claim(lock)
+            return lock
+        except FileExistsError:
+            pass
+        try:
+            st = os.stat(lock)
+        except FileNotFoundError:
+            continue
+        if time.time() - st.st_mtime < CLAIM_HEARTBEAT:
+            return None
+        aside = f"{lock}.{socket.gethostname()}.{os.getpid()}"
+        try:
+            os.rename(lock, aside)
+        except FileNotFoundError:
+            return None
+        if os.stat(aside).st_ino != st.st_ino:  # a fresh lock: put it back
+            try:
+                os.link(aside, lock)
+            except OSError:
+                pass
+            os.unlink(aside)
+            return None
+        os.unlink(aside)
+    return None
+
+def _take_over(d: str, seen: os.stat_result, stale_after: float, force: bool) -> bool:
+    """Replace the claim ``seen`` with ours, if it is still that claim and still takeable.
+
+    The check and the replacement happen under the takeover lock, and
+    ``os.replace`` never leaves the shard without a claim, so a host
+    acting on an old look at the claim cannot take a fresh one.
+    """
+    claim = os.path.join(d, CLAIM)
+    lock = _lock_claims(d)
+    if lock is None:
+        return False
+    try:
+        try:
+            st = os.stat(claim)
+        except FileNotFoundError:
+            return False
+        if (st.st_ino, st.st_mtime_ns) != (seen.st_ino, seen.st_mtime_ns) \
+                or os.path.isfile(os.path.join(d, RESULTS)):
+            return False
+        if not (force or (stale_after and time.time() - st.st_mtime > stale_after)):
+            return False
+        tmp = f"{claim}.{socket.gethostname()}.{os.getpid()}"
+        _write_claim(tmp, os.O_CREAT | os.O_TRUNC | os.O_WRONLY)
+        os.replace(tmp, claim)
+        return True
+    finally:
+        os.unlink(lock)
+
+def claim_shard(shard_dir: str, shard_id: int, stale_after: float = 0, force: bool = False) -> bool:
+    """Atomically mark a shard as taken; False if another host holds it.
+
+    A claim untouched for ``stale_after`` seconds (0: never) or, with
+    ``force``, any claim is taken over, unless the shard has finished.
+    """
+    d = shard_path(shard_dir, shard_id)
+    os.makedirs(d, exist_ok=True)
+    claim = os.path.join(d, CLAIM)
+    try:
+        _write_claim(claim)
+        return True
+    except FileExistsError:
+        pass
+    if os.path.isfile(os.path.join(d, RESULTS)):
+        return False
+    try:
+        seen = os.stat(claim)
+    except FileNotFoundError:
+        return False
+    if not (force or (stale_after and time.time() - seen.st_mtime > stale_after)):
+        return False
+    return _take_over(d, seen, stale_after, force)
+
+def next_unclaimed(shard_dir: str, stale_after: float = 0) -> Optional[int]:
+    """Claim and return the first shard nobody has taken yet, or whose claim went stale."""
+    for s in load_manifest(shard_dir)["shards"]:
+        if claim_shard(shard_dir, s["shard_id"], stale_after):
+            return s["shard_id"]
+    return None
+
+def run_shard(shard_dir: str, shard_id: int, source: str = "", **carver_kw) -> str:
+    """Carve one shard and return the path of its ``results.jsonl``.
+
+    ``source`` overrides the manifest path for machines that mount the
+    shared image elsewhere.  The shard's claim is touched as the carve
+    progresses.
+    """
+    m = load_manifest(shard_dir)
+    shard = next((Shard(**s) for s in m["shards"] if s["shard_id"] == shard_id), None)
+    if shard is None:
+        raise ValueError(f"no shard {shard_id} in manifest")
+    sig_map = {sig.name: sig for sig in ALL_SIGNATURES}
+    sigs = [sig_map[t] for t in m["types"] if t in sig_map] or ALL_SIGNATURES
+    out_dir = shard_path(shard_dir, shard_id)
+    digests = list(carver_kw.pop("digests", ()))
+    if "sha256" not in digests:
+        digests.append("sha256")   # raw_data may be only a preview; hash while carving
+    claim = os.path.join(out_dir, CLAIM)
+    progress_cb = carver_kw.pop("progress_cb", None)
+    touched = [time.monotonic()]
+
+    def heartbeat(cur: int, total: int):
+        now = time.monotonic()
+        if now - touched[0] >= CLAIM_HEARTBEAT:
+            touched[0] = now
+            try:
+                os.utime(claim)
+            except OSError:
+                pass
+        if progress_cb:
+            progress_cb(cur, total)
+    c = FileCarver(
+        source or m["source"], out_dir, sigs,
+        start_offset=shard.start, end_offset=shard.end,
+        min_size=m["min_size"], deduplicate=m["dedup"], digests=digests,
+        progress_cb=heartbeat, **carver_kw,
+    )
+    tmp = os.path.join(out_dir, RESULTS + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in c.scan():
+                f.write(json.dumps({
+                    "shard": shard_id,
+                    "type": r.sig.name,
+                    "start": r.start,
+                    "end": r.end,
+                    "length": r.end - r.start,
+                    "sha256": r.hashes["sha256"],
+                    "out_path": os.path.relpath(r.out_path, shard_dir) if r.out_path else "",
+                    "ok": r.ok,
+                    "note": r.note,
+                }) + "\n")
+    finally:
+        c.close()
+    final = os.path.join(out_dir, RESULTS)
+    os.replace(tmp, final)
+    return final
+
+def pending_shards(shard_dir: str) -> List[int]:
+    m = load_manifest(shard_dir)
+    return [s["shard_id"] for s in m["shards"]
+            if not os.path.isfile(os.path.join(shard_path(shard_dir, s["shard_id"]), RESULTS))]
+
+def merge_shards(shard_dir: str, allow_partial: bool = False) -> List[dict]:
+    """Combine per-shard results into one deduplicated, offset-ordered list.
+
+    The merged list is also written to ``merged.jsonl``.  Hits at the same
+    offset and type are collapsed; with dedup enabled in the manifest,
+    identical content keeps only its lowest-offset copy.
+    """
+    m = load_manifest(shard_dir)
+    missing = pending_shards(shard_dir)
+    if missing and not allow_partial:
+        raise RuntimeError(f"shards not finished: {missing}")
+    hits: List[dict] = []
+    for s in m["shards"]:
+        p = os.path.join(shard_path(shard_dir, s["shard_id"]), RESULTS)
+        if not os.path.isfile(p):
+            continue
+        with open(p, "r", encoding="utf-8") as f:
+            hits.extend(json.loads(line) for line in f if line.strip())
+    hits.sort(key=lambda h: (h["start"], h["type"]))
+    merged: List[dict] = []
+    seen_pos: set[tuple] = set()
+    seen_sha: set[str] = set()
+    for h in hits:
+        key = (h["start"], h["type"])
+        if key in seen_pos:
+            continue
+        seen_pos.add(key)
+        if m["dedup"]:
+            if h["sha256"] in seen_sha:
+                continue
+            seen_sha.add(h["sha256"])
+        merged.append(h)
+    tmp = os.path.join(shard_dir, MERGED + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for h in merged:
+            f.write(json.dumps(h) + "\n")
+    os.replace(tmp, os.path.join(shard_dir, MERGED))
+    return merged
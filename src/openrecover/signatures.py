@@ -10,6 +10,9 @@ class FileSignature:
     header_adjust: int = 0                 # add/sub to where file content should begin
     size_from_header_iso_bmff: Optional[Tuple[int,int]] = None
     # (offset, size_len) for ISO BMFF (mp4/mov/avif/heif) box header size
+    text: bool = False                     # plain text throughout; not looked for in
+                                           # high-entropy blocks (PDF is not: its streams
+                                           # are usually deflated)
 
 # --- Core set (expand anytime) ---
 
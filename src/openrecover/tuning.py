@@ -0,0 +1,114 @@
+"""
+Automatic chunk and overlap selection for the carver.
+
+:class:`ChunkTuner` starts at 4 MiB and doubles the chunk size while the
+measured throughput (read plus search time per byte) keeps improving,
+backs off when it gets worse, and keeps probing neighbouring sizes now
+and then, since a device's speed changes over a scan.  The chunk never
+exceeds the memory limit.  :func:`signature_window` gives the overlap
+needed so no header straddling two chunks is missed.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, List
+from .signatures import FileSignature
+
+MIN_CHUNK = 1024 * 1024
+START_CHUNK = 4 * 1024 * 1024
+MAX_CHUNK = 64 * 1024 * 1024
+
+def signature_window(signatures: Iterable[FileSignature], align: int = 512) -> int:
+    """Bytes a chunk must share with the next one for header detection.
+
+    A header is owned by the chunk it starts in unless it starts in the
+    overlap, so the overlap has to hold the longest header together with
+    any header fields the validators read (ISO BMFF box size).
+    """
+    need = 64
+    for sig in signatures:
+        n = len(sig.header) + max(0, sig.header_adjust)
+        if sig.size_from_header_iso_bmff:
+            off, ln = sig.size_from_header_iso_bmff
+            n = max(n, off + ln)
+        need = max(need, n)
+    return -(-need // align) * align
+
+class ChunkTuner:
+    """Hill-climbs the chunk size on measured bytes per second."""
+
+    def __init__(self, limit: int = MAX_CHUNK, start: int = START_CHUNK, samples: int = 2,
+                 reprobe: int = 32) -> None:
+        self.limit = max(MIN_CHUNK, limit)
+        self.chunk = min(max(MIN_CHUNK, start), self.limit)
+        self.samples = samples      # chunks measured per size before deciding
+        self.reprobe = reprobe      # chunks between probes once settled
+        self._rate: Dict[int, float] = {}
+        self._acc = [0, 0.0, 0.0, 0]  # bytes, read s, search s, chunks at the current size
+        self._dir = 2               # growth factor of the next step (2 or 1/2)
+        self._settled = False
+        self._since = 0
+        self.read_bps = 0.0
+        self.search_bps = 0.0
+        self.history: List[int] = [self.chunk]
+
+    def record(self, nbytes: int, read_s: float, search_s: float) -> int:
+        """Account for one chunk; return the chunk size to use next."""
+        acc = self._acc
+        acc[0] += nbytes
+        acc[1] += read_s
+        acc[2] += search_s
+        acc[3] += 1
+        if acc[3] < self.samples:
+            return self.chunk
+        total_s = max(1e-9, acc[1] + acc[2])
+        rate = acc[0] / total_s
+        self.read_bps = acc[0] / max(1e-9, acc[1])
+        self.search_bps = acc[0] / max(1e-9, acc[2])
+        self._acc = [0, 0.0, 0.0, 0]
+        prev = self._rate.get(self.chunk)
+        self._rate[self.chunk] = rate if prev is None else (prev + rate) / 2
+
+        if self._settled:
+            self._since += 1
+            if self._since < self.reprobe:
+                return self.chunk
+            self._since = 0
+            self._settled = False
+        best = max(self._rate, key=self._rate.get)
+        nxt = self._step(self.chunk)
+        if self.chunk != best:
+            # the last move made things worse: try the other side of the best
+            # size if it is unmeasured, else go back and stay there for a while
+            self._dir = 0.5 if self.chunk > best else 2
+            other = self._step(best)
+            if other is not None and other not in self._rate:
+                self._move(other)
+            else:
+                self._move(best)
+                self._settled = True
+        elif nxt is None:
+            self._dir = 0.5 if self._dir == 2 else 2
+            other = self._step(self.chunk)
+            if other is None or other in self._rate:
+                self._settled = True
+            else:
+                self._move(other)
+        else:
+            self._move(nxt)
+        return self.chunk
+
+    def _step(self, size: int):
+        n = int(size * self._dir)
+        if n < MIN_CHUNK or n > self.limit:
+            return None
+        return n
+
+    def _move(self, size: int):
+        if size != self.chunk:
+            self.chunk = size
+            self.history.append(size)
+
+    def stats(self) -> dict:
+        return {"chunk": self.chunk, "chunk_history": list(self.history),
+                "read_mbps": round(self.read_bps / 1e6, 1),
+                "search_mbps": round(self.search_bps / 1e6, 1)}
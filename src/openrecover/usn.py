@@ -0,0 +1,229 @@
+"""
+NTFS change journal (``$Extend\\$UsnJrnl:$J``) reader.
+
+The journal is a sparse stream: Windows frees its oldest pages, so on a
+volume that has been in use for a while most of its logical size is a
+leading sparse region and only the last few tens of MiB are allocated.
+:func:`iter_journal` maps the stream's runs, skips the sparse ones
+without reading them and parses the allocated ones in large sequential
+reads.
+
+:func:`recent_deletions` keeps the records with the ``FILE_DELETE``
+reason and joins each one to its MFT record.  Deleting a file bumps its
+record's sequence number, so the record still holds the deleted file if
+it is not in use and its sequence is the journal's plus one; otherwise
+the record has been reused and only the journal's name and times are
+left.
+"""
+
+from __future__ import annotations
+import struct
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .parser import (
+    ATTR_ATTRIBUTE_LIST, ATTR_DATA, MFTParser, ParsedRecord, Run, find_attribute,
+    iter_attributes,
+)
+from .paths import ROOT_RECORD, PathResolver
+
+EXTEND_RECORD = 11
+USN_JOURNAL = "$UsnJrnl"
+USN_STREAM = "$J"
+
+USN_REASON_FILE_CREATE = 0x00000100
+USN_REASON_FILE_DELETE = 0x00000200
+USN_REASON_RENAME_OLD_NAME = 0x00001000
+USN_REASON_RENAME_NEW_NAME = 0x00002000
+USN_REASON_CLOSE = 0x80000000
+
+USN_PAGE = 4096                  # records never straddle a page; the tail is zero-padded
+_V2 = struct.Struct('<IHHQQqqIIIIHH')
+_V3 = struct.Struct('<IHH16s16sqqIIIIHH')
+_REF = 0xFFFFFFFFFFFF
+
+@dataclass
+class UsnRecord:
+    usn: int
+    timestamp: int              # FILETIME
+    reason: int
+    record: int
+    seq: int
+    parent: int
+    parent_seq: int
+    name: str
+    attributes: int = 0
+
+def _ref(value) -> Tuple[int, int]:
+    if isinstance(value, bytes):    # FILE_ID_128; NTFS only uses the low 64 bits
+        value = int.from_bytes(value[:8], 'little')
+    return value & _REF, value >> 48
+
+def parse_usn_record(buf: bytes, pos: int = 0) -> Optional[UsnRecord]:
+    """The version 2 or 3 record at ``pos``; None for other versions."""
+    length, major = struct.unpack_from('<IH', buf, pos)
+    if major == 2:
+        st = _V2
+    elif major == 3:
+        st = _V3
+    else:
+        return None
+    (_len, _maj, _min, fref, pref, usn, ts, reason, _src, _sec, attrs,
+     name_len, name_off) = st.unpack_from(buf, pos)
+    if name_off + name_len > length:
+        return None
+    name = buf[pos + name_off:pos + name_off + name_len].decode('utf-16-le', errors='replace')
+    record, seq = _ref(fref)
+    parent, parent_seq = _ref(pref)
+    return UsnRecord(usn, ts, reason, record, seq, parent, parent_seq, name, attrs)
+
+def parse_usn_buffer(buf: bytes, base: int = 0) -> Tuple[List[UsnRecord], int]:
+    """Records of ``buf``, whose first byte is stream offset ``base``, and the bytes consumed.
+
+    A record cut off by the end of ``buf`` is left unconsumed for the
+    caller to carry over.  Padding and damaged records are skipped to
+    the next page.
+    """
+    out: List[UsnRecord] = []
+    pos = 0
+    while pos + 8 <= len(buf):
+        length, major = struct.unpack_from('<IH', buf, pos)
+        if length == 0 or length % 8 or length < _V2.size or \
+                (base + pos) // USN_PAGE != (base + pos + length - 1) // USN_PAGE:
+            pos += USN_PAGE - (base + pos) % USN_PAGE
+            continue
+        if pos + length > len(buf):
+            break
+        rec = parse_usn_record(buf, pos)
+        if rec is not None:
+            out.append(rec)
+        pos += length
+    return out, min(pos, len(buf))
+
+def stream_runs(vol, number: int, raw: bytes, atype: int = ATTR_DATA, name: str = ""
+                ) -> Tuple[List[Run], int]:
+    """Runs and size of a non-resident stream, gathered through ``$ATTRIBUTE_LIST``
+    when the record's attributes spill over into extension records."""
+    attr_list = find_attribute(raw, ATTR_ATTRIBUTE_LIST)
+    if attr_list is None:
+        a = find_attribute(raw, atype, name)
+        if a is None or a.resident:
+            raise ValueError(f"record {number} has no non-resident {name or 'data'} stream")
+        return a.runs, a.data_size
+    value = vol.read_attribute(attr_list)
+    pieces: List[Tuple[int, int]] = []
+    pos = 0
+    while pos + 26 <= len(value):
+        t, rlen, nlen, noff, start_vcn, ref = struct.unpack_from('<IHBBQQ', value, pos)
+        if rlen < 26:
+            break
+        aname = value[pos + noff:pos + noff + 2 * nlen].decode('utf-16-le', errors='replace')
+        if t == atype and aname == name:
+            pieces.append((start_vcn, ref & _REF))
+        pos += rlen
+    runs: List[Run] = []
+    size = 0
+    for start_vcn, holder in sorted(pieces):
+        rec = raw if holder == number else vol.read_record(holder)
+        for a in iter_attributes(rec):
+            if a.type == atype and a.name == name and not a.resident and a.start_vcn == start_vcn:
+                runs.extend(a.runs)
+                if start_vcn == 0:
+                    size = a.data_size
+                break
+    if not runs:
+        raise ValueError(f"record {number} has no non-resident {name or 'data'} stream")
+    return runs, size
+
+def find_journal(vol) -> Optional[int]:
+    """Record number of ``$UsnJrnl`` from the ``$Extend`` index; None if there is no journal."""
+    from .fstree import FSTree
+    with FSTree(vol, prefetch=False) as tree:
+        for e in tree.children(EXTEND_RECORD):
+            if e.name == USN_JOURNAL:
+                return e.record
+    return None
+
+def iter_journal(vol, read_size: int = 16 * 1024 * 1024,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Iterator[UsnRecord]:
+    """Yield the records of the journal in stream order.
+
+    ``progress(done, total)`` counts allocated bytes; sparse runs cost nothing.
+    """
+    number = find_journal(vol)
+    if number is None:
+        raise ValueError("the volume has no change journal")
+    runs, size = stream_runs(vol, number, vol.read_record(number), ATTR_DATA, USN_STREAM)
+    extents = list(vol.extents(runs, 0, size))
+    total = sum(n for voff, n in extents if voff is not None)
+    done = pos = 0
+    carry = b""
+    for voff, n in extents:
+        if voff is None:
+            pos += n
+            carry = b""
+            continue
+        for off in range(0, n, read_size):
+            chunk = vol.read(voff + off, min(read_size, n - off))
+            buf = carry + chunk
+            base = pos + off - len(carry)
+            records, used = parse_usn_buffer(buf, base)
+            yield from records
+            carry = buf[used:]
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+        pos += n
+
+@dataclass
+class JournalDeletion:
+    usn: UsnRecord
+    record: Optional[ParsedRecord]   # None once the MFT record was reused
+    path: str
+
+def recent_deletions(vol, since: int = 0, read_size: int = 16 * 1024 * 1024,
+                     progress: Optional[Callable[[int, int], None]] = None
+                     ) -> List[JournalDeletion]:
+    """Files deleted according to the journal, newest first.
+
+    ``since`` is a FILETIME; older deletions are left out.  A file
+    deleted more than once under the same reference is listed once.
+    """
+    last: Dict[Tuple[int, int], UsnRecord] = {}
+    for rec in iter_journal(vol, read_size, progress):
+        if rec.reason & USN_REASON_FILE_DELETE and rec.timestamp >= since:
+            last[(rec.record, rec.seq)] = rec
+    parser = MFTParser(vol.record_size, vol.boot.bytes_per_sector)
+    paths = PathResolver(limit=vol.record_count)
+
+    def parsed(number: int) -> Optional[ParsedRecord]:
+        try:
+            return parser.parse(vol.read_record(number), number * vol.record_size)
+        except (ValueError, struct.error):
+            return None
+
+    def add_ancestors(number: int) -> None:
+        for _ in range(256):
+            if number in paths:
+                return
+            rec = parsed(number)
+            if rec is None:
+                return
+            if not paths.add(rec, number):
+                return
+            if number == ROOT_RECORD:
+                return
+            number = rec.parent
+
+    out: List[JournalDeletion] = []
+    for (number, seq), u in last.items():
+        rec = parsed(number)
+        if rec is not None and not (rec.is_deleted and rec.sequence in (seq, (seq + 1) & 0xFFFF)):
+            rec = None   # reused by a later file
+        add_ancestors(ROOT_RECORD)
+        add_ancestors(u.parent)
+        ref = rec if rec is not None else ParsedRecord(
+            record_number=number, file_name=u.name, size=0, is_deleted=True, raw=b"",
+            sequence=seq, parent=u.parent, parent_seq=u.parent_seq)
+        out.append(JournalDeletion(u, rec, paths.path(ref)))
+    out.sort(key=lambda d: d.usn.usn, reverse=True)
+    return out
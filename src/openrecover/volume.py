@@ -0,0 +1,167 @@
+"""
+NTFS volume access by MFT record number.
+
+:class:`NTFSVolume` reads the boot sector at a given offset of a source,
+locates the MFT through the runlist of record 0 and can then read any
+record and the content of its attributes.  It is the geometry-aware
+counterpart of :class:`~openrecover.scanner.NTFSScanner`, which only
+searches for ``FILE`` signatures.
+"""
+
+from __future__ import annotations
+import re
+from typing import Iterator, List, Optional, Tuple
+from .parser import (
+    ATTR_DATA, Attribute, BootSector, Run, apply_fixups, find_attribute, parse_boot_sector,
+)
+from .rawio import open_source
+
+MFT_RECORD = 0
+ROOT_RECORD = 5
+BITMAP_RECORD = 6
+
+class NTFSVolume:
+    def __init__(self, source, offset: int = 0) -> None:
+        self._own = isinstance(source, str)
+        self._src = open_source(source) if self._own else source
+        self.offset = offset
+        bs = parse_boot_sector(self.read(0, 512))
+        if bs is None:
+            self.close()
+            raise ValueError(f"no NTFS boot sector at offset {offset}")
+        self.boot: BootSector = bs
+        self.cluster_size = bs.cluster_size
+        self.record_size = bs.record_size
+        rec0 = self._fixup(self.read(bs.mft_lcn * self.cluster_size, self.record_size))
+        data = find_attribute(rec0, ATTR_DATA)
+        if data is None or data.resident:
+            self.close()
+            raise ValueError("$MFT has no non-resident $DATA attribute")
+        self.mft_runs: List[Run] = data.runs
+        self.mft_size = data.data_size
+
+    @property
+    def total_clusters(self) -> int:
+        return self.boot.total_sectors // self.boot.sectors_per_cluster
+
+    @property
+    def record_count(self) -> int:
+        return self.mft_size // self.record_size
+
+    def close(self):
+        if self._own and self._src is not None:
+            self._src.close()
+        self._src = None
+
+    def read(self, off: int, size: int) -> bytes:
+        """Read ``size`` bytes at volume-relative offset ``off``."""
+        return self._src.read_at(self.offset + off, size)
+
+    def _fixup(self, raw: bytes) -> bytes:
+        if raw[:4] != b'FILE':
+            raise ValueError("missing FILE signature")
+        return apply_fixups(raw, self.boot.bytes_per_sector)
+
+    def extents(self, runs: List[Run], start: int = 0, size: Optional[int] = None
+                ) -> Iterator[Tuple[Optional[int], int]]:
+        """Map the logical byte range of a stream to (volume offset or None, length)."""
+        cs = self.cluster_size
+        pos = 0
+        end = None if size is None else start + size
+        for lcn, clusters in runs:
+            rlen = clusters * cs
+            lo = max(start, pos)
+            hi = pos + rlen if end is None else min(end, pos + rlen)
+            if hi > lo:
+                yield (None if lcn is None else lcn * cs + (lo - pos)), hi - lo
+            pos += rlen
+            if end is not None and pos >= end:
+                break
+
+    def read_runs(self, runs: List[Run], start: int = 0, size: Optional[int] = None) -> bytes:
+        out = bytearray()
+        for voff, n in self.extents(runs, start, size):
+            out += b'\x00' * n if voff is None else self.read(voff, n)
+        return bytes(out)
+
+    def read_record(self, number: int) -> bytes:
+        """Return MFT record ``number`` with fixups applied."""
+        raw = self.read_runs(self.mft_runs, number * self.record_size, self.record_size)
+        return self._fixup(raw)
+
+    def iter_records(self, batch: int = 4096) -> Iterator[Tuple[int, bytes]]:
+        """Yield (number, fixed-up record) for every in-use or deleted record.
+
+        The MFT is read ``batch`` records at a time in sequential reads;
+        unused or damaged slots are skipped.
+        """
+        rs = self.record_size
+        for first in range(0, self.record_count, batch):
+            n = min(batch, self.record_count - first)
+            blob = self.read_runs(self.mft_runs, first * rs, n * rs)
+            for i in range(len(blob) // rs):
+                raw = blob[i * rs:(i + 1) * rs]
+                if raw[:4] != b'FILE':
+                    continue
+                try:
+                    yield first + i, apply_fixups(raw, self.boot.bytes_per_sector)
+                except ValueError:
+                    continue
+
+    def read_attribute(self, attr: Attribute, size: Optional[int] = None) -> bytes:
+        if attr.resident:
+            return attr.value if size is None else attr.value[:size]
+        n = attr.data_size if size is None else min(size, attr.data_size)
+        return self.read_runs(attr.runs, 0, n)
+
+    def free_cluster_runs(self) -> List[Tuple[int, int]]:
+        """Return (first cluster, count) for every unallocated run in ``$Bitmap``."""
+        data = find_attribute(self.read_record(BITMAP_RECORD), ATTR_DATA)
+        if data is None:
+            raise ValueError("$Bitmap has no $DATA attribute")
+        bitmap = self.read_attribute(data)
+        total = self.total_clusters
+        runs: List[Tuple[int, int]] = []
+        for m in re.finditer(rb'\x00+', bitmap):  # whole bytes of free clusters
+            runs.append((m.start() * 8, (m.end() - m.start()) * 8))
+        for m in re.finditer(rb'[^\x00\xff]', bitmap):  # mixed bytes, bit by bit
+            b, base = m.group()[0], m.start() * 8
+            for bit in range(8):
+                if not b & (1 << bit):
+                    runs.append((base + bit, 1))
+        runs.sort()
+        merged: List[Tuple[int, int]] = []
+        for first, n in runs:
+            if first >= total:
+                break
+            n = min(n, total - first)
+            if merged and merged[-1][0] + merged[-1][1] == first:
+                merged[-1] = (merged[-1][0], merged[-1][1] + n)
+            else:
+                merged.append((first, n))
+        return merged
+
+    def unallocated_ranges(self, merge_gap: int = 0) -> List[Tuple[int, int]]:
+        """Byte ranges ``[start, end)`` of the source that are free space.
+
+        Free runs separated by at most ``merge_gap`` allocated bytes are
+        coalesced into one range, trading a little extra reading for
+        fewer, longer sequential reads.
+        """
+        cs = self.cluster_size
+        ranges: List[Tuple[int, int]] = []
+        for first, n in self.free_cluster_runs():
+            start, end = self.offset + first * cs, self.offset + (first + n) * cs
+            if ranges and start - ranges[-1][1] <= merge_gap:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+def unallocated_ranges(source: str, volume_offset: int = 0, merge_gap: int = 0) -> List[Tuple[int, int]]:
+    """Free-space byte ranges of the NTFS volume at ``volume_offset`` of ``source``."""
+    vol = NTFSVolume(source, volume_offset)
+    try:
+        return vol.unallocated_ranges(merge_gap)
+    finally:
+        vol.close()
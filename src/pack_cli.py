@@ -0,0 +1,37 @@
+import argparse
+import sys
+from openrecover.container import PackReader
+
+def main():
+    p = argparse.ArgumentParser(description="OpenRecover pack files (carved output containers)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    ls = sub.add_parser("list", help="List the entries of a pack")
+    ls.add_argument("pack")
+    ls.add_argument("--type", default="", help="Only entries of this file type")
+
+    ex = sub.add_parser("extract", help="Extract entries (all, or the given names)")
+    ex.add_argument("pack")
+    ex.add_argument("names", nargs="*")
+    ex.add_argument("--out", required=True, help="Output folder")
+
+    ct = sub.add_parser("cat", help="Write one entry to stdout")
+    ct.add_argument("pack")
+    ct.add_argument("name")
+
+    args = p.parse_args()
+    with PackReader(args.pack) as pk:
+        if args.cmd == "list":
+            for e in pk:
+                if args.type and e.get("type") != args.type:
+                    continue
+                ratio = f" ({e['codec']} {e['stored']})" if e["codec"] != "none" else ""
+                print(f"{e['name']}\t{e['length']}{ratio}\t@{e.get('src_offset', '?')}")
+        elif args.cmd == "extract":
+            paths = pk.extract_all(args.out, args.names or None)
+            print(f"{len(paths)} entries -> {args.out}")
+        else:
+            sys.stdout.buffer.write(pk.read(args.name))
+
+if __name__ == "__main__":
+    main()
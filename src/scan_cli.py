@@ -9,7 +9,24 @@ def main():
     p.add_argument("--min-size", type=int, default=256)
     p.add_argument("--dedup", action="store_true")
     p.add_argument("--types", help="Comma-separated list of file types (e.g. jpg,png,pdf)", default="")
+    p.add_argument("--partition", type=int, default=None, help="Scan only this partition (see --list-partitions)")
+    p.add_argument("--list-partitions", action="store_true", help="List MBR/GPT partitions and exit")
+    p.add_argument("--pack", default=None, help="Write hits into this pack file (see pack_cli.py) instead of loose files")
+    p.add_argument("--pack-compression", choices=["none", "deflate", "zstd"], default="none")
+    p.add_argument("--known-hashes", default=None, help="Hash set index (hashset_cli.py build) of files to skip")
+    p.add_argument("--mft-names", action="store_true", help="Annotate hits with the MFT record that owned their clusters")
+    p.add_argument("--skip-mft-duplicates", action="store_true", help="Drop hits that MFT recovery already covers")
+    p.add_argument("--triage", default=None, metavar="MAP",
+                   help="Classify blocks first and skip constant ones; the map is saved here and reused")
+    p.add_argument("--priority", action="store_true",
+                   help="Carve deleted files' clusters, free space and compressed-looking blocks first")
     args = p.parse_args()
+    if args.list_partitions:
+        from openrecover.partitions import read_partitions
+        for part in read_partitions(args.source):
+            fs = f" {part.fs} cluster={part.cluster_size}" if part.fs else ""
+            print(f"{part.index}: {part.scheme} type={part.type} offset={part.offset} size={part.size}{fs} {part.name}".rstrip())
+        return
     os.makedirs(args.out, exist_ok=True)
     types = [t.strip().lower() for t in args.types.split(",") if t.strip()]
     if types:
@@ -22,11 +39,27 @@ def main():
     else:
         sigs = ALL_SIGNATURES
     c = FileCarver(args.source, args.out, sigs,
-                   min_size=args.min_size, deduplicate=args.dedup,
+                   min_size=args.min_size, deduplicate=args.dedup, partition=args.partition,
+                   known_hashes=args.known_hashes,
+                   mft_index=args.mft_names or args.skip_mft_duplicates or None,
+                   skip_mft_duplicates=args.skip_mft_duplicates,
+                   triage=args.triage, priority=args.priority,
+                   container=args.pack, container_compression=args.pack_compression,
                    progress_cb=lambda cur,total: print(f"{cur}/{total or '?'} bytes"))
     for r in c.scan():
         if r.ok:
-            print(f"[hit] {r.sig.name} -> {r.out_path}")
+            was = f" (was {r.origin.path})" if r.origin is not None else ""
+            print(f"[hit] {r.sig.name} -> {r.out_path}{was}")
+    if c.stats.get("mft_duplicates"):
+        print(f"{c.stats['mft_duplicates']} hits duplicate MFT-recoverable files")
+    if "triage" in c.stats:
+        print("triage: " + ", ".join(f"{n} {k}" for k, n in c.stats["triage"].items())
+              + f" blocks; {c.stats['triage_skipped']} bytes skipped")
+    if "first_hit_seconds" in c.stats:
+        print(f"first hit after {c.stats['first_hit_seconds']:.1f}s")
+    if "known_skipped" in c.stats:
+        print(f"{c.stats['known_skipped']} known files skipped")
+    c.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,28 @@
+import argparse
+from openrecover.service import JobScheduler, make_server
+
+def main():
+    p = argparse.ArgumentParser(description="OpenRecover headless scan service")
+    p.add_argument("--host", default="127.0.0.1", help="Listen address (localhost only by default)")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix", default="", help="Listen on this Unix socket path instead of TCP")
+    p.add_argument("--max-jobs", type=int, default=0, help="Concurrent jobs overall (default: CPU count)")
+    p.add_argument("--per-device", type=int, default=1, help="Concurrent jobs per physical device")
+    p.add_argument("--token", default="", help="Bearer token TCP clients must send (default: random)")
+    args = p.parse_args()
+    sched = JobScheduler(max_jobs=args.max_jobs, per_device=args.per_device)
+    srv = make_server(sched, host=args.host, port=args.port, unix_path=args.unix,
+                      token=args.token or None)
+    where = args.unix or f"http://{args.host}:{srv.server_address[1]}"
+    print(f"OpenRecover service listening on {where} (max jobs {sched.max_jobs}, per device {sched.per_device})")
+    if srv.token:
+        print(f"Send 'Authorization: Bearer {srv.token}' with every request")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+import argparse
+from openrecover.shard import plan_shards, run_shard, merge_shards, next_unclaimed, claim_shard, pending_shards
+
+def main():
+    p = argparse.ArgumentParser(description="OpenRecover sharded carving")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    pl = sub.add_parser("plan", help="Write a shard manifest for a source")
+    pl.add_argument("--source", required=True, help="Path to image file or raw device")
+    pl.add_argument("--dir", required=True, help="Shared shard directory")
+    pl.add_argument("--count", type=int, default=0, help="Number of shards")
+    pl.add_argument("--shard-size", type=int, default=0, help="Bytes per shard (instead of --count)")
+    pl.add_argument("--min-size", type=int, default=256)
+    pl.add_argument("--no-dedup", action="store_true")
+    pl.add_argument("--types", help="Comma-separated list of file types (e.g. jpg,png,pdf)", default="")
+
+    rn = sub.add_parser("run", help="Carve one shard")
+    rn.add_argument("--dir", required=True, help="Shared shard directory")
+    rn.add_argument("--id", type=int, help="Shard ID; omit to claim the next free shard")
+    rn.add_argument("--source", default="", help="Local path of the source if it differs from the manifest")
+    rn.add_argument("--stale-after", type=float, default=3600,
+                    help="Take over claims untouched for this many seconds (0: never)")
+    rn.add_argument("--force", action="store_true", help="Take the --id shard even if another host claimed it")
+
+    mg = sub.add_parser("merge", help="Merge finished shard results")
+    mg.add_argument("--dir", required=True, help="Shared shard directory")
+    mg.add_argument("--partial", action="store_true", help="Merge even if some shards are unfinished")
+
+    args = p.parse_args()
+    if args.cmd == "plan":
+        types = [t.strip().lower() for t in args.types.split(",") if t.strip()]
+        m = plan_shards(args.source, args.dir, count=args.count, shard_size=args.shard_size,
+                        types=types, min_size=args.min_size, dedup=not args.no_dedup)
+        for s in m["shards"]:
+            print(f"shard {s['shard_id']}: {s['start']}-{s['end']}")
+    elif args.cmd == "run":
+        if args.id is None:
+            sid = next_unclaimed(args.dir, args.stale_after)
+            if sid is None:
+                print("No unclaimed shards left")
+                return
+        else:
+            sid = args.id
+            if not claim_shard(args.dir, sid, args.stale_after, force=args.force):
+                print(f"Shard {sid} is finished or claimed by another host (see --force)", file=sys.stderr)
+                sys.exit(1)
+        path = run_shard(args.dir, sid, source=args.source,
+                         progress_cb=lambda cur, total: print(f"[shard {sid}] {cur}/{total or '?'} bytes"))
+        print(f"[done] shard {sid} -> {path}")
+    else:
+        merged = merge_shards(args.dir, allow_partial=args.partial)
+        missing = pending_shards(args.dir)
+        print(f"{len(merged)} hits merged" + (f"; unfinished shards: {missing}" if missing else ""))
+
+if __name__ == "__main__":
+    main()